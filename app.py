@@ -1,8 +1,13 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from flask.cli import FlaskGroup
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
 import os
+import sys
+import time
+import click
 from dotenv import load_dotenv
 
 
@@ -10,8 +15,25 @@ load_dotenv()
 
 
 from app.models import db
+from app.utils.availability import availability_hub
+from app.utils.cache import analytics_cache
+from app.utils.hold_expiry import hold_expiry
+from app.utils.jobs import report_jobs
+from app.utils.lot_listing import lot_listing
+from app.utils.metrics import metrics
+from app.utils.passwords import login_limiter, password_hasher
+from app.utils.principals import principal_cache
+from app.utils.profiler import request_profiler
+from app.utils.query_stats import query_stats
+from app.utils.spot_allocator import spot_allocator
 jwt = JWTManager()
 
+
+@jwt.token_verification_loader
+def stream_tokens_only_open_the_stream(jwt_header, jwt_data):
+    """Availability stream tokens travel in URLs, so they are good for nothing else"""
+    return not availability_hub.is_stream_token(jwt_data) or request.endpoint == 'user.availability_stream'
+
 def create_app():
     
     
@@ -25,10 +47,33 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-change-this')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+    app.config['CACHE_URL'] = os.environ.get('CACHE_URL', 'memory://')
+    app.config['JOBS_BROKER_URL'] = os.environ.get('JOBS_BROKER_URL', 'memory://')
+    # Reverse proxies in front of the app (nginx, a load balancer): their
+    # X-Forwarded-For / -Proto entries are trusted, the client's are not
+    app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+    # Refuse to start unless login limits are counted in a store every worker shares
+    app.config['LOGIN_LIMITER_REQUIRE_SHARED'] = os.environ.get('LOGIN_LIMITER_REQUIRE_SHARED') == '1'
+    
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     # Initialize extensions 
     db.init_app(app)
+    metrics.init_app(app)
     jwt.init_app(app)
+    query_stats.init_app(app)
+    request_profiler.init_app(app)
+    spot_allocator.init_app(app)
+    lot_listing.init_app(app)
+    analytics_cache.init_app(app)
+    principal_cache.init_app(app)
+    availability_hub.init_app(app)
+    report_jobs.init_app(app)
+    hold_expiry.init_app(app)
+    password_hasher.init_app(app)
+    login_limiter.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}}, 
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
          allow_headers=['Content-Type', 'Authorization'])
@@ -40,6 +85,7 @@ def create_app():
   
     register_frontend_routes(app)
     
+    register_commands(app)
   
     
    
@@ -61,6 +107,92 @@ def register_blueprints(app):
     
    
 
+def register_commands(app):
+    """Register maintenance CLI commands (python app.py <command>)"""
+    
+    @app.cli.command('upgrade-schema')
+    def upgrade_schema_command():
+        """Add missing tables, columns and indexes to an existing database"""
+        from app.utils.schema import upgrade_schema
+        
+        db.create_all()
+        applied = upgrade_schema()
+        print(f"Schema up to date ({len(applied)} changes applied)")
+        for change in applied:
+            print(f"   + {change}")
+    
+    @app.cli.command('reconcile-lot-counters')
+    def reconcile_lot_counters():
+        """Rebuild parking lot spot counters from the spots table"""
+        from app.models.parking_lot import ParkingLot
+        
+        updated = ParkingLot.reconcile_spot_counts()
+        db.session.commit()
+        analytics_cache.invalidate_all()
+        print(f"Reconciled spot counters for {updated} parking lots")
+    
+    @app.cli.command('reconcile-user-totals')
+    def reconcile_user_totals():
+        """Rebuild users.total_spent and last_activity_at from reservations"""
+        from app.models.user import User
+        
+        updated = User.reconcile_activity()
+        db.session.commit()
+        print(f"Reconciled parking totals for {updated} users")
+    
+    @app.cli.command('rebuild-revenue-rollups')
+    def rebuild_revenue_rollups():
+        """Recompute the revenue rollup table from completed reservations"""
+        from app.models.revenue_rollup import RevenueRollup
+        
+        buckets = RevenueRollup.rebuild()
+        db.session.commit()
+        analytics_cache.invalidate_all()
+        print(f"Rebuilt {buckets} revenue rollup buckets")
+    
+    @app.cli.command('generate-dataset')
+    @click.option('--users', default=10000, show_default=True)
+    @click.option('--lots', default=50, show_default=True)
+    @click.option('--spots-per-lot', default=200, show_default=True)
+    @click.option('--months', default=12, show_default=True, help='Months of reservation history')
+    @click.option('--reservations', default=1_000_000, show_default=True)
+    @click.option('--seed', default=42, show_default=True)
+    def generate_dataset_command(users, lots, spots_per_lot, months, reservations, seed):
+        """Fill an empty database with a deterministic synthetic dataset"""
+        from app.utils.schema import upgrade_schema
+        from app.utils.synthetic import generate_dataset
+        
+        db.create_all()
+        upgrade_schema()
+        started = time.perf_counter()
+        try:
+            counts = generate_dataset(
+                users=users, lots=lots, spots_per_lot=spots_per_lot, months=months,
+                reservations=reservations, seed=seed,
+                progress=lambda message: print(f"   {time.perf_counter() - started:6.1f}s  {message}")
+            )
+        except ValueError as e:
+            print(f"⚠️  {e}")
+            sys.exit(1)
+        analytics_cache.invalidate_all()
+        print(f"Generated {counts['reservations']:,} reservations in {time.perf_counter() - started:.1f}s")
+        print("   " + ", ".join(f"{name}: {value:,}" for name, value in counts.items()))
+    
+    @app.cli.command('expire-holds')
+    def expire_holds():
+        """Expire reservations held longer than HOLD_TTL_MINUTES without parking"""
+        expired = hold_expiry.sweep()
+        print(f"Expired {expired} stale holds")
+    
+    @app.cli.command('run-job-worker')
+    def run_job_worker():
+        """Run a Celery worker for report jobs queued on JOBS_BROKER_URL"""
+        if app.config['JOBS_BROKER_URL'].startswith('memory://'):
+            print("JOBS_BROKER_URL is memory://: jobs already run inside the web process")
+            sys.exit(1)
+        report_jobs.celery().worker_main(['worker', '--loglevel=INFO'])
+    
+
 def register_frontend_routes(app):
     
     @app.route('/')
@@ -76,12 +208,36 @@ def register_frontend_routes(app):
 
     @app.route('/api/health')
     def health_check():
+        """Liveness plus a real round trip to the database; 503 if it fails"""
+        from sqlalchemy import text
+        
+        started = time.perf_counter()
+        try:
+            db.session.execute(text('SELECT 1'))
+            database = {'status': 'up'}
+        except Exception:
+            # Unauthenticated endpoint: the error (DSN, host, driver) goes to the log only
+            app.logger.exception('health check: database unreachable')
+            database = {'status': 'down'}
+        finally:
+            db.session.rollback()
+        database['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        
+        healthy = database['status'] == 'up'
         return jsonify({
-            'status': 'healthy', 
-            'message': 'Vehicle Parking API is running',
+            'status': 'healthy' if healthy else 'unhealthy', 
+            'message': 'Vehicle Parking API is running' if healthy else 'Database unreachable',
             'version': '4.0',
-            'frontend': 'enabled'
-        })
+            'frontend': 'enabled',
+            'checks': {'database': database}
+        }), 200 if healthy else 503
+    
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus metrics of this process"""
+        if not metrics.authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
     
     # Debug endpoint
     @app.route('/debug')
@@ -94,6 +250,7 @@ def register_frontend_routes(app):
             'static_folder': app.static_folder,
             'api_endpoints': {
                 'health': '/api/health',
+                'metrics': '/metrics',
                 'auth': '/api/auth/*',
                 'user': '/api/user/*',
                 'admin': '/api/admin/*'
@@ -113,6 +270,7 @@ def register_frontend_routes(app):
             'version': '4.0',
             'endpoints': {
                 'health': '/api/health',
+                'metrics': '/metrics',
                 'auth': {
                     'login': 'POST /api/auth/login',
                     'register': 'POST /api/auth/register',
@@ -150,9 +308,13 @@ def init_database(app):
             from app.models.parking_lot import ParkingLot
             from app.models.parking_spot import ParkingSpot
             from app.models.reservation import Reservation
+            from app.models.revenue_rollup import RevenueRollup
+            from app.utils.provisioning import provision_spots
+            from app.utils.schema import upgrade_schema
             
       
             db.create_all()
+            upgrade_schema()
             
             
             # Create admin user
@@ -237,19 +399,11 @@ def init_database(app):
                         price_per_hour=lot_data['price_per_hour']
                     )
                     db.session.add(lot)
-                    db.session.commit()
-                    
-                    
-                    for i in range(1, lot.total_spots + 1):
-                        spot = ParkingSpot(
-                            lot_id=lot.id,
-                            spot_number=f"{lot.name[0]}{i:03d}"  
-                        )
-                        db.session.add(spot)
+                    db.session.flush()
                     
-                   
+                    provision_spots(lot, lot.total_spots)
             
-          
+            db.session.commit()
             
         except Exception as e:
             print(f"⚠️  Database initialization error: {e}")
@@ -295,6 +449,10 @@ def inject_config():
 
 if __name__ == '__main__':
     
+    # Maintenance commands: python app.py <command> (see register_commands)
+    if len(sys.argv) > 1:
+        FlaskGroup(create_app=lambda: app)()
+        sys.exit(0)
    
     init_database(app)
     
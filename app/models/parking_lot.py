@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import and_, func, select, update
 from app.models import db
 
 class ParkingLot(db.Model):
@@ -11,6 +12,14 @@ class ParkingLot(db.Model):
     total_spots = db.Column(db.Integer, nullable=False)
     price_per_hour = db.Column(db.Float, nullable=False, default=50.0)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    
+    # Spot counters, kept in step with parking_spots in the same transaction
+    available_spot_count = db.Column(db.Integer, default=0, nullable=False)
+    occupied_spot_count = db.Column(db.Integer, default=0, nullable=False)
+    active_spot_count = db.Column(db.Integer, default=0, nullable=False)
+    # Bumped on every spot state change and lot edit (listing ETags)
+    version = db.Column(db.Integer, default=1, nullable=False)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -23,14 +32,18 @@ class ParkingLot(db.Model):
         self.pin_code = pin_code
         self.total_spots = total_spots
         self.price_per_hour = price_per_hour
+        self.available_spot_count = 0
+        self.occupied_spot_count = 0
+        self.active_spot_count = 0
+        self.version = 1
     
     @property
     def available_spots_count(self):
-        return len([spot for spot in self.parking_spots if not spot.is_occupied and spot.is_active])
+        return self.available_spot_count
     
     @property
     def occupied_spots_count(self):
-        return len([spot for spot in self.parking_spots if spot.is_occupied])
+        return self.occupied_spot_count
     
     @property
     def occupancy_rate(self):
@@ -38,6 +51,65 @@ class ParkingLot(db.Model):
             return 0
         return round((self.occupied_spots_count / self.total_spots) * 100, 2)
     
+    @staticmethod
+    def adjust_spot_counts(lot_id, available=0, occupied=0, active=0):
+        """Apply counter deltas with one atomic UPDATE in the current transaction"""
+        values = {}
+        if available:
+            values['available_spot_count'] = ParkingLot.available_spot_count + available
+        if occupied:
+            values['occupied_spot_count'] = ParkingLot.occupied_spot_count + occupied
+        if active:
+            values['active_spot_count'] = ParkingLot.active_spot_count + active
+        if not values:
+            return
+        values['version'] = ParkingLot.version + 1
+        
+        db.session.execute(
+            update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(**values)
+            .execution_options(synchronize_session='fetch')
+        )
+    
+    @staticmethod
+    def bump_version(lot_id):
+        """Mark the lot as changed for cached listings (atomic UPDATE)"""
+        db.session.execute(
+            update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(version=ParkingLot.version + 1)
+            .execution_options(synchronize_session='fetch')
+        )
+    
+    @staticmethod
+    def reconcile_spot_counts(lot_id=None):
+        """Rebuild the counters from the parking_spots table"""
+        from app.models.parking_spot import ParkingSpot
+        
+        def spot_count(*conditions):
+            return (
+                select(func.count(ParkingSpot.id))
+                .where(ParkingSpot.lot_id == ParkingLot.id, *conditions)
+                .scalar_subquery()
+            )
+        
+        active = ParkingSpot.is_active == True
+        statement = update(ParkingLot).values(
+            available_spot_count=spot_count(
+                and_(active, ParkingSpot.is_occupied == False, ParkingSpot.is_reserved == False)
+            ),
+            occupied_spot_count=spot_count(ParkingSpot.is_occupied == True),
+            active_spot_count=spot_count(active),
+            version=ParkingLot.version + 1
+        )
+        if lot_id is not None:
+            statement = statement.where(ParkingLot.id == lot_id)
+        
+        result = db.session.execute(statement.execution_options(synchronize_session=False))
+        db.session.expire_all()
+        return result.rowcount
+    
     def to_dict(self):
         return {
             'id': self.id,
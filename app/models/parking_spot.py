@@ -1,14 +1,21 @@
 from datetime import datetime
 from app.models import db
+from app.models.parking_lot import ParkingLot
 
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spots'
+    __table_args__ = (
+        # Free-spot lookups and per-lot counts
+        db.Index('ix_parking_spots_lot_state', 'lot_id', 'is_active', 'is_occupied', 'is_reserved'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False)
     spot_number = db.Column(db.String(10), nullable=False)
     is_occupied = db.Column(db.Boolean, default=False, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Held by a 'reserved' reservation that has not started parking yet
+    is_reserved = db.Column(db.Boolean, default=False, nullable=False)
     vehicle_number = db.Column(db.String(20), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -16,15 +23,33 @@ class ParkingSpot(db.Model):
     # Relationships
     reservations = db.relationship('Reservation', backref='parking_spot', lazy=True)
     
+    def _counted_state(self):
+        available = self.is_active and not self.is_occupied and not self.is_reserved
+        return int(bool(available)), int(bool(self.is_occupied))
+    
+    def _sync_lot_counts(self, before):
+        after = self._counted_state()
+        ParkingLot.adjust_spot_counts(
+            self.lot_id,
+            available=after[0] - before[0],
+            occupied=after[1] - before[1]
+        )
+    
     def occupy_spot(self, vehicle_number):
+        before = self._counted_state()
         self.is_occupied = True
+        self.is_reserved = False
         self.vehicle_number = vehicle_number
         self.updated_at = datetime.utcnow()
+        self._sync_lot_counts(before)
     
     def release_spot(self):
+        before = self._counted_state()
         self.is_occupied = False
+        self.is_reserved = False
         self.vehicle_number = None
         self.updated_at = datetime.utcnow()
+        self._sync_lot_counts(before)
     
     def to_dict(self):
         return {
@@ -33,6 +58,7 @@ class ParkingSpot(db.Model):
             'spot_number': self.spot_number,
             'is_occupied': self.is_occupied,
             'is_active': self.is_active,
+            'is_reserved': self.is_reserved,
             'vehicle_number': self.vehicle_number,
             'lot_name': self.parking_lot.name if self.parking_lot else None
         }
@@ -1,8 +1,39 @@
 from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers, contains_eager, joinedload
 from app.models import db
 
+# Partial index predicates: only the small 'active' / 'reserved' slice of the table
+ACTIVE_ONLY = text("status = 'active'")
+RESERVED_ONLY = text("status = 'reserved'")
+
+# to_dict() fields that are formatted or derived
+DURATION_FIELDS = frozenset({'duration_formatted', 'duration_hours', 'duration_minutes'})
+COMPUTED_FIELDS = DURATION_FIELDS | {'reservation_time', 'parking_start_time', 'parking_end_time'}
+
 class Reservation(db.Model):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # Per-user lookups: active/reserved checks, per-status counts, history pages
+        db.Index('ix_reservations_user_status', 'user_id', 'status'),
+        db.Index('ix_reservations_user_created_id', 'user_id', 'created_at', 'id'),
+        # Analytics windows over completed sessions; covers the occupancy
+        # interval load so it never touches the table
+        db.Index('ix_reservations_status_end_interval', 'status', 'parking_end_time',
+                 'parking_start_time', 'spot_id'),
+        db.Index('ix_reservations_start', 'parking_start_time'),
+        # Listings ordered newest first; (created_at, id) is the keyset
+        db.Index('ix_reservations_created_id', 'created_at', 'id'),
+        # Joins from parking_spots (lot filters)
+        db.Index('ix_reservations_spot', 'spot_id'),
+        # Open sessions only
+        db.Index('ix_reservations_active_spot', 'spot_id',
+                 sqlite_where=ACTIVE_ONLY, postgresql_where=ACTIVE_ONLY),
+        db.Index('ix_reservations_active_start', 'parking_start_time',
+                 sqlite_where=ACTIVE_ONLY, postgresql_where=ACTIVE_ONLY),
+        db.Index('ix_reservations_reserved_time', 'reservation_time',
+                 sqlite_where=RESERVED_ONLY, postgresql_where=RESERVED_ONLY),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -23,6 +54,28 @@ class Reservation(db.Model):
     # Relationships
     user = db.relationship('User', backref='reservations', lazy=True)
     
+    # Loader options for listings that show user, spot and lot per row.
+    # Keep them here so every endpoint loads the same graph in one statement.
+    @staticmethod
+    def with_details():
+        """Eager-load user, spot and the spot's lot with LEFT OUTER JOINs"""
+        from app.models.parking_spot import ParkingSpot
+        configure_mappers()  # parking_spot / parking_lot are backrefs
+        return (
+            joinedload(Reservation.user),
+            joinedload(Reservation.parking_spot).joinedload(ParkingSpot.parking_lot),
+        )
+    
+    @staticmethod
+    def with_joined_details():
+        """Populate user, spot and lot from joins already in the query"""
+        from app.models.parking_spot import ParkingSpot
+        configure_mappers()
+        return (
+            contains_eager(Reservation.user),
+            contains_eager(Reservation.parking_spot).contains_eager(ParkingSpot.parking_lot),
+        )
+    
     def start_parking(self):
         self.status = 'active'
         self.parking_start_time = datetime.utcnow()
@@ -117,25 +170,67 @@ class Reservation(db.Model):
             'revenue_generated': self.total_cost if self.status == 'completed' else 0.0
         }
     
-    def to_dict(self):
-        base_dict = {
+    # Keys of the list representation, selectable with ?fields=
+    FIELDS = (
+        'id', 'user_id', 'spot_id', 'vehicle_number', 'status',
+        'reservation_time', 'parking_start_time', 'parking_end_time',
+        'hourly_rate', 'total_cost',
+        'duration_formatted', 'duration_hours', 'duration_minutes',
+    )
+    
+    @staticmethod
+    def parse_fields(raw):
+        """Validated ?fields= value as a tuple, or None for every field"""
+        if not raw:
+            return None
+        fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in Reservation.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+    
+    def to_dict(self, fields=None):
+        """Compact representation for lists and actions.
+        
+        Durations are derived from one subtraction; the cost breakdown is
+        left to the detail endpoints (get_cost_breakdown()).
+        """
+        if fields is not None:
+            return self._project(fields)
+        
+        start, end, reserved = self.parking_start_time, self.parking_end_time, self.reservation_time
+        if start and end:
+            seconds = (end - start).total_seconds()
+            minutes = int(seconds / 60)
+            hours = minutes // 60
+            formatted = f"{hours}h {minutes % 60}m" if hours else f"{minutes}m"
+            duration_hours = round(seconds / 3600, 2)
+        else:
+            formatted, duration_hours, minutes = "N/A", 0.0, 0
+        
+        return {
             'id': self.id,
             'user_id': self.user_id,
             'spot_id': self.spot_id,
             'vehicle_number': self.vehicle_number,
             'status': self.status,
-            'reservation_time': self.reservation_time.isoformat() if self.reservation_time else None,
-            'parking_start_time': self.parking_start_time.isoformat() if self.parking_start_time else None,
-            'parking_end_time': self.parking_end_time.isoformat() if self.parking_end_time else None,
+            'reservation_time': reserved.isoformat() if reserved else None,
+            'parking_start_time': start.isoformat() if start else None,
+            'parking_end_time': end.isoformat() if end else None,
             'hourly_rate': self.hourly_rate,
             'total_cost': self.total_cost,
-            'duration_formatted': self.format_duration(),
-            'duration_hours': self.get_duration_hours(),
-            'duration_minutes': self.get_duration_minutes()
+            'duration_formatted': formatted,
+            'duration_hours': duration_hours,
+            'duration_minutes': minutes
         }
-        
-        # Cost breakdown
-        if self.status == 'completed':
-            base_dict['cost_breakdown'] = self.get_cost_breakdown()
-        
-        return base_dict
\ No newline at end of file
+    
+    def _project(self, fields):
+        """to_dict() restricted to `fields`, computing only what they need"""
+        if not DURATION_FIELDS.isdisjoint(fields):
+            data = self.to_dict()
+            return {name: data[name] for name in fields}
+        data = {}
+        for name in fields:
+            value = getattr(self, name)
+            data[name] = value.isoformat() if name in COMPUTED_FIELDS and value else value
+        return data
@@ -0,0 +1,142 @@
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db
+
+# Revenue split by session length, matching the analytics duration brackets
+DURATION_BRACKETS = [
+    ('0-1 hours', 'revenue_0_1h', 1),
+    ('1-2 hours', 'revenue_1_2h', 2),
+    ('2-4 hours', 'revenue_2_4h', 4),
+    ('4-8 hours', 'revenue_4_8h', 8),
+    ('8+ hours', 'revenue_8h_plus', None),
+]
+
+
+class RevenueRollup(db.Model):
+    """Completed sessions pre-aggregated per (end date, lot, start hour)"""
+    __tablename__ = 'revenue_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'lot_id', 'start_hour', name='uq_revenue_rollups_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    # No foreign key: history outlives a deleted lot
+    lot_id = db.Column(db.Integer, nullable=False)
+    start_hour = db.Column(db.Integer, nullable=False)
+
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    sessions = db.Column(db.Integer, default=0, nullable=False)
+    billed_hours = db.Column(db.Float, default=0.0, nullable=False)
+    parked_hours = db.Column(db.Float, default=0.0, nullable=False)
+
+    revenue_0_1h = db.Column(db.Float, default=0.0, nullable=False)
+    revenue_1_2h = db.Column(db.Float, default=0.0, nullable=False)
+    revenue_2_4h = db.Column(db.Float, default=0.0, nullable=False)
+    revenue_4_8h = db.Column(db.Float, default=0.0, nullable=False)
+    revenue_8h_plus = db.Column(db.Float, default=0.0, nullable=False)
+
+    SUM_COLUMNS = (
+        'revenue', 'sessions', 'billed_hours', 'parked_hours',
+        'revenue_0_1h', 'revenue_1_2h', 'revenue_2_4h', 'revenue_4_8h', 'revenue_8h_plus'
+    )
+
+    @staticmethod
+    def bucket_values(lot_id, parking_start_time, parking_end_time, total_cost):
+        """Rollup contribution of one completed session"""
+        hours = (parking_end_time - parking_start_time).total_seconds() / 3600
+        cost = total_cost or 0.0
+        values = {
+            'day': parking_end_time.date(),
+            'lot_id': lot_id,
+            'start_hour': parking_start_time.hour,
+            'revenue': cost,
+            'sessions': 1,
+            'billed_hours': max(hours, 1.0),
+            'parked_hours': hours,
+        }
+        for _, column, _ in DURATION_BRACKETS:
+            values[column] = 0.0
+        for _, column, upper in DURATION_BRACKETS:
+            if upper is None or hours <= upper:
+                values[column] = cost
+                break
+        return values
+
+    @staticmethod
+    def record_session(reservation, lot_id):
+        """Add a just-completed reservation to its bucket (same transaction)"""
+        if not reservation.parking_start_time or not reservation.parking_end_time:
+            return
+        values = RevenueRollup.bucket_values(
+            lot_id, reservation.parking_start_time, reservation.parking_end_time, reservation.total_cost
+        )
+        RevenueRollup.add_to_bucket(values)
+
+    @staticmethod
+    def add_to_bucket(values):
+        """Upsert: create the bucket or add the values to its sums"""
+        table = RevenueRollup.__table__
+        key = ('day', 'lot_id', 'start_hour')
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            statement = dialect_insert(table).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(key),
+                set_={name: table.c[name] + statement.excluded[name] for name in RevenueRollup.SUM_COLUMNS}
+            )
+            db.session.execute(statement)
+            return
+
+        # Portable fallback: bump the bucket, create it if nothing matched
+        matches = [table.c[name] == values[name] for name in key]
+        result = db.session.execute(
+            update(table).where(*matches).values(
+                **{name: table.c[name] + values[name] for name in RevenueRollup.SUM_COLUMNS}
+            )
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table).values(**values))
+
+    @staticmethod
+    def rebuild(chunk_size=5000):
+        """Recompute every bucket from completed reservations, returns bucket count"""
+        from app.models.parking_spot import ParkingSpot
+        from app.models.reservation import Reservation
+
+        rows = db.session.execute(
+            select(
+                ParkingSpot.lot_id,
+                Reservation.parking_start_time,
+                Reservation.parking_end_time,
+                Reservation.total_cost
+            )
+            .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .where(
+                Reservation.status == 'completed',
+                Reservation.parking_start_time.isnot(None),
+                Reservation.parking_end_time.isnot(None)
+            )
+            .execution_options(yield_per=chunk_size)
+        )
+
+        buckets = {}
+        for lot_id, start, end, cost in rows:
+            values = RevenueRollup.bucket_values(lot_id, start, end, cost)
+            key = (values['day'], values['lot_id'], values['start_hour'])
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = values
+            else:
+                for name in RevenueRollup.SUM_COLUMNS:
+                    bucket[name] += values[name]
+
+        db.session.execute(delete(RevenueRollup.__table__))
+        if buckets:
+            db.session.execute(insert(RevenueRollup.__table__), list(buckets.values()))
+        return len(buckets)
+
+    def __repr__(self):
+        return f'<RevenueRollup {self.day} lot={self.lot_id} hour={self.start_hour}>'
@@ -1,9 +1,15 @@
 from datetime import datetime
+from sqlalchemy import func, select, update
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import db
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Admin user list sorted by spend / recency
+        db.Index('ix_users_admin_total_spent', 'is_admin', 'total_spent'),
+        db.Index('ix_users_admin_last_activity', 'is_admin', 'last_activity_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -18,15 +24,22 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def __init__(self, username, email, password, full_name, phone, address, pin_code, is_admin=False):
+    # Parking totals, kept in step with reservations in the same transaction
+    total_spent = db.Column(db.Float, default=0.0, nullable=False)
+    last_activity_at = db.Column(db.DateTime)
+    
+    def __init__(self, username, email, password, full_name, phone, address, pin_code, is_admin=False,
+                 password_hash=None):
         self.username = username
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        # Request handlers pass a hash made on the hashing pool (app.utils.passwords)
+        self.password_hash = password_hash or generate_password_hash(password)
         self.full_name = full_name
         self.phone = phone
         self.address = address
         self.pin_code = pin_code
         self.is_admin = is_admin
+        self.total_spent = 0.0
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -34,6 +47,41 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    @staticmethod
+    def record_activity(user_id, spent=0.0, at=None):
+        """Bump last activity (and spend) with one atomic UPDATE"""
+        values = {'last_activity_at': at or datetime.utcnow()}
+        if spent:
+            values['total_spent'] = User.total_spent + spent
+        
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session='fetch')
+        )
+    
+    @staticmethod
+    def reconcile_activity(user_id=None):
+        """Rebuild total_spent and last_activity_at from the reservations table"""
+        from app.models.reservation import Reservation
+        
+        mine = Reservation.user_id == User.id
+        statement = update(User).values(
+            total_spent=select(func.coalesce(func.sum(Reservation.total_cost), 0.0))
+            .where(mine, Reservation.status == 'completed')
+            .scalar_subquery(),
+            last_activity_at=select(func.max(func.coalesce(Reservation.updated_at, Reservation.created_at)))
+            .where(mine)
+            .scalar_subquery()
+        )
+        if user_id is not None:
+            statement = statement.where(User.id == user_id)
+        
+        result = db.session.execute(statement.execution_options(synchronize_session=False))
+        db.session.expire_all()
+        return result.rowcount
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,18 +1,41 @@
-from flask import Blueprint, request, jsonify
+import math
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+from sqlalchemy import asc, func, desc, or_
+from sqlalchemy.orm import selectinload
 from app.models import db
 from app.models.user import User
 from app.models.parking_lot import ParkingLot
 from app.models.parking_spot import ParkingSpot
 from app.models.reservation import Reservation
+from app.utils import analytics as analytics_queries
+from app.utils.availability import availability_hub
+from app.utils.cache import analytics_cache
+from app.utils import export as reservation_export
+from app.utils.jobs import report_jobs
+from app.utils.pagination import paginate_newest_first
+from app.utils.occupancy import RESOLUTIONS, day_window, load_intervals, occupancy_series
+from app.utils.parking_sessions import complete_parking_session
+from app.utils.principals import principal_cache
+from app.utils.profiler import request_profiler
+from app.utils.provisioning import provision_spots, resize_lot
+from app.utils.spot_allocator import spot_allocator
 
 admin_bp = Blueprint('admin', __name__)
 
+# ?sort= values accepted by the user list
+USER_SORT_COLUMNS = {
+    'id': User.id,
+    'username': User.username,
+    'created_at': User.created_at,
+    'total_spent': User.total_spent,
+    'last_activity': User.last_activity_at,
+}
+
 def require_admin():
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    user = principal_cache.load(get_jwt_identity())
     
     if not user:
         return None, jsonify({'error': 'User not found'}), 404
@@ -33,35 +56,28 @@ def admin_dashboard():
         if error_response:
             return error_response, status_code
         
-        # Statistics
-        total_users = User.query.filter_by(is_admin=False).count()
-        total_lots = ParkingLot.query.filter_by(is_active=True).count()
-        total_spots = ParkingSpot.query.filter_by(is_active=True).count()
-        occupied_spots = ParkingSpot.query.filter_by(is_occupied=True, is_active=True).count()
-        total_reservations = Reservation.query.count()
-        active_reservations = Reservation.query.filter_by(status='active').count()
+        # Statistics (single aggregate statement)
+        totals = analytics_queries.dashboard_totals()
+        total_spots = totals['total_parking_spots']
+        occupied_spots = totals['occupied_spots']
         
         
         recent_reservations = Reservation.query.order_by(
             Reservation.created_at.desc()
         ).limit(10).all()
         
-        # Revenue
-        completed_reservations = Reservation.query.filter_by(status='completed').all()
-        total_revenue = sum(res.total_cost for res in completed_reservations if res.total_cost)
-        
         return jsonify({
-            'admin': admin.to_dict(),
+            'admin': db.session.get(User, admin.id).to_dict(),
             'statistics': {
-                'total_users': total_users,
-                'total_parking_lots': total_lots,
+                'total_users': totals['total_users'],
+                'total_parking_lots': totals['total_parking_lots'],
                 'total_parking_spots': total_spots,
                 'occupied_spots': occupied_spots,
                 'available_spots': total_spots - occupied_spots,
                 'occupancy_rate': round((occupied_spots / total_spots * 100), 2) if total_spots > 0 else 0,
-                'total_reservations': total_reservations,
-                'active_reservations': active_reservations,
-                'total_revenue': total_revenue
+                'total_reservations': totals['total_reservations'],
+                'active_reservations': totals['active_reservations'],
+                'total_revenue': totals['total_revenue']
             },
             'recent_reservations': [res.to_dict() for res in recent_reservations]
         }), 200
@@ -77,19 +93,17 @@ def get_all_parking_lots():
         if error_response:
             return error_response, status_code
         
-        lots = ParkingLot.query.all()
+        # Spot grid for every lot in one extra query
+        lots = ParkingLot.query.options(selectinload(ParkingLot.parking_spots)).all()
         
         lots_data = []
         for lot in lots:
             lot_dict = lot.to_dict()
-            total_spots = len(lot.parking_spots)
-            active_spots = len([s for s in lot.parking_spots if s.is_active])
-            occupied_spots = len([s for s in lot.parking_spots if s.is_occupied and s.is_active])
             
             lot_dict.update({
-                'total_spots_actual': total_spots,
-                'active_spots': active_spots,
-                'occupied_spots_actual': occupied_spots,
+                'total_spots_actual': len(lot.parking_spots),
+                'active_spots': lot.active_spot_count,
+                'occupied_spots_actual': lot.occupied_spot_count,
                 'revenue_today': 0,  
                 'spot_details': [spot.to_dict() for spot in lot.parking_spots]
             })
@@ -134,20 +148,13 @@ def create_parking_lot():
         )
         
         db.session.add(parking_lot)
-        db.session.commit()
-        
-        spot_prefix = parking_lot.name[0].upper() 
-        spots_created = []
-        
-        for i in range(1, parking_lot.total_spots + 1):
-            spot = ParkingSpot(
-                lot_id=parking_lot.id,
-                spot_number=f"{spot_prefix}{i:03d}"  
-            )
-            db.session.add(spot)
-            spots_created.append(spot.spot_number)
+        db.session.flush()
         
+        # Lot and all its spots go in with one commit
+        spots_created = provision_spots(parking_lot, parking_lot.total_spots)
         db.session.commit()
+        analytics_cache.invalidate()
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Parking lot created successfully',
@@ -168,7 +175,7 @@ def update_parking_lot(lot_id):
         if error_response:
             return error_response, status_code
         
-        lot = ParkingLot.query.get(lot_id)
+        lot = db.session.get(ParkingLot, lot_id)
         if not lot:
             return jsonify({'error': 'Parking lot not found'}), 404
         
@@ -178,14 +185,34 @@ def update_parking_lot(lot_id):
         
         updateable_fields = ['name', 'address', 'pin_code', 'price_per_hour', 'is_active']
         updated_fields = []
+        old_name = lot.name
         
         for field in updateable_fields:
             if field in data:
                 setattr(lot, field, data[field])
                 updated_fields.append(field)
         
+        if 'total_spots' in data:
+            try:
+                new_total = int(data['total_spots'])
+                resize_lot(lot, new_total)
+            except (TypeError, ValueError) as e:
+                db.session.rollback()
+                return jsonify({'error': f'Invalid total_spots: {e}'}), 400
+            updated_fields.append('total_spots')
+        
         lot.updated_at = datetime.utcnow()
+        ParkingLot.bump_version(lot.id)
         db.session.commit()
+        if lot.name != old_name:
+            # Lot names appear in every user's cached charts
+            analytics_cache.invalidate_all()
+        else:
+            analytics_cache.invalidate()
+        availability_hub.notify()
+        
+        if 'total_spots' in updated_fields:
+            spot_allocator.forget(lot.id)
         
         return jsonify({
             'message': 'Parking lot updated successfully',
@@ -205,18 +232,19 @@ def delete_parking_lot(lot_id):
         if error_response:
             return error_response, status_code
         
-        lot = ParkingLot.query.get(lot_id)
+        lot = db.session.get(ParkingLot, lot_id)
         if not lot:
             return jsonify({'error': 'Parking lot not found'}), 404
         
-        occupied_spots = ParkingSpot.query.filter_by(
-            lot_id=lot_id, 
-            is_occupied=True
+        # Held spots count as busy too: deleting them would strand the holds
+        busy_spots = ParkingSpot.query.filter(
+            ParkingSpot.lot_id == lot_id,
+            or_(ParkingSpot.is_occupied, ParkingSpot.is_reserved)
         ).count()
         
-        if occupied_spots > 0:
+        if busy_spots > 0:
             return jsonify({
-                'error': f'Cannot delete parking lot. {occupied_spots} spots are currently occupied.'
+                'error': f'Cannot delete parking lot. {busy_spots} spots are currently occupied or reserved.'
             }), 400
         
     
@@ -225,6 +253,9 @@ def delete_parking_lot(lot_id):
         
         db.session.delete(lot)
         db.session.commit()
+        spot_allocator.forget(lot_id)
+        analytics_cache.invalidate()
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Parking lot deleted successfully',
@@ -244,36 +275,93 @@ def get_all_users():
         if error_response:
             return error_response, status_code
         
-        users = User.query.filter_by(is_admin=False).all()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        sort = request.args.get('sort', 'id')
+        order = request.args.get('order', 'asc')
+        search = request.args.get('search', '').strip()
+        status = request.args.get('status', '')
+        
+        sort_column = USER_SORT_COLUMNS.get(sort)
+        if sort_column is None or order not in ('asc', 'desc'):
+            return jsonify({
+                'error': f"sort must be one of {', '.join(USER_SORT_COLUMNS)} and order asc or desc"
+            }), 400
+        if status not in ('', 'active', 'inactive'):
+            return jsonify({'error': 'status must be active or inactive'}), 400
+        
+        filters = []
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            filters.append(or_(
+                User.username.ilike(pattern, escape='\\'),
+                User.email.ilike(pattern, escape='\\'),
+                User.full_name.ilike(pattern, escape='\\')
+            ))
+        if status:
+            filters.append(User.is_active == (status == 'active'))
+        
+        # Matching count and the header statistics in one statement
+        totals = analytics_queries.user_list_totals(filters)
+        
+        # Sort keys are indexed together with is_admin, id breaks ties
+        direction = desc if order == 'desc' else asc
+        users = User.query.filter(User.is_admin == False, *filters).order_by(
+            direction(sort_column), direction(User.id)
+        ).paginate(page=page, per_page=per_page, error_out=False, count=False)
+        pages = math.ceil(totals['matching'] / users.per_page)
+        
+        user_ids = [user.id for user in users.items]
+        
+        # Per-user reservation counts for the whole page in one grouped query
+        reservation_counts = dict(
+            db.session.query(Reservation.user_id, func.count(Reservation.id))
+            .filter(Reservation.user_id.in_(user_ids))
+            .group_by(Reservation.user_id)
+            .all()
+        ) if user_ids else {}
+        
+        active_reservations = {}
+        if user_ids:
+            for reservation in Reservation.query.filter(
+                Reservation.user_id.in_(user_ids),
+                Reservation.status == 'active'
+            ).order_by(Reservation.id):
+                active_reservations.setdefault(reservation.user_id, reservation)
         
         users_data = []
-        for user in users:
+        for user in users.items:
             user_dict = user.to_dict()
-            
-            # Add user statistics
-            total_reservations = Reservation.query.filter_by(user_id=user.id).count()
-            active_reservation = Reservation.query.filter_by(
-                user_id=user.id, 
-                status='active'
-            ).first()
-            
-            completed_reservations = Reservation.query.filter_by(
-                user_id=user.id, 
-                status='completed'
-            ).all()
-            total_spent = sum(res.total_cost for res in completed_reservations if res.total_cost)
+            active_reservation = active_reservations.get(user.id)
+            last_activity = user.last_activity_at or user.updated_at
             
             user_dict.update({
-                'total_reservations': total_reservations,
+                'total_reservations': reservation_counts.get(user.id, 0),
                 'active_reservation': active_reservation.to_dict() if active_reservation else None,
-                'total_spent': total_spent,
-                'last_activity': user.updated_at.isoformat() if user.updated_at else None
+                'total_spent': user.total_spent,
+                'last_activity': last_activity.isoformat() if last_activity else None
             })
             users_data.append(user_dict)
         
         return jsonify({
             'users': users_data,
-            'total_users': len(users_data)
+            'total_users': totals['matching'],
+            'statistics': {
+                'total_users': totals['total_users'],
+                'active_users': totals['active_users'],
+                'admin_users': totals['admin_users'],
+                'new_users_month': totals['new_users_month']
+            },
+            'pagination': {
+                'page': users.page,
+                'pages': pages,
+                'per_page': users.per_page,
+                'total': totals['matching'],
+                'has_next': users.page < pages,
+                'has_prev': users.page > 1,
+                'sort': sort,
+                'order': order
+            }
         }), 200
         
     except Exception as e:
@@ -288,7 +376,7 @@ def toggle_user_status(user_id):
         if error_response:
             return error_response, status_code
         
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
@@ -299,6 +387,7 @@ def toggle_user_status(user_id):
         user.is_active = not user.is_active
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        principal_cache.remember(user)
         
         return jsonify({
             'message': f'User {"activated" if user.is_active else "deactivated"} successfully',
@@ -322,8 +411,6 @@ def get_all_reservations():
         status = request.args.get('status')  # active, completed, reserved
         lot_id = request.args.get('lot_id', type=int)
         user_id = request.args.get('user_id', type=int)
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         
         
         query = Reservation.query
@@ -335,21 +422,15 @@ def get_all_reservations():
         if user_id:
             query = query.filter_by(user_id=user_id)
         
-        
-        reservations = query.order_by(Reservation.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            fields = Reservation.parse_fields(request.args.get('fields'))
+            reservations, pagination = paginate_newest_first(query, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'reservations': [res.to_dict() for res in reservations.items],
-            'pagination': {
-                'page': page,
-                'pages': reservations.pages,
-                'per_page': per_page,
-                'total': reservations.total,
-                'has_next': reservations.has_next,
-                'has_prev': reservations.has_prev
-            },
+            'reservations': [res.to_dict(fields) for res in reservations],
+            'pagination': pagination,
             'filters_applied': {
                 'status': status,
                 'lot_id': lot_id,
@@ -360,6 +441,85 @@ def get_all_reservations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/reservations/export', methods=['GET'])
+@jwt_required()
+def export_reservations():
+    """Stream filtered reservations as NDJSON or CSV"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
+        
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in reservation_export.FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(reservation_export.FORMATS)}"}), 400
+        
+        filters = {
+            'status': request.args.get('status'),
+            'lot_id': request.args.get('lot_id', type=int),
+            'user_id': request.args.get('user_id', type=int)
+        }
+        for name in ('date_from', 'date_to'):
+            value = request.args.get(name)
+            if value:
+                try:
+                    filters[name] = reservation_export.parse_timestamp(value)
+                except ValueError:
+                    return jsonify({'error': f'Invalid {name} format. Use ISO format.'}), 400
+        
+        statement = reservation_export.export_statement(**filters)
+        body = reservation_export.encode(reservation_export.stream_chunks(statement), export_format)
+        
+        filename = f"reservations-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+        return Response(
+            stream_with_context(body),
+            mimetype=reservation_export.FORMATS[export_format],
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                # Let proxies pass chunks through as they are produced
+                'X-Accel-Buffering': 'no',
+                'Cache-Control': 'no-store'
+            }
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/reservations/<int:reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation(reservation_id):
+    """One reservation with its user, spot, lot and cost breakdown"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
+        
+        reservation = Reservation.query.options(*Reservation.with_details()).filter_by(id=reservation_id).first()
+        if not reservation:
+            return jsonify({'error': 'Reservation not found'}), 404
+        
+        user = reservation.user
+        spot = reservation.parking_spot
+        lot = spot.parking_lot if spot else None
+        return jsonify({
+            'reservation': {
+                **reservation.to_dict(),
+                'user_details': {
+                    'id': user.id,
+                    'username': user.username,
+                    'email': user.email,
+                    'full_name': user.full_name,
+                    'phone': user.phone
+                } if user else None,
+                'spot_details': spot.to_dict() if spot else None,
+                'lot_details': lot.to_dict() if lot else None,
+                'cost_breakdown': reservation.get_cost_breakdown()
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/reservations/detailed', methods=['GET'])
 @jwt_required()
 def get_detailed_reservations():
@@ -375,11 +535,15 @@ def get_detailed_reservations():
         user_id = request.args.get('user_id', type=int)
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         
        
-        query = db.session.query(Reservation).join(User).join(ParkingSpot).join(ParkingLot)
+        query = (
+            db.session.query(Reservation)
+            .join(Reservation.user)
+            .join(Reservation.parking_spot)
+            .join(ParkingSpot.parking_lot)
+            .options(*Reservation.with_joined_details())
+        )
         
     
         if status:
@@ -405,16 +569,17 @@ def get_detailed_reservations():
                 return jsonify({'error': 'Invalid date_to format. Use ISO format.'}), 400
         
       
-        reservations_paginated = query.order_by(desc(Reservation.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            reservations, pagination = paginate_newest_first(query, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Reservation data
         detailed_reservations = []
-        for res in reservations_paginated.items:
-            user = User.query.get(res.user_id)
-            spot = ParkingSpot.query.get(res.spot_id)
-            lot = ParkingLot.query.get(spot.lot_id) if spot else None
+        for res in reservations:
+            user = res.user
+            spot = res.parking_spot
+            lot = spot.parking_lot if spot else None
             
             reservation_data = {
                 **res.to_dict(),
@@ -435,14 +600,7 @@ def get_detailed_reservations():
         
         return jsonify({
             'reservations': detailed_reservations,
-            'pagination': {
-                'page': page,
-                'pages': reservations_paginated.pages,
-                'per_page': per_page,
-                'total': reservations_paginated.total,
-                'has_next': reservations_paginated.has_next,
-                'has_prev': reservations_paginated.has_prev
-            },
+            'pagination': pagination,
             'filters_applied': {
                 'status': status,
                 'lot_id': lot_id,
@@ -457,6 +615,7 @@ def get_detailed_reservations():
 
 @admin_bp.route('/analytics/revenue', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('revenue', require_admin, shared=True)
 def revenue_analytics():
     """Get comprehensive revenue analytics"""
     try:
@@ -469,10 +628,7 @@ def revenue_analytics():
         start_date = datetime.utcnow() - timedelta(days=days)
         
        
-        reservations = Reservation.query.filter(
-            Reservation.status == 'completed',
-            Reservation.parking_end_time >= start_date
-        ).all()
+        totals = analytics_queries.revenue_totals(start_date)
         
         # revenue
         analytics = {
@@ -480,7 +636,7 @@ def revenue_analytics():
             'start_date': start_date.isoformat(),
             'end_date': datetime.utcnow().isoformat(),
             'total_revenue': 0,
-            'total_sessions': len(reservations),
+            'total_sessions': totals['sessions'],
             'average_revenue_per_session': 0,
             'total_hours_sold': 0,
             'revenue_by_lot': {},
@@ -490,90 +646,36 @@ def revenue_analytics():
             'peak_hours': {}
         }
         
-        if reservations:
+        if totals['sessions']:
             
-            total_revenue = sum(res.total_cost for res in reservations if res.total_cost)
+            total_revenue = totals['revenue']
             analytics['total_revenue'] = round(total_revenue, 2)
+            analytics['average_revenue_per_session'] = round(total_revenue / totals['sessions'], 2)
+            analytics['total_hours_sold'] = round(totals['parked_hours'], 2)
             
-            if len(reservations) > 0:
-                analytics['average_revenue_per_session'] = round(total_revenue / len(reservations), 2)
-            
-        
-            total_hours = 0
-            for res in reservations:
-                if res.parking_start_time and res.parking_end_time:
-                    duration = res.parking_end_time - res.parking_start_time
-                    hours = duration.total_seconds() / 3600
-                    total_hours += hours
-            
-            analytics['total_hours_sold'] = round(total_hours, 2)
-            
-            # Revenuezzzzzz
-            lot_revenue = {}
-            lot_sessions = {}
-            for res in reservations:
-                spot = ParkingSpot.query.get(res.spot_id)
-                if spot:
-                    lot = ParkingLot.query.get(spot.lot_id)
-                    if lot:
-                        lot_name = lot.name
-                        if lot_name not in lot_revenue:
-                            lot_revenue[lot_name] = 0
-                            lot_sessions[lot_name] = 0
-                        
-                        lot_revenue[lot_name] += res.total_cost or 0
-                        lot_sessions[lot_name] += 1
-            
-            for lot_name in lot_revenue:
+            # Revenue by lot
+            for lot_name, lot in analytics_queries.revenue_by_lot(start_date).items():
                 analytics['revenue_by_lot'][lot_name] = {
-                    'total_revenue': round(lot_revenue[lot_name], 2),
-                    'sessions': lot_sessions[lot_name],
-                    'average_per_session': round(lot_revenue[lot_name] / lot_sessions[lot_name], 2) if lot_sessions[lot_name] > 0 else 0
+                    'total_revenue': round(lot['revenue'], 2),
+                    'sessions': lot['sessions'],
+                    'average_per_session': round(lot['revenue'] / lot['sessions'], 2) if lot['sessions'] > 0 else 0
                 }
             
-            # Revenuezzzzz
-            daily_revenue = {}
-            for res in reservations:
-                if res.parking_end_time:
-                    date_key = res.parking_end_time.strftime('%Y-%m-%d')
-                    if date_key not in daily_revenue:
-                        daily_revenue[date_key] = {'revenue': 0, 'sessions': 0}
-                    daily_revenue[date_key]['revenue'] += res.total_cost or 0
-                    daily_revenue[date_key]['sessions'] += 1
+            # Revenue by day
+            analytics['revenue_by_day'] = analytics_queries.revenue_by_day(start_date)
             
-            analytics['revenue_by_day'] = daily_revenue
+            # Top users
+            top_users, _ = analytics_queries.top_users_by_revenue(start_date)
+            for top_user in top_users:
+                analytics['top_users'].append({
+                    'user_id': top_user['user_id'],
+                    'username': top_user['username'],
+                    'email': top_user['email'],
+                    'total_revenue': round(top_user['revenue'], 2),
+                    'total_sessions': top_user['sessions']
+                })
             
-            # Top userzzzzzz
-            user_revenue = {}
-            for res in reservations:
-                user_id = res.user_id
-                if user_id not in user_revenue:
-                    user_revenue[user_id] = {'revenue': 0, 'sessions': 0}
-                user_revenue[user_id]['revenue'] += res.total_cost or 0
-                user_revenue[user_id]['sessions'] += 1
-            
-            top_user_ids = sorted(user_revenue.keys(), key=lambda x: user_revenue[x]['revenue'], reverse=True)[:5]
-            for user_id in top_user_ids:
-                user = User.query.get(user_id)
-                if user:
-                    analytics['top_users'].append({
-                        'user_id': user_id,
-                        'username': user.username,
-                        'email': user.email,
-                        'total_revenue': round(user_revenue[user_id]['revenue'], 2),
-                        'total_sessions': user_revenue[user_id]['sessions']
-                    })
-            
-            hour_usage = {}
-            for res in reservations:
-                if res.parking_start_time:
-                    hour = res.parking_start_time.hour
-                    if hour not in hour_usage:
-                        hour_usage[hour] = {'sessions': 0, 'revenue': 0}
-                    hour_usage[hour]['sessions'] += 1
-                    hour_usage[hour]['revenue'] += res.total_cost or 0
-            
-            analytics['peak_hours'] = hour_usage
+            analytics['peak_hours'] = analytics_queries.revenue_by_start_hour(start_date)
         
         return jsonify(analytics), 200
         
@@ -582,6 +684,7 @@ def revenue_analytics():
 
 @admin_bp.route('/analytics/occupancy', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('occupancy', require_admin, shared=True, ttl=60)
 def occupancy_analytics():
    
     try:
@@ -599,8 +702,8 @@ def occupancy_analytics():
         lot_occupancy = []
         
         for lot in lots:
-            lot_total = len([s for s in lot.parking_spots if s.is_active])
-            lot_occupied = len([s for s in lot.parking_spots if s.is_occupied and s.is_active])
+            lot_total = lot.active_spot_count
+            lot_occupied = lot.occupied_spot_count
             lot_available = lot_total - lot_occupied
             
             occupancy_rate = (lot_occupied / lot_total * 100) if lot_total > 0 else 0
@@ -615,27 +718,27 @@ def occupancy_analytics():
                 'price_per_hour': lot.price_per_hour
             })
         
-        #last 7 days
-        days_back = 7
-        historical_data = []
+        resolution = request.args.get('resolution', '1h')
+        if resolution not in RESOLUTIONS:
+            return jsonify({'error': f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
         
-        for i in range(days_back):
-            date = datetime.utcnow() - timedelta(days=i)
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            
-            active_sessions = Reservation.query.filter(
-                Reservation.parking_start_time <= day_end,
-                Reservation.parking_end_time >= day_start,
-                Reservation.status == 'completed'
-            ).count()
-            
+        # Last 7 days: sessions and true concurrent occupancy from one load
+        window_start, window_end = day_window(7)
+        intervals = load_intervals(window_start, window_end)
+        daily = occupancy_series(window_start, window_end, '1d', intervals=intervals)
+        timeline = occupancy_series(window_start, window_end, resolution, intervals=intervals)
+        
+        historical_data = []
+        for i, day in enumerate(daily['bins']):
             historical_data.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'active_sessions': active_sessions
+                'date': day.strftime('%Y-%m-%d'),
+                'active_sessions': daily['total']['sessions'][i],
+                'peak_occupancy': daily['total']['peak'][i],
+                'average_occupancy': daily['total']['average'][i]
             })
         
+        lot_names = dict(db.session.query(ParkingLot.id, ParkingLot.name).all())
+        
         analytics = {
             'current_status': {
                 'total_spots': total_spots,
@@ -644,7 +747,16 @@ def occupancy_analytics():
                 'system_occupancy_rate': round((occupied_spots / total_spots * 100), 2) if total_spots > 0 else 0
             },
             'lot_breakdown': lot_occupancy,
-            'historical_occupancy': list(reversed(historical_data)),  
+            'historical_occupancy': historical_data,
+            'occupancy_timeline': {
+                'resolution': resolution,
+                'labels': [moment.isoformat() for moment in timeline['bins']],
+                'total': timeline['total'],
+                'lots': {
+                    lot_names.get(lot_id, str(lot_id)): series
+                    for lot_id, series in timeline['lots'].items()
+                }
+            },
 
             'efficiency_metrics': {
                 'average_occupancy_rate': round(sum(lot['occupancy_rate'] for lot in lot_occupancy) / len(lot_occupancy), 2) if lot_occupancy else 0,
@@ -662,6 +774,7 @@ def occupancy_analytics():
 
 @admin_bp.route('/analytics/charts/dashboard', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('dashboard-charts', require_admin, shared=True)
 def get_dashboard_charts():
     
     try:
@@ -671,272 +784,239 @@ def get_dashboard_charts():
         
        
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
+        if report_jobs.offloaded(days):
+            return report_jobs.accepted(report_jobs.submit('dashboard-charts', days=days), 'admin.get_job')
+        return jsonify(dashboard_charts_report(days)), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_jobs.report('dashboard-charts', shared=True)
+def dashboard_charts_report(days):
+    """Admin dashboard charts over the last `days` days"""
+    start_date = datetime.utcnow() - timedelta(days=days)
     
-        reservations = Reservation.query.filter(
-            Reservation.status == 'completed',
-            Reservation.parking_end_time >= start_date
-        ).all()
-        
-        #Revenue Over Timezzzz
-        revenue_by_day = {}
-        sessions_by_day = {}
-        for res in reservations:
-            if res.parking_end_time:
-                date_key = res.parking_end_time.strftime('%Y-%m-%d')
-                revenue_by_day[date_key] = revenue_by_day.get(date_key, 0) + (res.total_cost or 0)
-                sessions_by_day[date_key] = sessions_by_day.get(date_key, 0) + 1
-        
-      
-        current_date = start_date
-        while current_date <= datetime.utcnow():
-            date_key = current_date.strftime('%Y-%m-%d')
-            if date_key not in revenue_by_day:
-                revenue_by_day[date_key] = 0
-                sessions_by_day[date_key] = 0
-            current_date += timedelta(days=1)
-        
- 
-        sorted_revenue = sorted(revenue_by_day.items())
-        
-        #Parking Lot Performance
-        lot_performance = {}
-        for res in reservations:
-            spot = ParkingSpot.query.get(res.spot_id)
-            if spot:
-                lot = ParkingLot.query.get(spot.lot_id)
-                if lot:
-                    lot_name = lot.name
-                    if lot_name not in lot_performance:
-                        lot_performance[lot_name] = {
-                            'revenue': 0,
-                            'sessions': 0,
-                            'avg_duration': 0,
-                            'total_hours': 0
-                        }
-                    
-                    lot_performance[lot_name]['revenue'] += res.total_cost or 0
-                    lot_performance[lot_name]['sessions'] += 1
-                    
-                    if res.parking_start_time and res.parking_end_time:
-                        duration = res.parking_end_time - res.parking_start_time
-                        hours = duration.total_seconds() / 3600
-                        lot_performance[lot_name]['total_hours'] += hours
-        
-        # Average duration
-        for lot_name in lot_performance:
-            if lot_performance[lot_name]['sessions'] > 0:
-                lot_performance[lot_name]['avg_duration'] = round(
-                    lot_performance[lot_name]['total_hours'] / lot_performance[lot_name]['sessions'], 2
-                )
-        
-        # Hourly Usage 
-        hourly_usage = {}
-        for hour in range(24):
-            hourly_usage[hour] = {'sessions': 0, 'revenue': 0}
-        
-        for res in reservations:
-            if res.parking_start_time:
-                hour = res.parking_start_time.hour
-                hourly_usage[hour]['sessions'] += 1
-                hourly_usage[hour]['revenue'] += res.total_cost or 0
-        
-        #User Activity Distribution
-        user_activity = {}
-        for res in reservations:
-            user = User.query.get(res.user_id)
-            if user:
-                user_key = f"{user.username}"
-                user_activity[user_key] = user_activity.get(user_key, 0) + (res.total_cost or 0)
-        
-        
-        sorted_users = sorted(user_activity.items(), key=lambda x: x[1], reverse=True)
-        top_users = sorted_users[:5]
-        others_revenue = sum(revenue for _, revenue in sorted_users[5:])
-        
-        user_chart_data = dict(top_users)
-        if others_revenue > 0:
-            user_chart_data['Others'] = others_revenue
-        
-        #Monthly Comparisonzzzz
-        monthly_data = {}
-        for i in range(12):
-            month_start = datetime.utcnow().replace(day=1) - timedelta(days=30 * i)
-            month_key = month_start.strftime('%Y-%m')
-            monthly_data[month_key] = {'revenue': 0, 'sessions': 0}
-        
-        for res in reservations:
-            if res.parking_end_time:
-                month_key = res.parking_end_time.strftime('%Y-%m')
-                if month_key in monthly_data:
-                    monthly_data[month_key]['revenue'] += res.total_cost or 0
-                    monthly_data[month_key]['sessions'] += 1
-        
 
+    daily = analytics_queries.revenue_by_day(start_date)
+    
+    #Revenue Over Time
+    revenue_by_day = {date: day['revenue'] for date, day in daily.items()}
+    sessions_by_day = {date: day['sessions'] for date, day in daily.items()}
+    
+  
+    current_date = start_date
+    while current_date <= datetime.utcnow():
+        date_key = current_date.strftime('%Y-%m-%d')
+        if date_key not in revenue_by_day:
+            revenue_by_day[date_key] = 0
+            sessions_by_day[date_key] = 0
+        current_date += timedelta(days=1)
+    
 
-        # Occupancy Trends
-        occupancy_trends = []
-        for i in range(30):
-            date = datetime.utcnow() - timedelta(days=i)
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            daily_sessions = Reservation.query.filter(
-                Reservation.parking_start_time >= day_start,
-                Reservation.parking_start_time < day_end
-            ).count()
-            
-            occupancy_trends.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'sessions': daily_sessions,
-                'occupancy_rate': min((daily_sessions / 10) * 100, 100)  
-            })
-        
-      
-        charts_data = {
-            'revenue_timeline': {
-                'type': 'line',
-                'title': 'Revenue Over Time',
-                'labels': [date for date, _ in sorted_revenue],
-                'datasets': [
-                    {
-                        'label': 'Daily Revenue (₹)',
-                        'data': [revenue for _, revenue in sorted_revenue],
-                        'borderColor': 'rgb(75, 192, 192)',
-                        'backgroundColor': 'rgba(75, 192, 192, 0.2)',
-                        'tension': 0.1
-                    },
-                    {
-                        'label': 'Daily Sessions',
-                        'data': [sessions_by_day[date] for date, _ in sorted_revenue],
-                        'borderColor': 'rgb(255, 99, 132)',
-                        'backgroundColor': 'rgba(255, 99, 132, 0.2)',
-                        'yAxisID': 'y1'
-                    }
-                ]
-            },
-            
-            'lot_performance': {
-                'type': 'bar',
-                'title': 'Parking Lot Performance',
-                'labels': list(lot_performance.keys()),
-                'datasets': [
-                    {
-                        'label': 'Revenue (₹)',
-                        'data': [lot_performance[lot]['revenue'] for lot in lot_performance],
-                        'backgroundColor': 'rgba(54, 162, 235, 0.8)',
-                        'borderColor': 'rgb(54, 162, 235)',
-                        'borderWidth': 1
-                    },
-                    {
-                        'label': 'Sessions',
-                        'data': [lot_performance[lot]['sessions'] for lot in lot_performance],
-                        'backgroundColor': 'rgba(255, 206, 86, 0.8)',
-                        'borderColor': 'rgb(255, 206, 86)',
-                        'borderWidth': 1,
-                        'yAxisID': 'y1'
-                    }
-                ]
-            },
-            
-            'hourly_pattern': {
-                'type': 'line',
-                'title': 'Hourly Usage Pattern',
-                'labels': [f"{hour:02d}:00" for hour in range(24)],
-                'datasets': [
-                    {
-                        'label': 'Sessions per Hour',
-                        'data': [hourly_usage[hour]['sessions'] for hour in range(24)],
-                        'borderColor': 'rgb(153, 102, 255)',
-                        'backgroundColor': 'rgba(153, 102, 255, 0.2)',
-                        'fill': True
-                    }
-                ]
-            },
-            
-            'user_distribution': {
-                'type': 'doughnut',
-                'title': 'Revenue by User',
-                'labels': list(user_chart_data.keys()),
-                'datasets': [
-                    {
-                        'label': 'Revenue (₹)',
-                        'data': list(user_chart_data.values()),
-                        'backgroundColor': [
-                            '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
-                            '#9966FF', '#FF9F40', '#FF6384', '#36A2EB'
-                        ],
-                        'borderWidth': 2
-                    }
-                ]
-            },
-            
-            'monthly_comparison': {
-                'type': 'bar',
-                'title': 'Monthly Comparison (Last 12 Months)',
-                'labels': sorted(monthly_data.keys()),
-                'datasets': [
-                    {
-                        'label': 'Monthly Revenue (₹)',
-                        'data': [monthly_data[month]['revenue'] for month in sorted(monthly_data.keys())],
-                        'backgroundColor': 'rgba(75, 192, 192, 0.8)',
-                        'borderColor': 'rgb(75, 192, 192)',
-                        'borderWidth': 1
-                    }
-                ]
-            },
-            
-            'occupancy_trends': {
-                'type': 'area',
-                'title': 'Occupancy Trends (Last 30 Days)',
-                'labels': [item['date'] for item in reversed(occupancy_trends)],
-                'datasets': [
-                    {
-                        'label': 'Daily Sessions',
-                        'data': [item['sessions'] for item in reversed(occupancy_trends)],
-                        'borderColor': 'rgb(255, 99, 132)',
-                        'backgroundColor': 'rgba(255, 99, 132, 0.3)',
-                        'fill': True
-                    }
-                ]
-            }
+    sorted_revenue = sorted(revenue_by_day.items())
+    
+    #Parking Lot Performance
+    lot_performance = {}
+    for lot_name, lot in analytics_queries.revenue_by_lot(start_date).items():
+        lot_performance[lot_name] = {
+            'revenue': lot['revenue'],
+            'sessions': lot['sessions'],
+            'avg_duration': round(lot['parked_hours'] / lot['sessions'], 2) if lot['sessions'] > 0 else 0,
+            'total_hours': lot['parked_hours']
         }
-        
-        # Summary statistics
-        total_revenue = sum(res.total_cost for res in reservations if res.total_cost)
-        total_sessions = len(reservations)
-        avg_session_value = round(total_revenue / total_sessions, 2) if total_sessions > 0 else 0
-        
-        
-        peak_hour = max(hourly_usage, key=lambda x: hourly_usage[x]['sessions'])
-        
-        # Most profitable lot
-        most_profitable_lot = max(lot_performance, key=lambda x: lot_performance[x]['revenue']) if lot_performance else None
-        
-        summary_stats = {
-            'total_revenue': total_revenue,
-            'total_sessions': total_sessions,
-            'avg_session_value': avg_session_value,
-            'peak_hour': f"{peak_hour:02d}:00",
-            'peak_hour_sessions': hourly_usage[peak_hour]['sessions'],
-            'most_profitable_lot': most_profitable_lot,
-            'most_profitable_lot_revenue': lot_performance[most_profitable_lot]['revenue'] if most_profitable_lot else 0,
-            'period_days': days
+    
+    # Hourly Usage 
+    hourly_usage = {}
+    for hour in range(24):
+        hourly_usage[hour] = {'sessions': 0, 'revenue': 0}
+    hourly_usage.update(analytics_queries.revenue_by_start_hour(start_date))
+    
+    #User Activity Distribution
+    top_users, others_revenue = analytics_queries.top_users_by_revenue(start_date)
+    
+    user_chart_data = {top_user['username']: top_user['revenue'] for top_user in top_users}
+    if others_revenue > 0:
+        user_chart_data['Others'] = others_revenue
+    
+    #Monthly Comparison
+    monthly_data = {}
+    for i in range(12):
+        month_start = datetime.utcnow().replace(day=1) - timedelta(days=30 * i)
+        month_key = month_start.strftime('%Y-%m')
+        monthly_data[month_key] = {'revenue': 0, 'sessions': 0}
+    
+    for date_key, day in daily.items():
+        month_key = date_key[:7]
+        if month_key in monthly_data:
+            monthly_data[month_key]['revenue'] += day['revenue']
+            monthly_data[month_key]['sessions'] += day['sessions']
+    
+
+
+    # Occupancy Trends
+    window_start, window_end = day_window(30)
+    trends = occupancy_series(window_start, window_end, '1d')
+    capacity = db.session.query(func.coalesce(func.sum(ParkingLot.active_spot_count), 0)).scalar()
+    
+    occupancy_trends = []
+    for i, day in enumerate(trends['bins']):
+        peak = trends['total']['peak'][i]
+        occupancy_trends.append({
+            'date': day.strftime('%Y-%m-%d'),
+            'sessions': trends['total']['arrivals'][i],
+            'peak_occupancy': peak,
+            'occupancy_rate': round(min(peak / capacity * 100, 100), 2) if capacity else 0
+        })
+    
+  
+    charts_data = {
+        'revenue_timeline': {
+            'type': 'line',
+            'title': 'Revenue Over Time',
+            'labels': [date for date, _ in sorted_revenue],
+            'datasets': [
+                {
+                    'label': 'Daily Revenue (₹)',
+                    'data': [revenue for _, revenue in sorted_revenue],
+                    'borderColor': 'rgb(75, 192, 192)',
+                    'backgroundColor': 'rgba(75, 192, 192, 0.2)',
+                    'tension': 0.1
+                },
+                {
+                    'label': 'Daily Sessions',
+                    'data': [sessions_by_day[date] for date, _ in sorted_revenue],
+                    'borderColor': 'rgb(255, 99, 132)',
+                    'backgroundColor': 'rgba(255, 99, 132, 0.2)',
+                    'yAxisID': 'y1'
+                }
+            ]
+        },
+        
+        'lot_performance': {
+            'type': 'bar',
+            'title': 'Parking Lot Performance',
+            'labels': list(lot_performance.keys()),
+            'datasets': [
+                {
+                    'label': 'Revenue (₹)',
+                    'data': [lot_performance[lot]['revenue'] for lot in lot_performance],
+                    'backgroundColor': 'rgba(54, 162, 235, 0.8)',
+                    'borderColor': 'rgb(54, 162, 235)',
+                    'borderWidth': 1
+                },
+                {
+                    'label': 'Sessions',
+                    'data': [lot_performance[lot]['sessions'] for lot in lot_performance],
+                    'backgroundColor': 'rgba(255, 206, 86, 0.8)',
+                    'borderColor': 'rgb(255, 206, 86)',
+                    'borderWidth': 1,
+                    'yAxisID': 'y1'
+                }
+            ]
+        },
+        
+        'hourly_pattern': {
+            'type': 'line',
+            'title': 'Hourly Usage Pattern',
+            'labels': [f"{hour:02d}:00" for hour in range(24)],
+            'datasets': [
+                {
+                    'label': 'Sessions per Hour',
+                    'data': [hourly_usage[hour]['sessions'] for hour in range(24)],
+                    'borderColor': 'rgb(153, 102, 255)',
+                    'backgroundColor': 'rgba(153, 102, 255, 0.2)',
+                    'fill': True
+                }
+            ]
+        },
+        
+        'user_distribution': {
+            'type': 'doughnut',
+            'title': 'Revenue by User',
+            'labels': list(user_chart_data.keys()),
+            'datasets': [
+                {
+                    'label': 'Revenue (₹)',
+                    'data': list(user_chart_data.values()),
+                    'backgroundColor': [
+                        '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
+                        '#9966FF', '#FF9F40', '#FF6384', '#36A2EB'
+                    ],
+                    'borderWidth': 2
+                }
+            ]
+        },
+        
+        'monthly_comparison': {
+            'type': 'bar',
+            'title': 'Monthly Comparison (Last 12 Months)',
+            'labels': sorted(monthly_data.keys()),
+            'datasets': [
+                {
+                    'label': 'Monthly Revenue (₹)',
+                    'data': [monthly_data[month]['revenue'] for month in sorted(monthly_data.keys())],
+                    'backgroundColor': 'rgba(75, 192, 192, 0.8)',
+                    'borderColor': 'rgb(75, 192, 192)',
+                    'borderWidth': 1
+                }
+            ]
+        },
+        
+        'occupancy_trends': {
+            'type': 'area',
+            'title': 'Occupancy Trends (Last 30 Days)',
+            'labels': [item['date'] for item in occupancy_trends],
+            'datasets': [
+                {
+                    'label': 'Daily Sessions',
+                    'data': [item['sessions'] for item in occupancy_trends],
+                    'borderColor': 'rgb(255, 99, 132)',
+                    'backgroundColor': 'rgba(255, 99, 132, 0.3)',
+                    'fill': True
+                },
+                {
+                    'label': 'Peak Cars Parked',
+                    'data': [item['peak_occupancy'] for item in occupancy_trends],
+                    'borderColor': 'rgb(54, 162, 235)',
+                    'backgroundColor': 'rgba(54, 162, 235, 0.3)',
+                    'fill': False
+                }
+            ]
         }
-        
-        return jsonify({
-            'charts': charts_data,
-            'summary': summary_stats,
-            'period': f'Last {days} days',
-            'generated_at': datetime.utcnow().isoformat()
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    }
+    
+    # Summary statistics
+    total_revenue = sum(revenue_by_day.values())
+    total_sessions = sum(sessions_by_day.values())
+    avg_session_value = round(total_revenue / total_sessions, 2) if total_sessions > 0 else 0
+    
+    
+    peak_hour = max(hourly_usage, key=lambda x: hourly_usage[x]['sessions'])
+    
+    # Most profitable lot
+    most_profitable_lot = max(lot_performance, key=lambda x: lot_performance[x]['revenue']) if lot_performance else None
+    
+    summary_stats = {
+        'total_revenue': total_revenue,
+        'total_sessions': total_sessions,
+        'avg_session_value': avg_session_value,
+        'peak_hour': f"{peak_hour:02d}:00",
+        'peak_hour_sessions': hourly_usage[peak_hour]['sessions'],
+        'most_profitable_lot': most_profitable_lot,
+        'most_profitable_lot_revenue': lot_performance[most_profitable_lot]['revenue'] if most_profitable_lot else 0,
+        'period_days': days
+    }
+    
+    return {
+        'charts': charts_data,
+        'summary': summary_stats,
+        'period': f'Last {days} days',
+        'generated_at': datetime.utcnow().isoformat()
+    }
 
 @admin_bp.route('/analytics/charts/revenue-breakdown', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('revenue-breakdown-charts', require_admin, shared=True)
 def get_revenue_breakdown_charts():
     """Get detailed revenue breakdown charts"""
     try:
@@ -946,125 +1026,163 @@ def get_revenue_breakdown_charts():
         
         # Get time period
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
+        if report_jobs.offloaded(days):
+            return report_jobs.accepted(report_jobs.submit('revenue-breakdown-charts', days=days), 'admin.get_job')
+        return jsonify(revenue_breakdown_report(days)), 200
         
-        reservations = Reservation.query.filter(
-            Reservation.status == 'completed',
-            Reservation.parking_end_time >= start_date
-        ).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_jobs.report('revenue-breakdown-charts', shared=True)
+def revenue_breakdown_report(days):
+    """Revenue breakdown charts over the last `days` days"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    
+    # Revenue by day of week
+    weekday_revenue = {i: 0 for i in range(7)}  # 0=Monday, 6=Sunday
+    for date_key, day in analytics_queries.revenue_by_day(start_date).items():
+        weekday = datetime.strptime(date_key, '%Y-%m-%d').weekday()
+        weekday_revenue[weekday] += day['revenue']
+    
+    weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    # Revenue by parking duration
+    duration_brackets = analytics_queries.revenue_by_duration(start_date)
+    
+    # Average revenue per billed hour by lot
+    lot_hourly_revenue = {}
+    for lot_name, lot in analytics_queries.revenue_by_lot(start_date).items():
+        lot_hourly_revenue[lot_name] = {
+            'total_revenue': lot['revenue'],
+            'total_hours': lot['billed_hours'],
+            'avg_hourly_rate': round(lot['revenue'] / lot['billed_hours'], 2) if lot['billed_hours'] > 0 else 0
+        }
+    
+    charts_data = {
+        'weekday_revenue': {
+            'type': 'polarArea',
+            'title': 'Revenue by Day of Week',
+            'labels': weekday_names,
+            'datasets': [
+                {
+                    'label': 'Revenue (₹)',
+                    'data': [weekday_revenue[i] for i in range(7)],
+                    'backgroundColor': [
+                        'rgba(255, 99, 132, 0.8)', 'rgba(54, 162, 235, 0.8)',
+                        'rgba(255, 206, 86, 0.8)', 'rgba(75, 192, 192, 0.8)',
+                        'rgba(153, 102, 255, 0.8)', 'rgba(255, 159, 64, 0.8)',
+                        'rgba(199, 199, 199, 0.8)'
+                    ]
+                }
+            ]
+        },
+        
+        'duration_revenue': {
+            'type': 'pie',
+            'title': 'Revenue by Parking Duration',
+            'labels': list(duration_brackets.keys()),
+            'datasets': [
+                {
+                    'label': 'Revenue (₹)',
+                    'data': list(duration_brackets.values()),
+                    'backgroundColor': [
+                        '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF'
+                    ]
+                }
+            ]
+        },
+        
+        'lot_efficiency': {
+            'type': 'radar',
+            'title': 'Average Hourly Revenue by Lot',
+            'labels': list(lot_hourly_revenue.keys()),
+            'datasets': [
+                {
+                    'label': 'Avg Hourly Rate (₹)',
+                    'data': [lot_hourly_revenue[lot]['avg_hourly_rate'] for lot in lot_hourly_revenue],
+                    'borderColor': 'rgb(255, 99, 132)',
+                    'backgroundColor': 'rgba(255, 99, 132, 0.2)',
+                    'pointBackgroundColor': 'rgb(255, 99, 132)',
+                    'pointBorderColor': '#fff'
+                }
+            ]
+        }
+    }
+    
+    return {
+        'charts': charts_data,
+        'period': f'Last {days} days'
+    }
+
+@admin_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def submit_job():
+    """Queue an admin report: {"report": "dashboard-charts", "days": 365}"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
         
-        # Revenue by day of week
-        weekday_revenue = {i: 0 for i in range(7)}  # 0=Monday, 6=Sunday
-        for res in reservations:
-            if res.parking_end_time:
-                weekday = res.parking_end_time.weekday()
-                weekday_revenue[weekday] += res.total_cost or 0
+        data = request.get_json() or {}
+        report = data.get('report')
+        if not report_jobs.is_report(report, shared=True):
+            return jsonify({'error': 'Unknown report'}), 400
+        try:
+            days = int(data.get('days', 30))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'days must be an integer'}), 400
         
-        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        return report_jobs.accepted(report_jobs.submit(report, days=days), 'admin.get_job')
         
-        # Revenue by parking duration
-        duration_brackets = {
-            '0-1 hours': 0, '1-2 hours': 0, '2-4 hours': 0, 
-            '4-8 hours': 0, '8+ hours': 0
-        }
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Status of an admin report job, with its result once it has succeeded"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
         
-        for res in reservations:
-            if res.parking_start_time and res.parking_end_time:
-                duration = res.parking_end_time - res.parking_start_time
-                hours = duration.total_seconds() / 3600
-                
-                if hours <= 1:
-                    duration_brackets['0-1 hours'] += res.total_cost or 0
-                elif hours <= 2:
-                    duration_brackets['1-2 hours'] += res.total_cost or 0
-                elif hours <= 4:
-                    duration_brackets['2-4 hours'] += res.total_cost or 0
-                elif hours <= 8:
-                    duration_brackets['4-8 hours'] += res.total_cost or 0
-                else:
-                    duration_brackets['8+ hours'] += res.total_cost or 0
-        
-        # Average revenue per hour by lot
-        lot_hourly_revenue = {}
-        for res in reservations:
-            spot = ParkingSpot.query.get(res.spot_id)
-            if spot:
-                lot = ParkingLot.query.get(spot.lot_id)
-                if lot:
-                    if lot.name not in lot_hourly_revenue:
-                        lot_hourly_revenue[lot.name] = {'total_revenue': 0, 'total_hours': 0}
-                    
-                    lot_hourly_revenue[lot.name]['total_revenue'] += res.total_cost or 0
-                    
-                    if res.parking_start_time and res.parking_end_time:
-                        duration = res.parking_end_time - res.parking_start_time
-                        hours = max(duration.total_seconds() / 3600, 1) 
-                        lot_hourly_revenue[lot.name]['total_hours'] += hours
-        
-     
+        job = report_jobs.job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': job}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        for lot_name in lot_hourly_revenue:
-            if lot_hourly_revenue[lot_name]['total_hours'] > 0:
-                avg_rate = lot_hourly_revenue[lot_name]['total_revenue'] / lot_hourly_revenue[lot_name]['total_hours']
-                lot_hourly_revenue[lot_name]['avg_hourly_rate'] = round(avg_rate, 2)
-            else:
-                lot_hourly_revenue[lot_name]['avg_hourly_rate'] = 0
-        
-        charts_data = {
-            'weekday_revenue': {
-                'type': 'polarArea',
-                'title': 'Revenue by Day of Week',
-                'labels': weekday_names,
-                'datasets': [
-                    {
-                        'label': 'Revenue (₹)',
-                        'data': [weekday_revenue[i] for i in range(7)],
-                        'backgroundColor': [
-                            'rgba(255, 99, 132, 0.8)', 'rgba(54, 162, 235, 0.8)',
-                            'rgba(255, 206, 86, 0.8)', 'rgba(75, 192, 192, 0.8)',
-                            'rgba(153, 102, 255, 0.8)', 'rgba(255, 159, 64, 0.8)',
-                            'rgba(199, 199, 199, 0.8)'
-                        ]
-                    }
-                ]
-            },
-            
-            'duration_revenue': {
-                'type': 'pie',
-                'title': 'Revenue by Parking Duration',
-                'labels': list(duration_brackets.keys()),
-                'datasets': [
-                    {
-                        'label': 'Revenue (₹)',
-                        'data': list(duration_brackets.values()),
-                        'backgroundColor': [
-                            '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF'
-                        ]
-                    }
-                ]
-            },
-            
-            'lot_efficiency': {
-                'type': 'radar',
-                'title': 'Average Hourly Revenue by Lot',
-                'labels': list(lot_hourly_revenue.keys()),
-                'datasets': [
-                    {
-                        'label': 'Avg Hourly Rate (₹)',
-                        'data': [lot_hourly_revenue[lot]['avg_hourly_rate'] for lot in lot_hourly_revenue],
-                        'borderColor': 'rgb(255, 99, 132)',
-                        'backgroundColor': 'rgba(255, 99, 132, 0.2)',
-                        'pointBackgroundColor': 'rgb(255, 99, 132)',
-                        'pointBorderColor': '#fff'
-                    }
-                ]
-            }
-        }
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def list_profiles():
+    """Slowest profiled requests per endpoint (profile with ?profile=1 or sampling)"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
         
-        return jsonify({
-            'charts': charts_data,
-            'period': f'Last {days} days'
-        }), 200
+        return jsonify({'endpoints': request_profiler.slowest()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def get_profile(profile_id):
+    """Full report of one profiled request"""
+    try:
+        admin, error_response, status_code = require_admin()
+        if error_response:
+            return error_response, status_code
+        
+        report = request_profiler.report(profile_id)
+        if not report:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        return jsonify({'profile': report}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1078,7 +1196,7 @@ def force_release_spot(spot_id):
         if error_response:
             return error_response, status_code
         
-        spot = ParkingSpot.query.get(spot_id)
+        spot = db.session.get(ParkingSpot, spot_id)
         if not spot:
             return jsonify({'error': 'Parking spot not found'}), 404
         
@@ -1091,14 +1209,13 @@ def force_release_spot(spot_id):
             status='active'
         ).first()
         
-        if active_reservation:
-            
-            active_reservation.end_parking()
-            
-        
-        spot.release_spot()
+        # Ends the session (if any), frees the spot and records revenue
+        complete_parking_session(active_reservation, spot)
         
         db.session.commit()
+        spot_allocator.release(spot.lot_id, spot.id)
+        analytics_cache.invalidate(active_reservation.user_id if active_reservation else None)
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Spot force released successfully',
@@ -1130,6 +1247,8 @@ def test_admin_routes():
             'GET /api/admin/analytics/charts/dashboard',
             'GET /api/admin/analytics/charts/revenue-breakdown',
             'POST /api/admin/spots/<id>/force-release',
+            'GET /api/admin/profiles',
+            'GET /api/admin/profiles/<id>',
             'GET /api/admin/test'
         ]
     }), 200
@@ -1206,6 +1325,12 @@ def get_session_status(reservation):
             'description': 'Reserved, waiting for occupancy',
             'color': 'yellow'
         }
+    elif reservation.status == 'expired':
+        return {
+            'status': 'expired',
+            'description': 'Hold expired before parking started',
+            'color': 'gray'
+        }
     else:
         return {
             'status': reservation.status,
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app.models import db
 from app.models.user import User
+from app.utils.passwords import HashingBusy, login_limiter, password_hasher
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -19,14 +20,27 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
+        # Refused before any hashing, so brute force cannot burn CPU
+        retry_after = login_limiter.retry_after(email, request.remote_addr)
+        if retry_after:
+            return jsonify({'error': 'Too many failed login attempts, try again later'}), 429, {
+                'Retry-After': str(retry_after)
+            }
+        
         user = User.query.filter_by(email=email).first()
         
-        if not user or not user.check_password(password):
+        if not user or not password_hasher.verify(user.password_hash, password):
+            login_limiter.record_failure(email, request.remote_addr)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         if not user.is_active:
             return jsonify({'error': 'Account is inactive'}), 401
         
+        login_limiter.reset(email, request.remote_addr)
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+        
         access_token = create_access_token(identity=str(user.id))
         
         return jsonify({
@@ -35,6 +49,9 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, try again shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -61,6 +78,7 @@ def register():
             username=data['username'],
             email=data['email'],
             password=data['password'],
+            password_hash=password_hasher.hash(data['password']),
             full_name=data['full_name'],
             phone=data['phone'],
             address=data['address'],
@@ -76,6 +94,8 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy:
+        return jsonify({'error': 'Server busy, try again shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,19 +1,30 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+import numpy as np
+from sqlalchemy import and_, case, func, update
 from app.models import db
 from app.models.user import User
 from app.models.parking_lot import ParkingLot
 from app.models.parking_spot import ParkingSpot
 from app.models.reservation import Reservation
+from app.utils.analytics import WEEKDAY_NAMES, SessionFrame
+from app.utils.availability import availability_hub
+from app.utils.cache import analytics_cache
+from app.utils.hold_expiry import hold_expiry
+from app.utils.jobs import report_jobs
+from app.utils.lot_listing import lot_listing
+from app.utils.occupancy import epoch_column
+from app.utils.pagination import paginate_newest_first
+from app.utils.parking_sessions import complete_parking_session
+from app.utils.principals import principal_cache
+from app.utils.spot_allocator import spot_allocator
 
 user_bp = Blueprint('user', __name__)
 
 def require_user():
    
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = principal_cache.load(get_jwt_identity())
     
     if not user:
         return None, jsonify({'error': 'User not found'}), 404
@@ -49,7 +60,7 @@ def dashboard():
         available_lots = ParkingLot.query.filter_by(is_active=True).all()
         
         return jsonify({
-            'user': user.to_dict(),
+            'user': db.session.get(User, user.id).to_dict(),
             'active_reservations': [res.to_dict() for res in active_reservations],
             'recent_reservations': [res.to_dict() for res in recent_reservations],
             'available_lots': [lot.to_dict() for lot in available_lots]
@@ -67,29 +78,60 @@ def get_available_lots():
         if error_response:
             return error_response, status_code
         
-        lots = ParkingLot.query.filter_by(is_active=True).all()
+        # Unchanged since the client's copy: answer without touching spots
+        etag = lot_listing.current_etag()
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(lot_listing.body(etag))
         
-        lots_data = []
-        for lot in lots:
-            lot_dict = lot.to_dict()
-            lot_dict['available_spots_details'] = [
-                spot.to_dict() for spot in lot.parking_spots 
-                if not spot.is_occupied and spot.is_active
-            ]
-            lots_data.append(lot_dict)
-        
-        return jsonify({
-            'parking_lots': lots_data,
-            'total_lots': len(lots_data)
-        }), 200
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@user_bp.route('/availability/stream-token', methods=['POST'])
+@jwt_required()
+def availability_stream_token():
+    """Short-lived token for opening the availability stream"""
+    user, error_response, status_code = require_user()
+    if error_response:
+        return error_response, status_code
+    
+    return jsonify({
+        'token': availability_hub.stream_token(str(user.id)),
+        'expires_in': current_app.config['AVAILABILITY_STREAM_TOKEN_TTL']
+    }), 200
+
+@user_bp.route('/availability/stream', methods=['GET'])
+@jwt_required(locations=['query_string'])
+def availability_stream():
+    """Server-Sent Events: a snapshot of lot availability, then per-lot deltas.
+
+    EventSource cannot send headers, so this takes ?jwt=<stream token> from
+    POST /availability/stream-token, never the access token. Every open
+    stream holds a worker thread until the client disconnects.
+    """
+    if not availability_hub.is_stream_token(get_jwt()):
+        return jsonify({'error': 'A stream token is required'}), 401
+    user, error_response, status_code = require_user()
+    if error_response:
+        return error_response, status_code
+    
+    subscription = availability_hub.subscribe()
+    return Response(
+        availability_hub.stream(subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @user_bp.route('/reserve-spot', methods=['POST'])
 @jwt_required()
 def reserve_spot():
     """Reserve a parking spot (auto-allocation)"""
+    held_spot = None
     try:
         user, error_response, status_code = require_user()
         if error_response:
@@ -106,29 +148,33 @@ def reserve_spot():
             return jsonify({'error': 'lot_id and vehicle_number are required'}), 400
         
         
-        active_reservation = Reservation.query.filter_by(
-            user_id=user.id, 
-            status='active'
+        # One hold or session per user. Bumping the user's row first takes
+        # its write lock, so concurrent requests from one user queue here
+        # and each one sees the holds the others committed
+        User.record_activity(user.id)
+        open_reservation = Reservation.query.filter(
+            Reservation.user_id == user.id,
+            Reservation.status.in_(['reserved', 'active'])
         ).first()
         
-        if active_reservation:
-            return jsonify({'error': 'You already have an active reservation'}), 400
+        if open_reservation:
+            db.session.rollback()
+            return jsonify({'error': 'You already have an active reservation or spot hold'}), 400
         
         
-        lot = ParkingLot.query.get(lot_id)
+        lot = db.session.get(ParkingLot, lot_id)
         if not lot or not lot.is_active:
+            db.session.rollback()
             return jsonify({'error': 'Parking lot not found or inactive'}), 404
         
         
-        available_spot = ParkingSpot.query.filter_by(
-            lot_id=lot_id,
-            is_occupied=False,
-            is_active=True
-        ).first()
+        # Holds the spot in this transaction, no other reservation can get it
+        available_spot = spot_allocator.allocate(lot.id)
         
         if not available_spot:
+            db.session.rollback()
             return jsonify({'error': 'No available spots in this parking lot'}), 400
-        
+        held_spot = (lot.id, available_spot.id)
 
 
         
@@ -143,6 +189,8 @@ def reserve_spot():
         
         db.session.add(reservation)
         db.session.commit()
+        hold_expiry.schedule(reservation.id, reservation.reservation_time)
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Spot reserved successfully',
@@ -153,6 +201,8 @@ def reserve_spot():
         
     except Exception as e:
         db.session.rollback()
+        if held_spot:
+            spot_allocator.release(*held_spot)
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/occupy-spot/<int:reservation_id>', methods=['POST'])
@@ -175,15 +225,29 @@ def occupy_spot(reservation_id):
             return jsonify({'error': 'Reservation not found or not in reserved status'}), 404
         
         # Get parking spot
-        spot = ParkingSpot.query.get(reservation.spot_id)
+        spot = db.session.get(ParkingSpot, reservation.spot_id)
         if not spot:
             return jsonify({'error': 'Parking spot not found'}), 404
         
+        # The hold may have expired since it was read; only a live one can start
+        claimed = db.session.execute(
+            update(Reservation)
+            .where(Reservation.id == reservation.id, Reservation.status == 'reserved')
+            .values(status='active')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return jsonify({'error': 'Reservation not found or not in reserved status'}), 404
+        
         # Start parking
         reservation.start_parking()
         spot.occupy_spot(reservation.vehicle_number)
+        User.record_activity(user.id)
         
         db.session.commit()
+        analytics_cache.invalidate(user.id)
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Parking started successfully',
@@ -215,15 +279,17 @@ def release_spot(reservation_id):
             return jsonify({'error': 'Active reservation not found'}), 404
         
         # Get parking spot
-        spot = ParkingSpot.query.get(reservation.spot_id)
+        spot = db.session.get(ParkingSpot, reservation.spot_id)
         if not spot:
             return jsonify({'error': 'Parking spot not found'}), 404
         
      
-        reservation.end_parking()
-        spot.release_spot()
+        complete_parking_session(reservation, spot)
         
         db.session.commit()
+        spot_allocator.release(spot.lot_id, spot.id)
+        analytics_cache.invalidate(user.id)
+        availability_hub.notify()
         
         return jsonify({
             'message': 'Parking ended successfully',
@@ -248,32 +314,25 @@ def parking_history():
             return error_response, status_code
         
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        try:
+            fields = Reservation.parse_fields(request.args.get('fields'))
+            reservations, pagination = paginate_newest_first(
+                Reservation.query.filter_by(user_id=user.id), request.args, default_per_page=10
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-
-        reservations = Reservation.query.filter_by(
-            user_id=user.id
-        ).order_by(Reservation.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # StatisticzZZZ
-        all_reservations = Reservation.query.filter_by(user_id=user.id).all()
-        total_cost = sum(res.total_cost for res in all_reservations if res.total_cost)
-        total_sessions = len(all_reservations)
-        completed_sessions = len([res for res in all_reservations if res.status == 'completed'])
+        # Statistics over every reservation, grouped in SQL
+        by_status = db.session.query(
+            Reservation.status, func.count(Reservation.id), func.sum(Reservation.total_cost)
+        ).filter(Reservation.user_id == user.id).group_by(Reservation.status).all()
+        total_cost = sum(cost or 0 for _, _, cost in by_status)
+        total_sessions = sum(count for _, count, _ in by_status)
+        completed_sessions = sum(count for status, count, _ in by_status if status == 'completed')
         
         return jsonify({
-            'reservations': [res.to_dict() for res in reservations.items],
-            'pagination': {
-                'page': page,
-                'pages': reservations.pages,
-                'per_page': per_page,
-                'total': reservations.total,
-                'has_next': reservations.has_next,
-                'has_prev': reservations.has_prev
-            },
+            'reservations': [res.to_dict(fields) for res in reservations],
+            'pagination': pagination,
             'statistics': {
                 'total_cost': total_cost,
                 'total_sessions': total_sessions,
@@ -285,6 +344,29 @@ def parking_history():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@user_bp.route('/reservations/<int:reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation(reservation_id):
+    """One of the user's reservations with its cost breakdown"""
+    try:
+        user, error_response, status_code = require_user()
+        if error_response:
+            return error_response, status_code
+        
+        reservation = Reservation.query.filter_by(id=reservation_id, user_id=user.id).first()
+        if not reservation:
+            return jsonify({'error': 'Reservation not found'}), 404
+        
+        return jsonify({
+            'reservation': {
+                **reservation.to_dict(),
+                'cost_breakdown': reservation.get_cost_breakdown()
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @user_bp.route('/parking-history/detailed', methods=['GET'])
 @jwt_required()
 def detailed_parking_history():
@@ -295,30 +377,31 @@ def detailed_parking_history():
             return error_response, status_code
         
      
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
         status_filter = request.args.get('status')   
         lot_id = request.args.get('lot_id', type=int)
         
       
-        query = Reservation.query.filter_by(user_id=user.id)
+        query = Reservation.query.filter_by(user_id=user.id).options(*Reservation.with_details())
         
         if status_filter:
             query = query.filter_by(status=status_filter)
         
         if lot_id:
-            query = query.join(ParkingSpot).filter(ParkingSpot.lot_id == lot_id)
+            query = query.filter(Reservation.spot_id.in_(
+                db.session.query(ParkingSpot.id).filter(ParkingSpot.lot_id == lot_id)
+            ))
         
       
-        reservations = query.order_by(desc(Reservation.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            reservations, pagination = paginate_newest_first(query, request.args, default_per_page=10)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
        
         detailed_reservations = []
-        for res in reservations.items:
-            spot = ParkingSpot.query.get(res.spot_id)
-            lot = ParkingLot.query.get(spot.lot_id) if spot else None
+        for res in reservations:
+            spot = res.parking_spot
+            lot = spot.parking_lot if spot else None
             
             
             cost_breakdown = calculate_cost_breakdown(res)
@@ -337,14 +420,7 @@ def detailed_parking_history():
         
         return jsonify({
             'reservations': detailed_reservations,
-            'pagination': {
-                'page': page,
-                'pages': reservations.pages,
-                'per_page': per_page,
-                'total': reservations.total,
-                'has_next': reservations.has_next,
-                'has_prev': reservations.has_prev
-            },
+            'pagination': pagination,
             'statistics': stats,
             'filters': {
                 'status': status_filter,
@@ -357,6 +433,7 @@ def detailed_parking_history():
 
 @user_bp.route('/cost-summary', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('cost-summary', require_user)
 def cost_summary():
     """Get detailed cost summary for user"""
     try:
@@ -369,19 +446,16 @@ def cost_summary():
         start_date = datetime.utcnow() - timedelta(days=days)
         
         
-        reservations = Reservation.query.filter(
-            Reservation.user_id == user.id,
-            Reservation.created_at >= start_date,
-            Reservation.status == 'completed'
-        ).all()
+        sessions = SessionFrame.load(start_date, user_id=user.id, window='created')
+        totals = sessions.totals()
         
         #Cost summary
         cost_summary = {
             'period': f'Last {days} days',
             'start_date': start_date.isoformat(),
             'end_date': datetime.utcnow().isoformat(),
-            'total_sessions': len(reservations),
-            'total_cost': sum(res.total_cost for res in reservations if res.total_cost),
+            'total_sessions': totals['sessions'],
+            'total_cost': totals['cost'],
             'average_cost_per_session': 0,
             'total_hours_parked': 0,
             'average_hourly_rate': 0,
@@ -389,58 +463,28 @@ def cost_summary():
             'daily_breakdown': {}
         }
         
-        if reservations:
-            # AverageZzzzzzz
-            valid_costs = [res.total_cost for res in reservations if res.total_cost]
-            if valid_costs:
-                cost_summary['average_cost_per_session'] = round(sum(valid_costs) / len(valid_costs), 2)
-            
-            # Total hourszzz
-            total_hours = 0
-            for res in reservations:
-                if res.parking_start_time and res.parking_end_time:
-                    duration = res.parking_end_time - res.parking_start_time
-                    hours = duration.total_seconds() / 3600
-                    total_hours += hours
+        if len(sessions):
+            # Average over paid sessions
+            paid = sessions.cost[sessions.cost > 0]
+            if len(paid):
+                cost_summary['average_cost_per_session'] = round(float(paid.mean()), 2)
             
+            total_hours = totals['hours']
             cost_summary['total_hours_parked'] = round(total_hours, 2)
             
             if total_hours > 0:
                 cost_summary['average_hourly_rate'] = round(cost_summary['total_cost'] / total_hours, 2)
             
             # Cost by lot
-            for res in reservations:
-                spot = ParkingSpot.query.get(res.spot_id)
-                if spot:
-                    lot = ParkingLot.query.get(spot.lot_id)
-                    if lot:
-                        lot_name = lot.name
-                        if lot_name not in cost_summary['cost_by_lot']:
-                            cost_summary['cost_by_lot'][lot_name] = {
-                                'sessions': 0,
-                                'total_cost': 0,
-                                'total_hours': 0
-                            }
-                        
-                        cost_summary['cost_by_lot'][lot_name]['sessions'] += 1
-                        cost_summary['cost_by_lot'][lot_name]['total_cost'] += res.total_cost or 0
-                        
-                        if res.parking_start_time and res.parking_end_time:
-                            duration = res.parking_end_time - res.parking_start_time
-                            hours = duration.total_seconds() / 3600
-                            cost_summary['cost_by_lot'][lot_name]['total_hours'] += hours
-            
-            # Daily breakdown
-            daily_costs = {}
-            for res in reservations:
-                if res.parking_start_time:
-                    date_key = res.parking_start_time.strftime('%Y-%m-%d')
-                    if date_key not in daily_costs:
-                        daily_costs[date_key] = {'sessions': 0, 'cost': 0}
-                    daily_costs[date_key]['sessions'] += 1
-                    daily_costs[date_key]['cost'] += res.total_cost or 0
+            for lot_name, lot in sessions.by_lot().items():
+                cost_summary['cost_by_lot'][lot_name] = {
+                    'sessions': lot['sessions'],
+                    'total_cost': lot['cost'],
+                    'total_hours': lot['hours']
+                }
             
-            cost_summary['daily_breakdown'] = daily_costs
+            # Daily breakdown (by start date)
+            cost_summary['daily_breakdown'] = sessions.by_day(field='start')
         
         return jsonify(cost_summary), 200
         
@@ -470,7 +514,7 @@ def get_active_reservation():
             ).first()
             
             if reserved_reservation:
-                spot = ParkingSpot.query.get(reserved_reservation.spot_id)
+                spot = db.session.get(ParkingSpot, reserved_reservation.spot_id)
                 return jsonify({
                     'reservation': reserved_reservation.to_dict(),
                     'spot': spot.to_dict() if spot else None,
@@ -480,8 +524,8 @@ def get_active_reservation():
             return jsonify({'message': 'No active reservation found'}), 404
         
     
-        spot = ParkingSpot.query.get(active_reservation.spot_id)
-        lot = ParkingLot.query.get(spot.lot_id) if spot else None
+        spot = db.session.get(ParkingSpot, active_reservation.spot_id)
+        lot = db.session.get(ParkingLot, spot.lot_id) if spot else None
         
         return jsonify({
             'reservation': active_reservation.to_dict(),
@@ -497,6 +541,7 @@ def get_active_reservation():
 
 @user_bp.route('/analytics/charts/personal', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('personal-charts', require_user)
 def get_personal_charts():
     """Get personal parking analytics charts for user dashboard"""
     try:
@@ -506,250 +551,196 @@ def get_personal_charts():
         
        
         days = request.args.get('days', 90, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
+        if report_jobs.offloaded(days):
+            return report_jobs.accepted(report_jobs.submit('personal-charts', user_id=user.id, days=days), 'user.get_job')
+        return jsonify(personal_charts_report(user.id, days)), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_jobs.report('personal-charts')
+def personal_charts_report(user_id, days):
+    """A driver's personal charts over the last `days` days"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    
+
+    sessions = SessionFrame.load(start_date, user_id=user_id)
+    
+    # 1. Personal Spending Over Time 
+    spending_by_day = {date: day['cost'] for date, day in sessions.by_day().items()}
+    
   
-        reservations = Reservation.query.filter(
-            Reservation.user_id == user.id,
-            Reservation.status == 'completed',
-            Reservation.parking_end_time >= start_date
-        ).all()
-        
-        # 1. Personal Spending Over Time 
-        spending_by_day = {}
-        sessions_by_day = {}
-        for res in reservations:
-            if res.parking_end_time:
-                date_key = res.parking_end_time.strftime('%Y-%m-%d')
-                spending_by_day[date_key] = spending_by_day.get(date_key, 0) + (res.total_cost or 0)
-                sessions_by_day[date_key] = sessions_by_day.get(date_key, 0) + 1
-        
-      
-        current_date = start_date
-        while current_date <= datetime.utcnow():
-            date_key = current_date.strftime('%Y-%m-%d')
-            if date_key not in spending_by_day:
-                spending_by_day[date_key] = 0
-                sessions_by_day[date_key] = 0
-            current_date += timedelta(days=1)
-        
+    current_date = start_date
+    while current_date <= datetime.utcnow():
+        date_key = current_date.strftime('%Y-%m-%d')
+        if date_key not in spending_by_day:
+            spending_by_day[date_key] = 0
+        current_date += timedelta(days=1)
+    
 
-        sorted_spending = sorted(spending_by_day.items())
-        
-        # 2. Parking Lot Usage
-        lot_usage = {}
-        lot_spending = {}
-        for res in reservations:
-            spot = ParkingSpot.query.get(res.spot_id)
-            if spot:
-                lot = ParkingLot.query.get(spot.lot_id)
-                if lot:
-                    lot_name = lot.name
-                    lot_usage[lot_name] = lot_usage.get(lot_name, 0) + 1
-                    lot_spending[lot_name] = lot_spending.get(lot_name, 0) + (res.total_cost or 0)
-        
-        # 3. Parking Duration Distribution
-        duration_brackets = {
-            '0-1 hours': 0, '1-2 hours': 0, '2-4 hours': 0, 
-            '4-8 hours': 0, '8+ hours': 0
-        }
-        
-        for res in reservations:
-            if res.parking_start_time and res.parking_end_time:
-                duration = res.parking_end_time - res.parking_start_time
-                hours = duration.total_seconds() / 3600
-                
-                if hours <= 1:
-                    duration_brackets['0-1 hours'] += 1
-                elif hours <= 2:
-                    duration_brackets['1-2 hours'] += 1
-                elif hours <= 4:
-                    duration_brackets['2-4 hours'] += 1
-                elif hours <= 8:
-                    duration_brackets['4-8 hours'] += 1
-                else:
-                    duration_brackets['8+ hours'] += 1
-        
-        # 4. Weekly Pattern
-        weekday_usage = {i: 0 for i in range(7)}  # 0=Monday, 6=Sunday
-        weekday_spending = {i: 0 for i in range(7)}
-        
-        for res in reservations:
-            if res.parking_start_time:
-                weekday = res.parking_start_time.weekday()
-                weekday_usage[weekday] += 1
-                weekday_spending[weekday] += res.total_cost or 0
-        
-        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        # 5. Monthly Spending Trend 
-        monthly_spending = {}
-        for i in range(6):  # Last 6 months
-            month_start = datetime.utcnow().replace(day=1) - timedelta(days=30 * i)
-            month_key = month_start.strftime('%Y-%m')
-            monthly_spending[month_key] = 0
-        
-        for res in reservations:
-            if res.parking_end_time:
-                month_key = res.parking_end_time.strftime('%Y-%m')
-                if month_key in monthly_spending:
-                    monthly_spending[month_key] += res.total_cost or 0
-        
-        # 6. Hourly Usage Pattern
-        hourly_usage = {}
-        for hour in range(24):
-            hourly_usage[hour] = 0
-        
-        for res in reservations:
-            if res.parking_start_time:
-                hour = res.parking_start_time.hour
-                hourly_usage[hour] += 1
-        
-       
-        charts_data = {
-            'spending_timeline': {
-                'type': 'line',
-                'title': 'My Parking Spending Over Time',
-                'labels': [date for date, _ in sorted_spending],
-                'datasets': [
-                    {
-                        'label': 'Daily Spending (₹)',
-                        'data': [spending for _, spending in sorted_spending],
-                        'borderColor': 'rgb(75, 192, 192)',
-                        'backgroundColor': 'rgba(75, 192, 192, 0.2)',
-                        'tension': 0.1,
-                        'fill': True
-                    }
-                ]
-            },
-            
-            'lot_usage': {
-                'type': 'doughnut',
-                'title': 'My Parking Lot Usage',
-                'labels': list(lot_usage.keys()),
-                'datasets': [
-                    {
-                        'label': 'Sessions',
-                        'data': list(lot_usage.values()),
-                        'backgroundColor': [
-                            '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
-                            '#9966FF', '#FF9F40', '#FF6384', '#36A2EB'
-                        ],
-                        'borderWidth': 2
-                    }
-                ]
-            },
-            
-            'duration_distribution': {
-                'type': 'bar',
-                'title': 'My Parking Duration Patterns',
-                'labels': list(duration_brackets.keys()),
-                'datasets': [
-                    {
-                        'label': 'Number of Sessions',
-                        'data': list(duration_brackets.values()),
-                        'backgroundColor': 'rgba(54, 162, 235, 0.8)',
-                        'borderColor': 'rgb(54, 162, 235)',
-                        'borderWidth': 1
-                    }
-                ]
-            },
-            
-            'weekly_pattern': {
-                'type': 'radar',
-                'title': 'My Weekly Parking Pattern',
-                'labels': weekday_names,
-                'datasets': [
-                    {
-                        'label': 'Sessions per Day',
-                        'data': [weekday_usage[i] for i in range(7)],
-                        'borderColor': 'rgb(255, 99, 132)',
-                        'backgroundColor': 'rgba(255, 99, 132, 0.2)',
-                        'pointBackgroundColor': 'rgb(255, 99, 132)',
-                        'pointBorderColor': '#fff'
-                    }
-                ]
-            },
-            
-            'monthly_trend': {
-                'type': 'line',
-                'title': 'Monthly Spending Trend',
-                'labels': sorted(monthly_spending.keys()),
-                'datasets': [
-                    {
-                        'label': 'Monthly Spending (₹)',
-                        'data': [monthly_spending[month] for month in sorted(monthly_spending.keys())],
-                        'borderColor': 'rgb(153, 102, 255)',
-                        'backgroundColor': 'rgba(153, 102, 255, 0.3)',
-                        'fill': True,
-                        'tension': 0.4
-                    }
-                ]
-            },
-            
-            'hourly_pattern': {
-                'type': 'bar',
-                'title': 'My Parking Hours Preference',
-                'labels': [f"{hour:02d}:00" for hour in range(24)],
-                'datasets': [
-                    {
-                        'label': 'Sessions Started',
-                        'data': [hourly_usage[hour] for hour in range(24)],
-                        'backgroundColor': 'rgba(255, 206, 86, 0.8)',
-                        'borderColor': 'rgb(255, 206, 86)',
-                        'borderWidth': 1
-                    }
-                ]
-            }
-        }
-        
-        #statistics
-        total_spent = sum(res.total_cost for res in reservations)
-        total_sessions = len(reservations)
-        avg_session_cost = round(total_spent / total_sessions, 2) if total_sessions > 0 else 0
-        
-        # total hours parked
-        total_hours = 0
-        for res in reservations:
-            if res.parking_start_time and res.parking_end_time:
-                duration = res.parking_end_time - res.parking_start_time
-                total_hours += duration.total_seconds() / 3600
-        
-        # Most used lot
-        most_used_lot = max(lot_usage, key=lot_usage.get) if lot_usage else None
-        
-        # Peak parking hour
-        peak_hour = max(hourly_usage, key=hourly_usage.get) if any(hourly_usage.values()) else None
-        
-        # Favorite day
-        favorite_day = max(weekday_usage, key=weekday_usage.get) if any(weekday_usage.values()) else None
-        favorite_day_name = weekday_names[favorite_day] if favorite_day is not None else None
-        
-        summary_stats = {
-            'total_spent': total_spent,
-            'total_sessions': total_sessions,
-            'avg_session_cost': avg_session_cost,
-            'total_hours_parked': round(total_hours, 1),
-            'avg_session_duration': round(total_hours / total_sessions, 1) if total_sessions > 0 else 0,
-            'most_used_lot': most_used_lot,
-            'most_used_lot_sessions': lot_usage[most_used_lot] if most_used_lot else 0,
-            'peak_parking_hour': f"{peak_hour:02d}:00" if peak_hour is not None else None,
-            'favorite_day': favorite_day_name,
-            'period_days': days
+    sorted_spending = sorted(spending_by_day.items())
+    
+    # 2. Parking Lot Usage
+    lot_usage = {lot_name: lot['sessions'] for lot_name, lot in sessions.by_lot().items()}
+    
+    # 3. Parking Duration Distribution
+    duration_brackets = {label: bracket['sessions'] for label, bracket in sessions.by_duration().items()}
+    
+    # 4. Weekly Pattern
+    weekday_usage, _ = sessions.by_weekday()
+    weekday_names = WEEKDAY_NAMES
+    
+    # 5. Monthly Spending Trend 
+    monthly_spending = {}
+    for i in range(6):  # Last 6 months
+        month_start = datetime.utcnow().replace(day=1) - timedelta(days=30 * i)
+        month_key = month_start.strftime('%Y-%m')
+        monthly_spending[month_key] = 0
+    
+    for month_key, month in sessions.by_month().items():
+        if month_key in monthly_spending:
+            monthly_spending[month_key] += month['cost']
+    
+    # 6. Hourly Usage Pattern
+    hourly_usage, _ = sessions.by_hour()
+    
+   
+    charts_data = {
+        'spending_timeline': {
+            'type': 'line',
+            'title': 'My Parking Spending Over Time',
+            'labels': [date for date, _ in sorted_spending],
+            'datasets': [
+                {
+                    'label': 'Daily Spending (₹)',
+                    'data': [spending for _, spending in sorted_spending],
+                    'borderColor': 'rgb(75, 192, 192)',
+                    'backgroundColor': 'rgba(75, 192, 192, 0.2)',
+                    'tension': 0.1,
+                    'fill': True
+                }
+            ]
+        },
+        
+        'lot_usage': {
+            'type': 'doughnut',
+            'title': 'My Parking Lot Usage',
+            'labels': list(lot_usage.keys()),
+            'datasets': [
+                {
+                    'label': 'Sessions',
+                    'data': list(lot_usage.values()),
+                    'backgroundColor': [
+                        '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
+                        '#9966FF', '#FF9F40', '#FF6384', '#36A2EB'
+                    ],
+                    'borderWidth': 2
+                }
+            ]
+        },
+        
+        'duration_distribution': {
+            'type': 'bar',
+            'title': 'My Parking Duration Patterns',
+            'labels': list(duration_brackets.keys()),
+            'datasets': [
+                {
+                    'label': 'Number of Sessions',
+                    'data': list(duration_brackets.values()),
+                    'backgroundColor': 'rgba(54, 162, 235, 0.8)',
+                    'borderColor': 'rgb(54, 162, 235)',
+                    'borderWidth': 1
+                }
+            ]
+        },
+        
+        'weekly_pattern': {
+            'type': 'radar',
+            'title': 'My Weekly Parking Pattern',
+            'labels': weekday_names,
+            'datasets': [
+                {
+                    'label': 'Sessions per Day',
+                    'data': weekday_usage.tolist(),
+                    'borderColor': 'rgb(255, 99, 132)',
+                    'backgroundColor': 'rgba(255, 99, 132, 0.2)',
+                    'pointBackgroundColor': 'rgb(255, 99, 132)',
+                    'pointBorderColor': '#fff'
+                }
+            ]
+        },
+        
+        'monthly_trend': {
+            'type': 'line',
+            'title': 'Monthly Spending Trend',
+            'labels': sorted(monthly_spending.keys()),
+            'datasets': [
+                {
+                    'label': 'Monthly Spending (₹)',
+                    'data': [monthly_spending[month] for month in sorted(monthly_spending.keys())],
+                    'borderColor': 'rgb(153, 102, 255)',
+                    'backgroundColor': 'rgba(153, 102, 255, 0.3)',
+                    'fill': True,
+                    'tension': 0.4
+                }
+            ]
+        },
+        
+        'hourly_pattern': {
+            'type': 'bar',
+            'title': 'My Parking Hours Preference',
+            'labels': [f"{hour:02d}:00" for hour in range(24)],
+            'datasets': [
+                {
+                    'label': 'Sessions Started',
+                    'data': hourly_usage.tolist(),
+                    'backgroundColor': 'rgba(255, 206, 86, 0.8)',
+                    'borderColor': 'rgb(255, 206, 86)',
+                    'borderWidth': 1
+                }
+            ]
         }
-        
-        return jsonify({
-            'charts': charts_data,
-            'summary': summary_stats,
-            'period': f'Last {days} days',
-            'generated_at': datetime.utcnow().isoformat()
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    }
+    
+    #statistics
+    totals = sessions.totals()
+    total_spent = totals['cost']
+    total_sessions = totals['sessions']
+    avg_session_cost = round(total_spent / total_sessions, 2) if total_sessions > 0 else 0
+    total_hours = totals['hours']
+    
+    # Most used lot
+    most_used_lot = max(lot_usage, key=lot_usage.get) if lot_usage else None
+    
+    # Peak parking hour
+    peak_hour = int(hourly_usage.argmax()) if hourly_usage.any() else None
+    
+    # Favorite day
+    favorite_day_name = weekday_names[int(weekday_usage.argmax())] if weekday_usage.any() else None
+    
+    summary_stats = {
+        'total_spent': total_spent,
+        'total_sessions': total_sessions,
+        'avg_session_cost': avg_session_cost,
+        'total_hours_parked': round(total_hours, 1),
+        'avg_session_duration': round(total_hours / total_sessions, 1) if total_sessions > 0 else 0,
+        'most_used_lot': most_used_lot,
+        'most_used_lot_sessions': lot_usage[most_used_lot] if most_used_lot else 0,
+        'peak_parking_hour': f"{peak_hour:02d}:00" if peak_hour is not None else None,
+        'favorite_day': favorite_day_name,
+        'period_days': days
+    }
+    
+    return {
+        'charts': charts_data,
+        'summary': summary_stats,
+        'period': f'Last {days} days',
+        'generated_at': datetime.utcnow().isoformat()
+    }
 
 @user_bp.route('/analytics/charts/cost-analysis', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('cost-analysis-charts', require_user)
 def get_cost_analysis_charts():
     """Get detailed cost analysis charts for user"""
     try:
@@ -759,151 +750,159 @@ def get_cost_analysis_charts():
         
         # Time period
         days = request.args.get('days', 90, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
+        if report_jobs.offloaded(days):
+            return report_jobs.accepted(report_jobs.submit('cost-analysis-charts', user_id=user.id, days=days), 'user.get_job')
+        return jsonify(cost_analysis_report(user.id, days)), 200
         
-        reservations = Reservation.query.filter(
-            Reservation.user_id == user.id,
-            Reservation.status == 'completed',
-            Reservation.parking_end_time >= start_date
-        ).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_jobs.report('cost-analysis-charts')
+def cost_analysis_report(user_id, days):
+    """A driver's cost analysis charts over the last `days` days"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    
+    sessions = SessionFrame.load(start_date, user_id=user_id)
+    paid = sessions.cost > 0
+    
+    # 1. Cost vs Duration Scatter Plot
+    cost_duration_data = [
+        {'x': hours, 'y': cost}
+        for hours, cost in zip(np.round(sessions.hours[paid], 2).tolist(), sessions.cost[paid].tolist())
+    ]
+    
+    # 2. Average cost by time of day (paid sessions)
+    start_hours = sessions.hour_of_day()[paid]
+    hour_sessions = np.bincount(start_hours, minlength=24)
+    hour_costs = np.bincount(start_hours, weights=sessions.cost[paid], minlength=24)
+    avg_cost_by_hour = np.round(
+        np.divide(hour_costs, hour_sessions, out=np.zeros(24), where=hour_sessions > 0), 2
+    ).tolist()
+    
+    # 3. Efficiency Analysis (billed hours, minimum one per session)
+    lot_efficiency = {}
+    for lot_name, lot in sessions.by_lot().items():
+        lot_efficiency[lot_name] = {
+            'total_cost': lot['cost'],
+            'total_hours': lot['billed_hours'],
+            'cost_per_hour': round(lot['cost'] / lot['billed_hours'], 2) if lot['billed_hours'] > 0 else 0
+        }
+    
+    # 4. Weekly Cost Comparison
+    weekly_costs = {}
+    for i in range(4):  
+        week_start = datetime.utcnow() - timedelta(weeks=i+1)
+        week_end = week_start + timedelta(days=7)
+        weekly_costs[f"Week {i+1}"] = float(sessions.cost[sessions.between(week_start, week_end)].sum())
+    
+    charts_data = {
+        'cost_vs_duration': {
+            'type': 'scatter',
+            'title': 'Cost vs Duration Analysis',
+            'datasets': [
+                {
+                    'label': 'Cost vs Hours',
+                    'data': cost_duration_data,
+                    'backgroundColor': 'rgba(255, 99, 132, 0.6)',
+                    'borderColor': 'rgb(255, 99, 132)',
+                    'pointRadius': 5
+                }
+            ]
+        },
+        
+        'cost_by_time': {
+            'type': 'line',
+            'title': 'Average Cost by Time of Day',
+            'labels': [f"{hour:02d}:00" for hour in range(24)],
+            'datasets': [
+                {
+                    'label': 'Avg Cost per Session (₹)',
+                    'data': avg_cost_by_hour,
+                    'borderColor': 'rgb(54, 162, 235)',
+                    'backgroundColor': 'rgba(54, 162, 235, 0.2)',
+                    'fill': True,
+                    'tension': 0.4
+                }
+            ]
+        },
+        
+        'lot_efficiency': {
+            'type': 'horizontalBar',
+            'title': 'Cost Efficiency by Parking Lot',
+            'labels': list(lot_efficiency.keys()),
+            'datasets': [
+                {
+                    'label': 'Cost per Hour (₹)',
+                    'data': [lot_efficiency[lot]['cost_per_hour'] for lot in lot_efficiency],
+                    'backgroundColor': 'rgba(75, 192, 192, 0.8)',
+                    'borderColor': 'rgb(75, 192, 192)',
+                    'borderWidth': 1
+                }
+            ]
+        },
+        
+        'weekly_comparison': {
+            'type': 'bar',
+            'title': 'Weekly Spending Comparison',
+            'labels': list(reversed(list(weekly_costs.keys()))),
+            'datasets': [
+                {
+                    'label': 'Weekly Spending (₹)',
+                    'data': list(reversed(list(weekly_costs.values()))),
+                    'backgroundColor': [
+                        'rgba(255, 206, 86, 0.8)',
+                        'rgba(75, 192, 192, 0.8)', 
+                        'rgba(153, 102, 255, 0.8)',
+                        'rgba(255, 159, 64, 0.8)'
+                    ],
+                    'borderWidth': 1
+                }
+            ]
+        }
+    }
+    
+    return {
+        'charts': charts_data,
+        'period': f'Last {days} days'
+    }
+
+@user_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def submit_job():
+    """Queue a personal report: {"report": "personal-charts", "days": 365}"""
+    try:
+        user, error_response, status_code = require_user()
+        if error_response:
+            return error_response, status_code
         
-        # 1. Cost vs Duration Scatter Plot
-        cost_duration_data = []
-        for res in reservations:
-            if res.parking_start_time and res.parking_end_time and res.total_cost:
-                duration = res.parking_end_time - res.parking_start_time
-                hours = duration.total_seconds() / 3600
-                cost_duration_data.append({
-                    'x': round(hours, 2),
-                    'y': res.total_cost
-                })
-        
-        # 2. Cost by Time of Day
-        time_cost = {}
-        for hour in range(24):
-            time_cost[hour] = {'total_cost': 0, 'sessions': 0}
+        data = request.get_json() or {}
+        report = data.get('report')
+        if not report_jobs.is_report(report):
+            return jsonify({'error': 'Unknown report'}), 400
+        try:
+            days = int(data.get('days', 90))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'days must be an integer'}), 400
         
-        for res in reservations:
-            if res.parking_start_time and res.total_cost:
-                hour = res.parking_start_time.hour
-                time_cost[hour]['total_cost'] += res.total_cost
-                time_cost[hour]['sessions'] += 1
-        
-        # average cost per hour
-        avg_cost_by_hour = {}
-        for hour in range(24):
-            if time_cost[hour]['sessions'] > 0:
-                avg_cost_by_hour[hour] = round(time_cost[hour]['total_cost'] / time_cost[hour]['sessions'], 2)
-            else:
-                avg_cost_by_hour[hour] = 0
-        
-        # 3. Efficiency Analysis
-        lot_efficiency = {}
-        for res in reservations:
-            spot = ParkingSpot.query.get(res.spot_id)
-            if spot and res.parking_start_time and res.parking_end_time:
-                lot = ParkingLot.query.get(spot.lot_id)
-                if lot:
-                    lot_name = lot.name
-                    if lot_name not in lot_efficiency:
-                        lot_efficiency[lot_name] = {'total_cost': 0, 'total_hours': 0}
-                    
-                    duration = res.parking_end_time - res.parking_start_time
-                    hours = max(duration.total_seconds() / 3600, 1)  
-                    
-                    lot_efficiency[lot_name]['total_cost'] += res.total_cost or 0
-                    lot_efficiency[lot_name]['total_hours'] += hours
+        return report_jobs.accepted(report_jobs.submit(report, user_id=user.id, days=days), 'user.get_job')
         
-   
-        for lot_name in lot_efficiency:
-            if lot_efficiency[lot_name]['total_hours'] > 0:
-                cost_per_hour = lot_efficiency[lot_name]['total_cost'] / lot_efficiency[lot_name]['total_hours']
-                lot_efficiency[lot_name]['cost_per_hour'] = round(cost_per_hour, 2)
-            else:
-                lot_efficiency[lot_name]['cost_per_hour'] = 0
-        
-        # 4. Weekly Cost Comparison
-        weekly_costs = {}
-        for i in range(4):  
-            week_start = datetime.utcnow() - timedelta(weeks=i+1)
-            week_end = week_start + timedelta(days=7)
-            week_key = f"Week {i+1}"
-            weekly_costs[week_key] = 0
-            
-            for res in reservations:
-                if res.parking_end_time and week_start <= res.parking_end_time <= week_end:
-                    weekly_costs[week_key] += res.total_cost or 0
-        
-        charts_data = {
-            'cost_vs_duration': {
-                'type': 'scatter',
-                'title': 'Cost vs Duration Analysis',
-                'datasets': [
-                    {
-                        'label': 'Cost vs Hours',
-                        'data': cost_duration_data,
-                        'backgroundColor': 'rgba(255, 99, 132, 0.6)',
-                        'borderColor': 'rgb(255, 99, 132)',
-                        'pointRadius': 5
-                    }
-                ]
-            },
-            
-            'cost_by_time': {
-                'type': 'line',
-                'title': 'Average Cost by Time of Day',
-                'labels': [f"{hour:02d}:00" for hour in range(24)],
-                'datasets': [
-                    {
-                        'label': 'Avg Cost per Session (₹)',
-                        'data': [avg_cost_by_hour[hour] for hour in range(24)],
-                        'borderColor': 'rgb(54, 162, 235)',
-                        'backgroundColor': 'rgba(54, 162, 235, 0.2)',
-                        'fill': True,
-                        'tension': 0.4
-                    }
-                ]
-            },
-            
-            'lot_efficiency': {
-                'type': 'horizontalBar',
-                'title': 'Cost Efficiency by Parking Lot',
-                'labels': list(lot_efficiency.keys()),
-                'datasets': [
-                    {
-                        'label': 'Cost per Hour (₹)',
-                        'data': [lot_efficiency[lot]['cost_per_hour'] for lot in lot_efficiency],
-                        'backgroundColor': 'rgba(75, 192, 192, 0.8)',
-                        'borderColor': 'rgb(75, 192, 192)',
-                        'borderWidth': 1
-                    }
-                ]
-            },
-            
-            'weekly_comparison': {
-                'type': 'bar',
-                'title': 'Weekly Spending Comparison',
-                'labels': list(reversed(list(weekly_costs.keys()))),
-                'datasets': [
-                    {
-                        'label': 'Weekly Spending (₹)',
-                        'data': list(reversed(list(weekly_costs.values()))),
-                        'backgroundColor': [
-                            'rgba(255, 206, 86, 0.8)',
-                            'rgba(75, 192, 192, 0.8)', 
-                            'rgba(153, 102, 255, 0.8)',
-                            'rgba(255, 159, 64, 0.8)'
-                        ],
-                        'borderWidth': 1
-                    }
-                ]
-            }
-        }
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Status of one of the user's report jobs, with its result once it has succeeded"""
+    try:
+        user, error_response, status_code = require_user()
+        if error_response:
+            return error_response, status_code
         
-        return jsonify({
-            'charts': charts_data,
-            'period': f'Last {days} days'
-        }), 200
+        job = report_jobs.job(job_id, user_id=user.id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': job}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -981,16 +980,33 @@ def format_duration(start_time, end_time):
 def calculate_user_statistics(user_id):
     """Calculate comprehensive user statistics"""
     try:
-       
-        all_reservations = Reservation.query.filter_by(user_id=user_id).all()
-        completed_reservations = [r for r in all_reservations if r.status == 'completed']
+        
+        # One row per status, aggregated in SQL
+        timed = and_(Reservation.parking_start_time.isnot(None), Reservation.parking_end_time.isnot(None))
+        seconds = epoch_column(Reservation.parking_end_time) - epoch_column(Reservation.parking_start_time)
+        by_status = {
+            row.status: row for row in db.session.query(
+                Reservation.status,
+                func.count(Reservation.id).label('sessions'),
+                func.sum(Reservation.total_cost).label('cost'),
+                func.count(case((Reservation.total_cost != 0, 1))).label('costed'),
+                func.sum(case((timed, seconds))).label('seconds'),
+                func.count(case((timed, 1))).label('timed'),
+                func.min(Reservation.created_at).label('first'),
+                func.max(Reservation.created_at).label('last')
+            ).filter(Reservation.user_id == user_id).group_by(Reservation.status)
+        }
+        completed = by_status.get('completed')
+        
+        def sessions(status):
+            return by_status[status].sessions if status in by_status else 0
         
         stats = {
-            'total_reservations': len(all_reservations),
-            'completed_reservations': len(completed_reservations),
-            'active_reservations': len([r for r in all_reservations if r.status == 'active']),
-            'reserved_reservations': len([r for r in all_reservations if r.status == 'reserved']),
-            'total_cost': sum(r.total_cost for r in completed_reservations if r.total_cost),
+            'total_reservations': sum(row.sessions for row in by_status.values()),
+            'completed_reservations': sessions('completed'),
+            'active_reservations': sessions('active'),
+            'reserved_reservations': sessions('reserved'),
+            'total_cost': completed.cost or 0 if completed else 0,
             'total_hours_parked': 0,
             'average_session_cost': 0,
             'average_session_duration': 0,
@@ -999,47 +1015,38 @@ def calculate_user_statistics(user_id):
             'last_parking_date': None
         }
         
-        if completed_reservations:
-           
-            total_hours = 0
-            valid_durations = []
-            
-            for res in completed_reservations:
-                if res.parking_start_time and res.parking_end_time:
-                    duration = res.parking_end_time - res.parking_start_time
-                    hours = duration.total_seconds() / 3600
-                    total_hours += hours
-                    valid_durations.append(hours)
+        if completed:
             
+            total_hours = (completed.seconds or 0) / 3600
             stats['total_hours_parked'] = round(total_hours, 2)
             
             # Average session cost
-            valid_costs = [r.total_cost for r in completed_reservations if r.total_cost]
-            if valid_costs:
-                stats['average_session_cost'] = round(sum(valid_costs) / len(valid_costs), 2)
+            if completed.costed:
+                stats['average_session_cost'] = round(completed.cost / completed.costed, 2)
             
             # Average session duration
-            if valid_durations:
-                stats['average_session_duration'] = round(sum(valid_durations) / len(valid_durations), 2)
+            if completed.timed:
+                stats['average_session_duration'] = round(total_hours / completed.timed, 2)
             
             # Most used lot
-            lot_usage = {}
-            for res in all_reservations:
-                spot = ParkingSpot.query.get(res.spot_id)
-                if spot:
-                    lot = ParkingLot.query.get(spot.lot_id)
-                    if lot:
-                        lot_name = lot.name
-                        lot_usage[lot_name] = lot_usage.get(lot_name, 0) + 1
+            most_used = db.session.query(ParkingLot.name).join(
+                ParkingSpot, ParkingSpot.lot_id == ParkingLot.id
+            ).join(
+                Reservation, Reservation.spot_id == ParkingSpot.id
+            ).filter(
+                Reservation.user_id == user_id
+            ).group_by(ParkingLot.id).order_by(
+                func.count(Reservation.id).desc()
+            ).first()
             
-            if lot_usage:
-                stats['most_used_lot'] = max(lot_usage, key=lot_usage.get)
+            if most_used:
+                stats['most_used_lot'] = most_used.name
             
             # First and last parking dates
-            dates = [r.created_at for r in all_reservations if r.created_at]
-            if dates:
-                stats['first_parking_date'] = min(dates).isoformat()
-                stats['last_parking_date'] = max(dates).isoformat()
+            firsts = [row.first for row in by_status.values() if row.first]
+            if firsts:
+                stats['first_parking_date'] = min(firsts).isoformat()
+                stats['last_parking_date'] = max(row.last for row in by_status.values() if row.last).isoformat()
         
         return stats
         
@@ -468,7 +468,8 @@ window.AdminDashboardComponent = {
                 'active': 'badge bg-primary',
                 'completed': 'badge bg-success',
                 'reserved': 'badge bg-warning',
-                'cancelled': 'badge bg-secondary'
+                'cancelled': 'badge bg-secondary',
+                'expired': 'badge bg-secondary'
             };
             return classes[status] || 'badge bg-secondary';
         },
@@ -478,7 +479,8 @@ window.AdminDashboardComponent = {
                 'active': 'Active',
                 'completed': 'Completed',
                 'reserved': 'Reserved',
-                'cancelled': 'Cancelled'
+                'cancelled': 'Cancelled',
+                'expired': 'Expired'
             };
             return texts[status] || status;
         }
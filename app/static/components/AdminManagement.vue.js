@@ -117,7 +117,7 @@ window.AdminUserManagementComponent = {
                                     class="form-control" 
                                     placeholder="Search by name, email, or username..."
                                     v-model="searchQuery"
-                                    @input="filterUsers"
+                                    @input="searchUsers"
                                 >
                             </div>
                         </div>
@@ -134,11 +134,13 @@ window.AdminUserManagementComponent = {
                     </div>
                     <div class="col-md-3">
                         <div class="form-group">
-                            <label class="form-label">Filter by Role</label>
-                            <select class="form-control" v-model="roleFilter" @change="filterUsers">
-                                <option value="">All Roles</option>
-                                <option value="admin">Admins</option>
-                                <option value="user">Users</option>
+                            <label class="form-label">Sort by</label>
+                            <select class="form-control" v-model="sortOption" @change="filterUsers">
+                                <option value="id:asc">Oldest First</option>
+                                <option value="created_at:desc">Newest First</option>
+                                <option value="username:asc">Username</option>
+                                <option value="total_spent:desc">Top Spenders</option>
+                                <option value="last_activity:desc">Recently Active</option>
                             </select>
                         </div>
                     </div>
@@ -163,7 +165,7 @@ window.AdminUserManagementComponent = {
                 <div class="d-flex justify-content-between align-items-center">
                     <h5 class="mb-0">
                         <i class="fas fa-table me-2"></i>Users List 
-                        <small class="text-muted">({{ filteredUsers.length }} of {{ users.length }})</small>
+                        <small class="text-muted">({{ totalUsers }} of {{ statistics.total_users }})</small>
                     </h5>
                     <div class="btn-group" role="group">
                         <button class="btn btn-outline-secondary btn-sm" @click="exportUsers">
@@ -188,7 +190,7 @@ window.AdminUserManagementComponent = {
                             </tr>
                         </thead>
                         <tbody>
-                            <tr v-for="user in paginatedUsers" :key="user.id">
+                            <tr v-for="user in users" :key="user.id">
                                 <td>
                                     <div class="d-flex align-items-center">
                                         <div class="avatar me-3">
@@ -273,12 +275,12 @@ window.AdminUserManagementComponent = {
                 <nav>
                     <ul class="pagination justify-content-center mb-0">
                         <li class="page-item" :class="{ disabled: currentPage === 1 }">
-                            <button class="page-link" @click="currentPage = 1" :disabled="currentPage === 1">
+                            <button class="page-link" @click="goToPage(1)" :disabled="currentPage === 1">
                                 <i class="fas fa-angle-double-left"></i>
                             </button>
                         </li>
                         <li class="page-item" :class="{ disabled: currentPage === 1 }">
-                            <button class="page-link" @click="currentPage--" :disabled="currentPage === 1">
+                            <button class="page-link" @click="goToPage(currentPage - 1)" :disabled="currentPage === 1">
                                 <i class="fas fa-angle-left"></i>
                             </button>
                         </li>
@@ -288,15 +290,15 @@ window.AdminUserManagementComponent = {
                             class="page-item" 
                             :class="{ active: page === currentPage }"
                         >
-                            <button class="page-link" @click="currentPage = page">{{ page }}</button>
+                            <button class="page-link" @click="goToPage(page)">{{ page }}</button>
                         </li>
                         <li class="page-item" :class="{ disabled: currentPage === totalPages }">
-                            <button class="page-link" @click="currentPage++" :disabled="currentPage === totalPages">
+                            <button class="page-link" @click="goToPage(currentPage + 1)" :disabled="currentPage === totalPages">
                                 <i class="fas fa-angle-right"></i>
                             </button>
                         </li>
                         <li class="page-item" :class="{ disabled: currentPage === totalPages }">
-                            <button class="page-link" @click="currentPage = totalPages" :disabled="currentPage === totalPages">
+                            <button class="page-link" @click="goToPage(totalPages)" :disabled="currentPage === totalPages">
                                 <i class="fas fa-angle-double-right"></i>
                             </button>
                         </li>
@@ -469,8 +471,7 @@ window.AdminUserManagementComponent = {
             loading: true,
             error: null,
             users: [],
-            filteredUsers: [],
-            paginatedUsers: [],
+            totalUsers: 0,
             statistics: {
                 total_users: 0,
                 active_users: 0,
@@ -481,7 +482,8 @@ window.AdminUserManagementComponent = {
             // Filters
             searchQuery: '',
             statusFilter: '',
-            roleFilter: '',
+            sortOption: 'id:asc',
+            searchTimer: null,
             
             // Pagination
             currentPage: 1,
@@ -572,7 +574,7 @@ window.AdminUserManagementComponent = {
 
                 if (response.ok) {
                     user.is_active = !user.is_active;
-                    this.calculateStatistics();
+                    this.loadUsers();
                     this.successMessage = `User ${user.is_active ? 'activated' : 'deactivated'} successfully.`;
                 } else {
                     throw new Error('Failed to update user status');
@@ -607,8 +609,7 @@ window.AdminUserManagementComponent = {
 
                 if (response.ok) {
                     this.users = this.users.filter(u => u.id !== user.id);
-                    this.calculateStatistics();
-                    this.filterUsers();
+                    this.loadUsers();
                     this.successMessage = 'User deleted successfully.';
                 } else {
                     throw new Error('Failed to delete user');
@@ -618,7 +619,6 @@ window.AdminUserManagementComponent = {
                 // For demo, just remove locally
                 this.users = this.users.filter(u => u.id !== user.id);
                 this.calculateStatistics();
-                this.filterUsers();
                 this.successMessage = 'User deleted successfully.';
             }
         },
@@ -664,8 +664,7 @@ window.AdminUserManagementComponent = {
                         this.successMessage = 'User created successfully.';
                     }
                     
-                    this.calculateStatistics();
-                    this.filterUsers();
+                    this.loadUsers();
                     this.closeCreateUserModal();
                 } else {
                     throw new Error('Failed to save user');
@@ -692,7 +691,6 @@ window.AdminUserManagementComponent = {
                 }
                 
                 this.calculateStatistics();
-                this.filterUsers();
                 this.closeCreateUserModal();
             } finally {
                 this.userFormLoading = false;
@@ -729,7 +727,7 @@ window.AdminUserManagementComponent = {
 
         generateCSV() {
             const headers = ['ID', 'Username', 'Full Name', 'Email', 'Phone', 'Role', 'Status', 'Created', 'Last Login', 'Reservations'];
-            const rows = this.filteredUsers.map(user => [
+            const rows = this.users.map(user => [
                 user.id,
                 user.username,
                 user.full_name || '',
@@ -792,7 +790,23 @@ window.AdminUserManagementComponent = {
             
             try {
                 const token = localStorage.getItem('access_token');
-                const response = await fetch('/api/admin/users', {
+                
+                // Search, sort and paging happen server-side, one page per request
+                const [sort, order] = this.sortOption.split(':');
+                const params = new URLSearchParams({
+                    page: this.currentPage,
+                    per_page: this.perPage,
+                    sort,
+                    order
+                });
+                if (this.searchQuery.trim()) {
+                    params.set('search', this.searchQuery.trim());
+                }
+                if (this.statusFilter) {
+                    params.set('status', this.statusFilter);
+                }
+
+                const response = await fetch(`/api/admin/users?${params}`, {
                     headers: {
                         'Authorization': `Bearer ${token}`,
                         'Content-Type': 'application/json'
@@ -805,8 +819,9 @@ window.AdminUserManagementComponent = {
 
                 const data = await response.json();
                 this.users = data.users || [];
-                this.calculateStatistics();
-                this.filterUsers();
+                this.totalUsers = data.pagination.total;
+                this.totalPages = data.pagination.pages;
+                this.statistics = { ...this.statistics, ...data.statistics };
                 
             } catch (error) {
                 console.error('Error loading users:', error);
@@ -874,8 +889,9 @@ window.AdminUserManagementComponent = {
                     total_reservations: 2
                 }
             ];
+            this.totalUsers = this.users.length;
+            this.totalPages = 1;
             this.calculateStatistics();
-            this.filterUsers();
         },
 
         calculateStatistics() {
@@ -893,42 +909,20 @@ window.AdminUserManagementComponent = {
         },
 
         filterUsers() {
-            let filtered = [...this.users];
-
-            // Search filter
-            if (this.searchQuery) {
-                const query = this.searchQuery.toLowerCase();
-                filtered = filtered.filter(user => 
-                    (user.full_name && user.full_name.toLowerCase().includes(query)) ||
-                    user.username.toLowerCase().includes(query) ||
-                    user.email.toLowerCase().includes(query)
-                );
-            }
-
-            // Status filter
-            if (this.statusFilter) {
-                filtered = filtered.filter(user => 
-                    this.statusFilter === 'active' ? user.is_active : !user.is_active
-                );
-            }
-
-            // Role filter
-            if (this.roleFilter) {
-                filtered = filtered.filter(user => 
-                    this.roleFilter === 'admin' ? user.is_admin : !user.is_admin
-                );
-            }
-
-            this.filteredUsers = filtered;
-            this.totalPages = Math.ceil(filtered.length / this.perPage);
             this.currentPage = 1;
-            this.updatePagination();
+            this.loadUsers();
         },
 
-        updatePagination() {
-            const start = (this.currentPage - 1) * this.perPage;
-            const end = start + parseInt(this.perPage);
-            this.paginatedUsers = this.filteredUsers.slice(start, end);
+        searchUsers() {
+            // Wait for typing to pause before asking the server
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.filterUsers(), 300);
+        },
+
+        goToPage(page) {
+            if (page < 1 || page > this.totalPages || page === this.currentPage) return;
+            this.currentPage = page;
+            this.loadUsers();
         },
 
         // User actions
@@ -974,7 +968,7 @@ window.AdminUserManagementComponent = {
               if (response.ok) {
                 // -- Success: update local state with the server-confirmed value
                 user.is_active = !user.is_active;
-                this.calculateStatistics();
+                this.loadUsers();
                 this.successMessage = `User ${user.is_active ? 'activated' : 'deactivated'} successfully.`;
               } else {
                 // -- Server returned an error code we didn’t expect
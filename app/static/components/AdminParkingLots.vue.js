@@ -460,8 +460,9 @@ window.AdminParkingLotsComponent = {
                                 <div 
                                     class="card text-center h-100"
                                     :class="{
-                                        'border-success': !spot.is_occupied && spot.is_active,
+                                        'border-success': !spot.is_occupied && !spot.is_reserved && spot.is_active,
                                         'border-danger': spot.is_occupied,
+                                        'border-warning': spot.is_reserved && !spot.is_occupied,
                                         'border-secondary': !spot.is_active
                                     }"
                                 >
@@ -470,8 +471,9 @@ window.AdminParkingLotsComponent = {
                                         <small 
                                             class="badge"
                                             :class="{
-                                                'bg-success': !spot.is_occupied && spot.is_active,
+                                                'bg-success': !spot.is_occupied && !spot.is_reserved && spot.is_active,
                                                 'bg-danger': spot.is_occupied,
+                                                'bg-warning': spot.is_reserved && !spot.is_occupied,
                                                 'bg-secondary': !spot.is_active
                                             }"
                                         >
@@ -817,6 +819,7 @@ window.AdminParkingLotsComponent = {
         getSpotStatus(spot) {
             if (!spot.is_active) return 'Inactive';
             if (spot.is_occupied) return 'Occupied';
+            if (spot.is_reserved) return 'Reserved';
             return 'Available';
         }
     }
@@ -377,13 +377,20 @@ window.UserDashboardComponent = {
     mounted() {
         console.log('🚗 User Dashboard mounted');
         this.loadDashboardData();
-     
-        this.autoRefreshInterval = setInterval(() => {
-            this.refreshActiveReservation();
-        }, 30000);
+
+        // Live availability; fall back to polling where EventSource is missing
+        this.availabilitySource = window.api.subscribeAvailability((lots) => this.applyAvailability(lots));
+        if (!this.availabilitySource) {
+            this.autoRefreshInterval = setInterval(() => {
+                this.refreshActiveReservation();
+            }, 30000);
+        }
     },
 
     beforeUnmount() {
+        if (this.availabilitySource) {
+            this.availabilitySource.close();
+        }
         if (this.autoRefreshInterval) {
             clearInterval(this.autoRefreshInterval);
         }
@@ -403,7 +410,7 @@ window.UserDashboardComponent = {
 
             
                 try {
-                    const historyResponse = await window.api.getParkingHistory(1, 5);
+                    const historyResponse = await window.api.getParkingHistory(5);
                     this.userStats = historyResponse.statistics || {};
                     if (historyResponse.reservations && historyResponse.reservations.length > 0) {
                         this.recentHistory = historyResponse.reservations;
@@ -455,6 +462,17 @@ window.UserDashboardComponent = {
             await this.checkActiveReservation();
         },
 
+        applyAvailability(lots) {
+            if (window.api.mergeAvailability(this.availableLots, lots)) {
+                this.loadDashboardData();
+                return;
+            }
+            const current = this.activeReservation || this.reservedSpot;
+            if (current && current.lot && lots.some(lot => lot.lot_id === current.lot.id)) {
+                this.refreshActiveReservation();
+            }
+        },
+
         showReservationModal() {
             this.reservationForm = {
                 lot_id: '',
@@ -617,7 +635,8 @@ window.UserDashboardComponent = {
                 'active': 'badge bg-primary',
                 'completed': 'badge bg-success',
                 'reserved': 'badge bg-warning',
-                'cancelled': 'badge bg-secondary'
+                'cancelled': 'badge bg-secondary',
+                'expired': 'badge bg-secondary'
             };
             return classes[status] || 'badge bg-secondary';
         },
@@ -627,7 +646,8 @@ window.UserDashboardComponent = {
                 'active': 'Active',
                 'completed': 'Completed',
                 'reserved': 'Reserved',
-                'cancelled': 'Cancelled'
+                'cancelled': 'Cancelled',
+                'expired': 'Expired'
             };
             return texts[status] || status;
         }
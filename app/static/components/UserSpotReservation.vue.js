@@ -648,6 +648,13 @@ window.UserSpotReservationComponent = {
         console.log('🚗 User Spot Reservation mounted');
         this.loadParkingLots();
         this.loadActiveReservation();
+        this.availabilitySource = window.api.subscribeAvailability((lots) => this.applyAvailability(lots));
+    },
+
+    beforeUnmount() {
+        if (this.availabilitySource) {
+            this.availabilitySource.close();
+        }
     },
 
     methods: {
@@ -671,6 +678,17 @@ window.UserSpotReservationComponent = {
             }
         },
 
+        /**
+         * Apply live availability updates to the lot list
+         */
+        applyAvailability(lots) {
+            if (window.api.mergeAvailability(this.parkingLots, lots)) {
+                this.loadParkingLots();
+                return;
+            }
+            this.filterLots();
+        },
+
         /**
          * Load active reservation
          */
@@ -1018,7 +1036,8 @@ window.UserSpotReservationComponent = {
                 'reserved': 'Reserved',
                 'active': 'Parking',
                 'completed': 'Completed',
-                'cancelled': 'Cancelled'
+                'cancelled': 'Cancelled',
+                'expired': 'Expired'
             };
             return statusMap[status] || status;
         },
@@ -1031,7 +1050,8 @@ window.UserSpotReservationComponent = {
                 'reserved': 'bg-warning',
                 'active': 'bg-primary',
                 'completed': 'bg-success',
-                'cancelled': 'bg-secondary'
+                'cancelled': 'bg-secondary',
+                'expired': 'bg-secondary'
             };
             return classMap[status] || 'bg-secondary';
         },
@@ -197,7 +197,7 @@ window.CostCalculationComponent = {
                 <h5><i class="fas fa-list me-2"></i>Detailed Parking History</h5>
                 <button 
                     class="btn btn-outline-primary btn-sm" 
-                    @click="loadDetailedHistory"
+                    @click="loadDetailedHistory()"
                     :disabled="loadingHistory"
                 >
                     <i class="fas fa-download me-1" :class="{'fa-spin': loadingHistory}"></i>
@@ -294,7 +294,7 @@ window.CostCalculationComponent = {
                 </div>
 
                 <!-- Pagination -->
-                <nav v-if="detailedHistory.length > 0" class="mt-3">
+                <nav v-if="detailedHistory.length > 0 && nextCursor" class="mt-3">
                     <div class="d-flex justify-content-between align-items-center">
                         <small class="text-muted">
                             Showing {{ detailedHistory.length }} recent sessions
@@ -483,7 +483,7 @@ window.CostCalculationComponent = {
             showBreakdownModal: false,
             
             // Pagination
-            currentPage: 1,
+            nextCursor: null,
             perPage: 10
         }
     },
@@ -528,23 +528,24 @@ window.CostCalculationComponent = {
         },
 
         /**
-         * Load detailed history
+         * Load detailed history; append follows nextCursor
          */
-        async loadDetailedHistory() {
+        async loadDetailedHistory(append = false) {
             this.loadingHistory = true;
 
             try {
                 const response = await window.api.getDetailedParkingHistory({
                     status: 'completed',
                     per_page: this.perPage,
-                    page: this.currentPage
+                    cursor: append ? this.nextCursor : ''
                 });
                 
-                if (this.currentPage === 1) {
-                    this.detailedHistory = response.reservations || [];
-                } else {
+                if (append) {
                     this.detailedHistory.push(...(response.reservations || []));
+                } else {
+                    this.detailedHistory = response.reservations || [];
                 }
+                this.nextCursor = response.pagination?.next_cursor || null;
                 
                 console.log('Detailed history loaded:', response);
                 
@@ -562,8 +563,9 @@ window.CostCalculationComponent = {
          * Load more history
          */
         loadMoreHistory() {
-            this.currentPage++;
-            this.loadDetailedHistory();
+            if (this.nextCursor) {
+                this.loadDetailedHistory(true);
+            }
         },
 
         /**
@@ -710,7 +712,8 @@ Generated on: ${new Date().toLocaleString('en-IN')}
                 'completed': 'bg-success',
                 'active': 'bg-primary',
                 'reserved': 'bg-warning',
-                'cancelled': 'bg-secondary'
+                'cancelled': 'bg-secondary',
+                'expired': 'bg-secondary'
             };
             return classMap[status] || 'bg-secondary';
         },
@@ -723,7 +726,8 @@ Generated on: ${new Date().toLocaleString('en-IN')}
                 'completed': 'Completed',
                 'active': 'Active',
                 'reserved': 'Reserved',
-                'cancelled': 'Cancelled'
+                'cancelled': 'Cancelled',
+                'expired': 'Expired'
             };
             return textMap[status] || status;
         },
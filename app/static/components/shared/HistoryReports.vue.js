@@ -117,6 +117,7 @@ window.HistoryReportsComponent = {
                             <option value="active">Active</option>
                             <option value="reserved">Reserved</option>
                             <option value="cancelled">Cancelled</option>
+                            <option value="expired">Expired</option>
                         </select>
                     </div>
                     <div class="col-md-2 mb-3">
@@ -1096,7 +1097,8 @@ Generated: ₹{new Date().toLocaleString('en-IN')}
                 'completed': 'bg-success',
                 'active': 'bg-primary',
                 'reserved': 'bg-warning',
-                'cancelled': 'bg-secondary'
+                'cancelled': 'bg-secondary',
+                'expired': 'bg-secondary'
             };
             return classMap[status] || 'bg-secondary';
         },
@@ -1106,7 +1108,8 @@ Generated: ₹{new Date().toLocaleString('en-IN')}
                 'completed': 'Completed',
                 'active': 'Active',
                 'reserved': 'Reserved',
-                'cancelled': 'Cancelled'
+                'cancelled': 'Cancelled',
+                'expired': 'Expired'
             };
             return textMap[status] || status;
         },
@@ -54,6 +54,11 @@ class ApiService {
                 throw new Error(data.error || `HTTP error! status: ${response.status}`);
             }
 
+            // Long reports are queued: wait for the job and return its result
+            if (response.status === 202 && data.job) {
+                return await this.waitForJob(data.job, response.headers.get('Location'));
+            }
+
             console.log(`✅ API Success: ${endpoint}`, data);
             return data;
 
@@ -70,6 +75,27 @@ class ApiService {
     }
 
     
+     //Poll a background report job until it finishes
+
+    async waitForJob(job, location) {
+        let delay = 500;
+        while (job.status === 'pending' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, delay));
+            delay = Math.min(delay * 2, 5000);
+            const response = await fetch(location, { headers: this.getHeaders() });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || `HTTP error! status: ${response.status}`);
+            }
+            job = data.job;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Report failed');
+        }
+        return job.result;
+    }
+
+
      //Handle authentication errors
      
     handleAuthError() {
@@ -142,6 +168,75 @@ class ApiService {
         return await this.request('/user/parking-lots');
     }
 
+
+     //Live lot availability (Server-Sent Events); null when unsupported
+
+    subscribeAvailability(onLots) {
+        if (!window.EventSource || !this.token) {
+            return null;
+        }
+        const subscription = {
+            source: null,
+            closed: false,
+            close() {
+                this.closed = true;
+                if (this.source) this.source.close();
+            }
+        };
+        const handle = (event) => onLots(JSON.parse(event.data), event.type);
+        // EventSource cannot send headers: the query string carries a short-lived
+        // stream token, fetched again whenever the browser gives up reconnecting
+        const open = async () => {
+            let token;
+            try {
+                ({ token } = await this.request('/user/availability/stream-token', { method: 'POST' }));
+            } catch (error) {
+                if (!subscription.closed) setTimeout(open, 30000);
+                return;
+            }
+            if (subscription.closed) return;
+            const source = new EventSource(
+                `${this.baseURL}/user/availability/stream?jwt=${encodeURIComponent(token)}`
+            );
+            source.addEventListener('snapshot', handle);
+            source.addEventListener('availability', handle);
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED && !subscription.closed) {
+                    setTimeout(open, 3000);
+                }
+            };
+            subscription.source = source;
+        };
+        open();
+        return subscription;
+    }
+
+
+     //Apply availability updates to a list of lots in place; true if an unknown lot appeared
+
+    mergeAvailability(lots, updates) {
+        let unknown = false;
+        updates.forEach((update) => {
+            const index = lots.findIndex((lot) => lot.id === update.lot_id);
+            if (!update.is_active) {
+                if (index !== -1) lots.splice(index, 1);
+                return;
+            }
+            if (index === -1) {
+                unknown = true;
+                return;
+            }
+            const lot = lots[index];
+            lot.total_spots = update.total_spots;
+            lot.available_spots = update.available_spots;
+            lot.occupied_spots = update.occupied_spots;
+            if ('occupancy_rate' in lot && update.total_spots) {
+                lot.occupancy_rate = Math.round(update.occupied_spots / update.total_spots * 10000) / 100;
+            }
+        });
+        return unknown;
+    }
+
     
      //Reserve arking spot
      
@@ -183,13 +278,20 @@ class ApiService {
     
     //parking history
      
-    async getParkingHistory(page = 1, perPage = 10) {
-        return await this.request(`/user/parking-history?page=${page}&per_page=${perPage}`);
+    // Keyset pages: pass the previous response's pagination.next_cursor
+    async getParkingHistory(perPage = 10, cursor = '') {
+        const params = new URLSearchParams({ per_page: perPage, cursor }).toString();
+        return await this.request(`/user/parking-history?${params}`);
+    }
+
+    
+    async getReservationDetails(reservationId) {
+        return await this.request(`/user/reservations/${reservationId}`);
     }
 
     
     async getDetailedParkingHistory(filters = {}) {
-        const params = new URLSearchParams(filters).toString();
+        const params = new URLSearchParams({ cursor: '', ...filters }).toString();
         return await this.request(`/user/parking-history/detailed?${params}`);
     }
 
@@ -254,8 +356,9 @@ class ApiService {
     }
 
     
-    async getUsers() {
-        return await this.request('/admin/users');
+    async getUsers(filters = {}) {
+        const params = new URLSearchParams(filters).toString();
+        return await this.request(`/admin/users?${params}`);
     }
 
     async toggleUserStatus(userId) {
@@ -271,6 +374,24 @@ class ApiService {
     }
 
     
+    async getReservation(reservationId) {
+        return await this.request(`/admin/reservations/${reservationId}`);
+    }
+
+    
+    async exportReservations(filters = {}, format = 'csv') {
+        const params = new URLSearchParams({ ...filters, format }).toString();
+        const response = await fetch(`${this.baseURL}/admin/reservations/export?${params}`, {
+            headers: this.getHeaders()
+        });
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        return await response.blob();
+    }
+
+    
     async getDetailedReservations(filters = {}) {
         const params = new URLSearchParams(filters).toString();
         return await this.request(`/admin/reservations/detailed?${params}`);
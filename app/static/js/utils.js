@@ -244,6 +244,7 @@ window.utils = {
             'active': 'badge-primary',
             'completed': 'badge-success',
             'cancelled': 'badge-secondary',
+            'expired': 'badge-secondary',
             'inactive': 'badge-secondary'
         };
         return statusClasses[status?.toLowerCase()] || 'badge-secondary';
@@ -260,6 +261,7 @@ window.utils = {
             'active': 'Active',
             'completed': 'Completed',
             'cancelled': 'Cancelled',
+            'expired': 'Expired',
             'inactive': 'Inactive'
         };
         return statusTexts[status?.toLowerCase()] || this.capitalize(status);
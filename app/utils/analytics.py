@@ -0,0 +1,352 @@
+"""
+Analytics queries shared by the admin and user chart endpoints
+Revenue series are read from the revenue_rollups table (one row per end
+date, lot and start hour) instead of re-aggregating reservations.
+Windows are whole days: a window starting at `start_date` covers every
+bucket from that calendar day onwards.
+
+Per-session series (a user's own charts) come from SessionFrame, which
+loads a window once as column arrays and groups them with numpy.
+"""
+
+from datetime import datetime, timedelta
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import func, select
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.models.revenue_rollup import DURATION_BRACKETS, RevenueRollup
+from app.models.user import User
+from app.utils.occupancy import epoch_column, to_epoch
+
+
+def _in_window(start_date):
+    return RevenueRollup.day >= start_date.date()
+
+
+def dashboard_totals():
+    """Admin dashboard statistics in one statement.
+
+    Spot totals come from the lot counters and revenue from the rollup, so
+    neither grows with reservation history. count(*) lets SQLite count the
+    smallest index, and active reservations use the partial index.
+    """
+    def scalar(statement):
+        return statement.scalar_subquery()
+
+    row = db.session.execute(select(
+        scalar(select(func.count()).select_from(User).where(User.is_admin == False)),
+        scalar(select(func.count()).select_from(ParkingLot).where(ParkingLot.is_active == True)),
+        scalar(select(func.coalesce(func.sum(ParkingLot.active_spot_count), 0))),
+        scalar(select(func.coalesce(func.sum(ParkingLot.occupied_spot_count), 0))),
+        scalar(select(func.count()).select_from(Reservation)),
+        scalar(select(func.count()).select_from(Reservation).where(Reservation.status == 'active')),
+        scalar(select(func.coalesce(func.sum(RevenueRollup.revenue), 0.0)))
+    )).one()
+
+    return {
+        'total_users': row[0],
+        'total_parking_lots': row[1],
+        'total_parking_spots': row[2],
+        'occupied_spots': row[3],
+        'total_reservations': row[4],
+        'active_reservations': row[5],
+        'total_revenue': row[6]
+    }
+
+
+def user_list_totals(filters):
+    """Counts for the admin user list in one statement.
+
+    `matching` counts the drivers passing `filters` (the page's search and
+    status); the other counts are over every account.
+    """
+    def count(*conditions):
+        return select(func.count()).select_from(User).where(*conditions).scalar_subquery()
+
+    driver = User.is_admin == False
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    row = db.session.execute(select(
+        count(driver, *filters),
+        count(driver),
+        count(driver, User.is_active == True),
+        count(User.is_admin == True),
+        count(driver, User.created_at >= month_ago)
+    )).one()
+
+    return {
+        'matching': row[0],
+        'total_users': row[1],
+        'active_users': row[2],
+        'admin_users': row[3],
+        'new_users_month': row[4]
+    }
+
+
+def revenue_totals(start_date):
+    """Revenue, sessions and hours over the window"""
+    row = db.session.query(
+        func.coalesce(func.sum(RevenueRollup.revenue), 0.0),
+        func.coalesce(func.sum(RevenueRollup.sessions), 0),
+        func.coalesce(func.sum(RevenueRollup.parked_hours), 0.0),
+        func.coalesce(func.sum(RevenueRollup.billed_hours), 0.0)
+    ).filter(_in_window(start_date)).one()
+
+    return {
+        'revenue': row[0],
+        'sessions': row[1],
+        'parked_hours': row[2],
+        'billed_hours': row[3]
+    }
+
+
+def revenue_by_day(start_date):
+    """{'YYYY-MM-DD': {'revenue', 'sessions'}} in date order (days with sessions only)"""
+    rows = db.session.query(
+        RevenueRollup.day,
+        func.sum(RevenueRollup.revenue),
+        func.sum(RevenueRollup.sessions)
+    ).filter(_in_window(start_date)).group_by(RevenueRollup.day).order_by(RevenueRollup.day).all()
+
+    return {
+        day.strftime('%Y-%m-%d'): {'revenue': revenue, 'sessions': sessions}
+        for day, revenue, sessions in rows
+    }
+
+
+def revenue_by_lot(start_date):
+    """{lot name: {'revenue', 'sessions', 'parked_hours', 'billed_hours'}}"""
+    rows = db.session.query(
+        ParkingLot.name,
+        func.sum(RevenueRollup.revenue),
+        func.sum(RevenueRollup.sessions),
+        func.sum(RevenueRollup.parked_hours),
+        func.sum(RevenueRollup.billed_hours)
+    ).join(
+        ParkingLot, ParkingLot.id == RevenueRollup.lot_id
+    ).filter(_in_window(start_date)).group_by(ParkingLot.id, ParkingLot.name).all()
+
+    return {
+        name: {
+            'revenue': revenue,
+            'sessions': sessions,
+            'parked_hours': parked_hours,
+            'billed_hours': billed_hours
+        }
+        for name, revenue, sessions, parked_hours, billed_hours in rows
+    }
+
+
+def revenue_by_start_hour(start_date):
+    """{hour: {'sessions', 'revenue'}} for hours that had sessions"""
+    rows = db.session.query(
+        RevenueRollup.start_hour,
+        func.sum(RevenueRollup.sessions),
+        func.sum(RevenueRollup.revenue)
+    ).filter(_in_window(start_date)).group_by(RevenueRollup.start_hour).all()
+
+    return {hour: {'sessions': sessions, 'revenue': revenue} for hour, sessions, revenue in rows}
+
+
+def revenue_by_duration(start_date):
+    """{'0-1 hours': revenue, ...} in bracket order"""
+    columns = [getattr(RevenueRollup, column) for _, column, _ in DURATION_BRACKETS]
+    row = db.session.query(
+        *[func.coalesce(func.sum(column), 0.0) for column in columns]
+    ).filter(_in_window(start_date)).one()
+
+    return {label: value for (label, _, _), value in zip(DURATION_BRACKETS, row)}
+
+
+def top_users_by_revenue(start_date, limit=5):
+    """Highest spending users in the window plus the revenue of everyone else.
+
+    Returns ([{'user_id', 'username', 'email', 'revenue', 'sessions'}], others_revenue).
+    Grouped in SQL over the (status, parking_end_time) index. The window
+    starts at midnight of start_date, like the rollup series, so "Others"
+    adds up to the same total.
+    """
+    day_start = datetime.combine(start_date.date(), datetime.min.time())
+    window = [Reservation.status == 'completed', Reservation.parking_end_time >= day_start]
+    revenue = func.coalesce(func.sum(Reservation.total_cost), 0.0)
+
+    rows = db.session.query(
+        User.id, User.username, User.email, revenue, func.count(Reservation.id)
+    ).join(
+        Reservation, Reservation.user_id == User.id
+    ).filter(*window).group_by(User.id, User.username, User.email).order_by(revenue.desc()).limit(limit).all()
+
+    total = db.session.query(revenue).filter(*window).scalar() or 0.0
+    top = [
+        {'user_id': user_id, 'username': username, 'email': email, 'revenue': user_revenue, 'sessions': sessions}
+        for user_id, username, email, user_revenue, sessions in rows
+    ]
+    return top, total - sum(user['revenue'] for user in top)
+
+
+DAY = 24 * 60 * 60
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class SessionFrame:
+    """Completed sessions of a window as parallel numpy columns.
+
+    Columns: user_id, lot_id, spot_id, start, end (epoch seconds, UTC) and
+    cost. Lot names are resolved with one lookup.
+    """
+
+    def __init__(self, user_id, lot_id, spot_id, start, end, cost, lot_names=None):
+        self.user_id = user_id
+        self.lot_id = lot_id
+        self.spot_id = spot_id
+        self.start = start
+        self.end = end
+        self.cost = cost
+        self.lot_names = lot_names or {}
+
+    @classmethod
+    def load(cls, start_date, user_id=None, window='end'):
+        """Completed sessions ending (window='end') or created (window='created') since start_date"""
+        window_column = Reservation.parking_end_time if window == 'end' else Reservation.created_at
+        statement = select(
+            Reservation.user_id,
+            ParkingSpot.lot_id,
+            Reservation.spot_id,
+            epoch_column(Reservation.parking_start_time),
+            epoch_column(Reservation.parking_end_time),
+            func.coalesce(Reservation.total_cost, 0.0)
+        ).join(
+            ParkingSpot, ParkingSpot.id == Reservation.spot_id
+        ).where(
+            Reservation.status == 'completed',
+            Reservation.parking_start_time.isnot(None),
+            Reservation.parking_end_time.isnot(None),
+            window_column >= start_date
+        )
+        if user_id is not None:
+            statement = statement.where(Reservation.user_id == user_id)
+
+        rows = db.session.connection().execute(statement).all()
+        data = np.fromiter(
+            chain.from_iterable(rows), dtype=np.float64, count=6 * len(rows)
+        ).reshape(-1, 6)
+
+        ids = data[:, :3].astype(np.int64)
+        times = np.round(data[:, 3:5], 3)
+        frame = cls(ids[:, 0], ids[:, 1], ids[:, 2], times[:, 0], times[:, 1], data[:, 5])
+        frame.lot_names = frame._names(ParkingLot.name, ParkingLot.id, frame.lot_id)
+        return frame
+
+    @staticmethod
+    def _names(name_column, id_column, ids):
+        unique = np.unique(ids).tolist()
+        if not unique:
+            return {}
+        return dict(db.session.query(id_column, name_column).filter(id_column.in_(unique)).all())
+
+    def __len__(self):
+        return len(self.cost)
+
+    # Derived columns
+
+    @property
+    def hours(self):
+        return (self.end - self.start) / 3600
+
+    @property
+    def billed_hours(self):
+        """Minimum one hour, as charged"""
+        return np.maximum(self.hours, 1.0)
+
+    def _column(self, field):
+        return self.start if field == 'start' else self.end
+
+    def day_index(self, field='end'):
+        return (self._column(field) // DAY).astype(np.int64)
+
+    def hour_of_day(self, field='start'):
+        return ((self._column(field) % DAY) // 3600).astype(np.int64)
+
+    def weekday(self, field='start'):
+        # 1970-01-01 was a Thursday (Monday = 0)
+        return (self.day_index(field) + 3) % 7
+
+    # Group-bys
+
+    @staticmethod
+    def _grouped(keys, weights=None):
+        """(unique keys, counts, sums) for integer keys"""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+        sums = np.bincount(inverse, weights=weights, minlength=len(unique)) if weights is not None else counts
+        return unique, counts, sums
+
+    def totals(self):
+        hours = self.hours
+        return {
+            'sessions': len(self),
+            'cost': float(self.cost.sum()),
+            'hours': float(hours.sum()),
+            'billed_hours': float(self.billed_hours.sum())
+        }
+
+    def by_day(self, field='end'):
+        """{'YYYY-MM-DD': {'sessions', 'cost'}} in date order"""
+        days, counts, sums = self._grouped(self.day_index(field), self.cost)
+        epoch_day = datetime(1970, 1, 1)
+        return {
+            (epoch_day + timedelta(days=int(day))).strftime('%Y-%m-%d'): {'sessions': int(count), 'cost': float(total)}
+            for day, count, total in zip(days, counts, sums)
+        }
+
+    def by_month(self, field='end'):
+        """{'YYYY-MM': {'sessions', 'cost'}} in month order"""
+        months = self._column(field).astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        unique, counts, sums = self._grouped(months, self.cost)
+        return {
+            str(np.datetime64(int(month), 'M')): {'sessions': int(count), 'cost': float(total)}
+            for month, count, total in zip(unique, counts, sums)
+        }
+
+    def by_hour(self, field='start'):
+        """(sessions, cost) arrays indexed by hour of day 0-23"""
+        hours = self.hour_of_day(field)
+        return np.bincount(hours, minlength=24), np.bincount(hours, weights=self.cost, minlength=24)
+
+    def by_weekday(self, field='start'):
+        """(sessions, cost) arrays indexed by weekday, Monday = 0"""
+        days = self.weekday(field)
+        return np.bincount(days, minlength=7), np.bincount(days, weights=self.cost, minlength=7)
+
+    def by_lot(self):
+        """{lot name: {'sessions', 'cost', 'hours', 'billed_hours'}}"""
+        lots, counts, costs = self._grouped(self.lot_id, self.cost)
+        _, inverse = np.unique(self.lot_id, return_inverse=True)
+        hours = np.bincount(inverse, weights=self.hours, minlength=len(lots))
+        billed = np.bincount(inverse, weights=self.billed_hours, minlength=len(lots))
+        return {
+            self.lot_names.get(int(lot), f'Lot {lot}'): {
+                'sessions': int(count), 'cost': float(cost),
+                'hours': float(hour_total), 'billed_hours': float(billed_total)
+            }
+            for lot, count, cost, hour_total, billed_total in zip(lots, counts, costs, hours, billed)
+        }
+
+    def by_duration(self):
+        """{bracket label: {'sessions', 'cost'}} using the revenue duration brackets"""
+        uppers = [upper for _, _, upper in DURATION_BRACKETS if upper is not None]
+        brackets = np.searchsorted(uppers, self.hours, 'left')
+        counts = np.bincount(brackets, minlength=len(DURATION_BRACKETS))
+        costs = np.bincount(brackets, weights=self.cost, minlength=len(DURATION_BRACKETS))
+        return {
+            label: {'sessions': int(count), 'cost': float(cost)}
+            for (label, _, _), count, cost in zip(DURATION_BRACKETS, counts, costs)
+        }
+
+    def between(self, start, end, field='end'):
+        """Boolean mask of sessions whose `field` falls in [start, end]"""
+        column = self._column(field)
+        return (column >= to_epoch(start)) & (column <= to_epoch(end))
@@ -0,0 +1,219 @@
+"""
+Live lot availability feed
+One hub thread per app watches parking_lots.version (bumped on every spot
+state change and lot edit) and turns changes into per-lot availability
+deltas, encoded once as Server-Sent Events and fanned out to every
+subscriber's queue. However many clients are connected, the database
+sees one small query per change (or per poll interval, which picks up
+changes committed by other processes).
+
+Routes call availability_hub.notify() after committing a state change so
+the hub wakes immediately instead of at the next poll.
+
+EventSource cannot send headers, so the stream is opened with a stream
+token in the query string: a JWT valid for AVAILABILITY_STREAM_TOKEN_TTL
+seconds that opens the stream and nothing else, so the access token never
+reaches URLs and access logs.
+
+Each open stream keeps one server thread (a sync worker, or one thread of
+a threaded worker) busy for as long as the client stays connected. Serve
+this route from a gevent/eventlet worker or size the thread pool for the
+number of subscribers expected.
+"""
+
+import json
+import queue
+import threading
+from datetime import timedelta
+
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+from app.models import db
+from app.models.parking_lot import ParkingLot
+
+# Queued messages per subscriber before it is resynced with a snapshot
+SUBSCRIBER_BACKLOG = 100
+
+# `scope` claim of stream tokens
+STREAM_TOKEN_SCOPE = 'availability-stream'
+
+
+def _encode(event, event_id, data):
+    return f'id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class Subscription:
+    """One client's queue of encoded SSE messages"""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.messages = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.resync = False
+
+    def push(self, message):
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            # Too far behind for deltas to be useful: start over from a snapshot
+            self.resync = True
+
+    def next_message(self, timeout):
+        """Next message, a fresh snapshot after an overflow, or None on timeout"""
+        if self.resync:
+            self.resync = False
+            while not self.messages.empty():
+                self.messages.get_nowait()
+            return self.hub.snapshot_message()
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class _Hub:
+    """Change feed and subscriber set for one app"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.subscribers = set()
+        self.lots = {}
+        self.sequence = 0
+        self.thread = None
+
+    def _read_lots(self):
+        rows = db.session.execute(select(
+            ParkingLot.id, ParkingLot.version, ParkingLot.name, ParkingLot.is_active,
+            ParkingLot.total_spots, ParkingLot.available_spot_count, ParkingLot.occupied_spot_count
+        )).all()
+        db.session.remove()
+        return {
+            row.id: {
+                'lot_id': row.id,
+                'version': row.version,
+                'name': row.name,
+                'is_active': row.is_active,
+                'total_spots': row.total_spots,
+                'available_spots': row.available_spot_count,
+                'occupied_spots': row.occupied_spot_count
+            }
+            for row in rows
+        }
+
+    def refresh(self):
+        """Re-read the lots and publish what changed; returns the deltas"""
+        current = self._read_lots()
+        with self.lock:
+            changed = [
+                lot for lot_id, lot in current.items()
+                if self.lots.get(lot_id, {}).get('version') != lot['version']
+            ]
+            changed += [
+                {'lot_id': lot_id, 'name': lot['name'], 'is_active': False, 'removed': True}
+                for lot_id, lot in self.lots.items() if lot_id not in current
+            ]
+            self.lots = current
+            if not changed:
+                return []
+            self.sequence += 1
+            message = _encode('availability', self.sequence, changed)
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            subscriber.push(message)
+        return changed
+
+    def snapshot_message(self):
+        with self.lock:
+            lots = [lot for lot in self.lots.values() if lot['is_active']]
+            return _encode('snapshot', self.sequence, sorted(lots, key=lambda lot: lot['lot_id']))
+
+    def run(self, poll_interval):
+        while True:
+            self.wake.wait(poll_interval)
+            self.wake.clear()
+            with self.lock:
+                idle = not self.subscribers
+            if idle:
+                continue
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception:
+                self.app.logger.exception('availability feed refresh failed')
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self.app.app_context():
+            lots = self._read_lots()
+        with self.lock:
+            if not self.subscribers:
+                # Nobody was watching, so the last state may be stale
+                self.lots = lots
+            self.subscribers.add(subscription)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, args=(self.app.config['AVAILABILITY_POLL_INTERVAL'],),
+                    name='availability-hub', daemon=True
+                )
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+
+class AvailabilityHub:
+    """Per-app availability change feed"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AVAILABILITY_POLL_INTERVAL', 2.0)
+        app.config.setdefault('AVAILABILITY_HEARTBEAT', 15.0)
+        app.config.setdefault('AVAILABILITY_STREAM_TOKEN_TTL', 60)
+        app.extensions['availability_hub'] = _Hub(app)
+
+    def _hub(self):
+        return current_app.extensions['availability_hub']
+
+    def subscribe(self):
+        return self._hub().subscribe()
+
+    def stream_token(self, identity):
+        """A short-lived token that only opens the stream, for ?jwt="""
+        return create_access_token(
+            identity=identity,
+            additional_claims={'scope': STREAM_TOKEN_SCOPE},
+            expires_delta=timedelta(seconds=current_app.config['AVAILABILITY_STREAM_TOKEN_TTL'])
+        )
+
+    @staticmethod
+    def is_stream_token(claims):
+        return claims.get('scope') == STREAM_TOKEN_SCOPE
+
+    def notify(self):
+        """Wake the feed after a committed spot or lot change"""
+        self._hub().wake.set()
+
+    def stream(self, subscription):
+        """SSE body: a snapshot, then deltas, with comment heartbeats"""
+        heartbeat = subscription.hub.app.config['AVAILABILITY_HEARTBEAT']
+        try:
+            yield 'retry: 3000\n\n' + subscription.hub.snapshot_message()
+            while True:
+                message = subscription.next_message(heartbeat)
+                yield message if message is not None else ': keep-alive\n\n'
+        finally:
+            subscription.close()
+
+
+availability_hub = AvailabilityHub()
@@ -0,0 +1,235 @@
+"""
+Analytics response cache
+Caches the JSON bodies of the analytics endpoints, keyed by endpoint,
+principal and query string, with a TTL. Invalidation is generational:
+every key embeds the current token of the namespaces it depends on
+('all', 'lots' for admin-wide figures, 'user:<id>' for a driver's own),
+and invalidate() swaps those tokens for fresh ones after the change is
+committed, so stale entries are simply never read again and age out.
+
+The backend is chosen by CACHE_URL: redis://... uses Redis (shared by
+every worker), anything else an in-process LRU for tests and single-node
+deployments.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+from app.utils.metrics import metrics
+
+
+class LRUBackend:
+    """In-process store bounded to `max_entries`, least recently used out first"""
+
+    # Private to this process: other workers never see its entries
+    shared = False
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None or (entry[1] is not None and entry[1] <= now):
+                    self.entries.pop(key, None)
+                    values.append(None)
+                    continue
+                self.entries.move_to_end(key)
+                values.append(entry[0])
+        return values
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        """Store `value` unless `key` is present; returns the stored value"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self.entries.move_to_end(key)
+                return entry[0]
+        self.set(key, value, ttl)
+        return value
+
+    def incr(self, key, ttl=None):
+        """Add one to a counter, starting it (with `ttl`) if absent; returns the count"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= now):
+                entry = (0, now + ttl if ttl else None)
+            count = int(entry[0]) + 1
+            self.entries[key] = (count, entry[1])
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return count
+
+
+class RedisBackend:
+    """Redis store; errors degrade to cache misses instead of failing requests"""
+
+    shared = True
+
+    def __init__(self, url):
+        import redis
+
+        self.errors = redis.RedisError
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _warn(self, error):
+        current_app.logger.warning('analytics cache unavailable: %s', error)
+
+    def get_many(self, keys):
+        try:
+            return self.client.mget(keys)
+        except self.errors as e:
+            self._warn(e)
+            return [None] * len(keys)
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.client.set(key, value, ex=ttl)
+        except self.errors as e:
+            self._warn(e)
+
+    def add(self, key, value, ttl=None):
+        try:
+            if self.client.set(key, value, ex=ttl, nx=True):
+                return value
+            return self.client.get(key) or value
+        except self.errors as e:
+            self._warn(e)
+            return value
+
+    def incr(self, key, ttl=None):
+        try:
+            pipe = self.client.pipeline()
+            # Start the counter with its expiry only if it does not exist yet
+            pipe.set(key, 0, ex=ttl, nx=True)
+            pipe.incr(key)
+            return pipe.execute()[1]
+        except self.errors as e:
+            self._warn(e)
+            return 0
+
+
+def cache_backend():
+    """The current app's cache backend, shared by everything cached per app"""
+    return current_app.extensions['analytics_cache']
+
+
+def cache_key(*parts):
+    return current_app.config['CACHE_KEY_PREFIX'] + ':'.join(str(part) for part in parts)
+
+
+class AnalyticsCache:
+    """Per-app analytics cache with generational invalidation"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_URL', 'memory://')
+        app.config.setdefault('CACHE_DEFAULT_TTL', 300)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('CACHE_KEY_PREFIX', 'parking:')
+
+        url = app.config['CACHE_URL']
+        if url.startswith(('redis://', 'rediss://', 'unix://')):
+            backend = RedisBackend(url)
+        else:
+            backend = LRUBackend(app.config['CACHE_MAX_ENTRIES'])
+        app.extensions['analytics_cache'] = backend
+
+    def generations(self, namespaces):
+        """Current token of each namespace, minting one where none exists"""
+        backend = cache_backend()
+        keys = [cache_key('gen', namespace) for namespace in namespaces]
+        tokens = backend.get_many(keys)
+        return [
+            token or backend.add(key, uuid.uuid4().hex[:12])
+            for key, token in zip(keys, tokens)
+        ]
+
+    def invalidate(self, user_id=None):
+        """Drop the lot-wide figures, and `user_id`'s own, after a committed change"""
+        namespaces = ['lots']
+        if user_id is not None:
+            namespaces.append(f'user:{user_id}')
+        self._bump(namespaces)
+
+    def invalidate_all(self):
+        self._bump(['all'])
+
+    def _bump(self, namespaces):
+        backend = cache_backend()
+        for namespace in namespaces:
+            backend.set(cache_key('gen', namespace), uuid.uuid4().hex[:12])
+
+    def cached(self, endpoint, authorize, shared=False, ttl=None):
+        """Cache a JSON view's 200 responses.
+
+        `authorize` is the blueprint's require_* helper and runs before any
+        lookup. Shared (admin) views are cached once for every principal
+        and depend on 'lots'; the others per user and on 'user:<id>'.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                principal, error_response, status_code = authorize()
+                if error_response:
+                    return error_response, status_code
+
+                owner = 'shared' if shared else principal.id
+                namespaces = ['all', 'lots' if shared else f'user:{principal.id}']
+                # Read before the view runs: a change committed meanwhile
+                # bumps past these tokens and the entry is never served
+                tokens = self.generations(namespaces)
+                query = urlencode(sorted(
+                    (name, value) for name, value in request.args.items(multi=True) if name != 'profile'
+                ))
+                key = cache_key(
+                    'view', endpoint, owner,
+                    hashlib.sha1(query.encode()).hexdigest()[:16], *tokens
+                )
+
+                backend = cache_backend()
+                # A profiled request runs the view, to show where its time goes
+                body = None if g.get('profile') else backend.get_many([key])[0]
+                metrics.cache_lookup('analytics', body is not None)
+                if body is not None:
+                    response = current_app.response_class(body, mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return response, 200
+
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, 200)
+                if status == 200:
+                    backend.set(key, response.get_data(as_text=True),
+                                ttl or current_app.config['CACHE_DEFAULT_TTL'])
+                    response.headers['X-Cache'] = 'MISS'
+                return response, status
+            return wrapper
+        return decorator
+
+
+analytics_cache = AnalyticsCache()
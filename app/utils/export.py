@@ -0,0 +1,120 @@
+"""
+Reservation export
+Streams filtered reservations as NDJSON or CSV. Rows come from one Core
+query over a dedicated connection with a server-side cursor
+(stream_results), fetched and encoded a chunk at a time, so memory stays
+flat however many rows match and the first chunk is sent as soon as the
+database produces it.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.models.user import User
+
+CHUNK_SIZE = 1000
+
+# Export columns, in output order
+COLUMNS = (
+    ('id', Reservation.id),
+    ('user_id', Reservation.user_id),
+    ('username', User.username),
+    ('lot_id', ParkingSpot.lot_id),
+    ('lot_name', ParkingLot.name),
+    ('spot_id', Reservation.spot_id),
+    ('spot_number', ParkingSpot.spot_number),
+    ('vehicle_number', Reservation.vehicle_number),
+    ('status', Reservation.status),
+    ('reservation_time', Reservation.reservation_time),
+    ('parking_start_time', Reservation.parking_start_time),
+    ('parking_end_time', Reservation.parking_end_time),
+    ('hourly_rate', Reservation.hourly_rate),
+    ('total_cost', Reservation.total_cost),
+    ('created_at', Reservation.created_at),
+)
+FIELD_NAMES = tuple(name for name, _ in COLUMNS)
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_timestamp(value):
+    """ISO timestamp from a query string, as naive UTC like the stored columns"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def export_statement(status=None, lot_id=None, user_id=None, date_from=None, date_to=None):
+    """SELECT of the export columns with the admin filters, in id order"""
+    statement = select(*(column for _, column in COLUMNS)).select_from(Reservation).join(
+        User, User.id == Reservation.user_id
+    ).join(
+        ParkingSpot, ParkingSpot.id == Reservation.spot_id
+    ).join(
+        ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+    )
+    if status:
+        statement = statement.where(Reservation.status == status)
+    if lot_id:
+        statement = statement.where(ParkingSpot.lot_id == lot_id)
+    if user_id:
+        statement = statement.where(Reservation.user_id == user_id)
+    if date_from:
+        statement = statement.where(Reservation.created_at >= date_from)
+    if date_to:
+        statement = statement.where(Reservation.created_at <= date_to)
+    return statement.order_by(Reservation.id)
+
+
+def stream_chunks(statement, chunk_size=CHUNK_SIZE):
+    """Lists of up to `chunk_size` row tuples, read through a server-side cursor"""
+    with db.engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(statement)
+        for partition in result.partitions():
+            yield partition
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# Only datetimes reach `default`, so plain values skip the conversion
+_json = json.JSONEncoder(default=datetime.isoformat)
+
+
+def ndjson_lines(chunks):
+    """One JSON object per row, one string per chunk"""
+    encode = _json.encode
+    for rows in chunks:
+        yield ''.join(encode(dict(zip(FIELD_NAMES, row))) + '\n' for row in rows)
+
+
+def csv_lines(chunks):
+    """Header first (sent before the query runs), then one string per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELD_NAMES)
+    yield buffer.getvalue()
+
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def encode(chunks, export_format):
+    return ndjson_lines(chunks) if export_format == 'ndjson' else csv_lines(chunks)
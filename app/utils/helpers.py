@@ -184,6 +184,12 @@ def get_session_status(reservation):
             'description': 'Reserved, waiting for occupancy',
             'color': 'yellow'
         }
+    elif reservation.status == 'expired':
+        return {
+            'status': 'expired',
+            'description': 'Hold expired before parking started',
+            'color': 'gray'
+        }
     else:
         return {
             'status': reservation.status,
@@ -0,0 +1,205 @@
+"""
+Expiry of abandoned spot holds
+A 'reserved' reservation holds its spot until the driver starts parking.
+Holds older than HOLD_TTL_MINUTES are expired: the reservation becomes
+'expired' and the spot goes back to the pool.
+
+The sweeper thread starts with the app's first request (HOLD_SWEEPER) and
+loads every hold already in the database, so holds left by a previous
+process expire without waiting for a new reservation. Deadlines are kept
+in a min-heap, so it sleeps until the earliest hold is due instead of
+polling. When it wakes it expires
+everything due in set-based batches: one UPDATE ... RETURNING over the
+partial index on reserved holds, one UPDATE for their spots and one
+counter update per lot. That also catches holds made by other processes.
+HOLD_SWEEP_INTERVAL caps the sleep as a safety net for those.
+"""
+
+import heapq
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.utils.availability import availability_hub
+from app.utils.cache import analytics_cache
+from app.utils.spot_allocator import spot_allocator
+
+
+def expire_holds(cutoff, limit):
+    """Expire up to `limit` holds made at or before `cutoff`; caller commits.
+
+    Returns the expired (id, user_id, spot_id) rows and the (lot_id, spot_id)
+    pairs of the spots that became free.
+    """
+    due = (
+        select(Reservation.id)
+        .where(Reservation.status == 'reserved', Reservation.reservation_time <= cutoff)
+        .order_by(Reservation.reservation_time)
+        .limit(limit)
+    )
+    now = datetime.utcnow()
+    # Conditional on status, so a hold that started parking meanwhile is left alone
+    expired = db.session.execute(
+        update(Reservation)
+        .where(Reservation.id.in_(due.scalar_subquery()), Reservation.status == 'reserved')
+        .values(status='expired', updated_at=now)
+        .returning(Reservation.id, Reservation.user_id, Reservation.spot_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not expired:
+        return [], []
+
+    freed = db.session.execute(
+        update(ParkingSpot)
+        .where(
+            ParkingSpot.id.in_([row.spot_id for row in expired]),
+            ParkingSpot.is_reserved.is_(True),
+            ParkingSpot.is_occupied.is_(False),
+        )
+        .values(is_reserved=False, updated_at=now)
+        .returning(ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.is_active)
+        .execution_options(synchronize_session=False)
+    ).all()
+    # Spots of deactivated slots were never counted as available
+    freed = [(spot.lot_id, spot.id) for spot in freed if spot.is_active]
+    for lot_id, count in Counter(lot_id for lot_id, _ in freed).items():
+        ParkingLot.adjust_spot_counts(lot_id, available=count)
+    return expired, freed
+
+
+class _Sweeper:
+    """Hold deadlines and the sweeper thread for one app"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.deadlines = []  # min-heap of (expires_at, reservation_id)
+        self.thread = None
+
+    def push(self, expires_at, reservation_id):
+        with self.lock:
+            earliest = self.deadlines[0][0] if self.deadlines else None
+            heapq.heappush(self.deadlines, (expires_at, reservation_id))
+        if earliest is None or expires_at < earliest:
+            self.wake.set()
+
+    def next_delay(self, now):
+        with self.lock:
+            if not self.deadlines:
+                return None
+            return (self.deadlines[0][0] - now).total_seconds()
+
+    def pop_due(self, now):
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                heapq.heappop(self.deadlines)
+
+    def load(self):
+        """Schedule every hold already in the database (sweeper start-up)"""
+        ttl = timedelta(minutes=self.app.config['HOLD_TTL_MINUTES'])
+        rows = db.session.execute(
+            select(Reservation.id, Reservation.reservation_time)
+            .where(Reservation.status == 'reserved')
+        ).all()
+        db.session.remove()
+        with self.lock:
+            # Keep holds scheduled while loading; duplicates are popped harmlessly
+            self.deadlines += [(row.reservation_time + ttl, row.id) for row in rows if row.reservation_time]
+            heapq.heapify(self.deadlines)
+
+    def run(self):
+        interval = self.app.config['HOLD_SWEEP_INTERVAL']
+        with self.app.app_context():
+            self.load()
+        while True:
+            delay = self.next_delay(datetime.utcnow())
+            self.wake.wait(interval if delay is None else max(0, min(delay, interval)))
+            self.wake.clear()
+            try:
+                with self.app.app_context():
+                    hold_expiry.sweep()
+            except Exception:
+                self.app.logger.exception('hold expiry sweep failed')
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name='hold-expiry', daemon=True)
+        self.thread.start()
+
+
+class HoldExpiry:
+    """Per-app expiry of stale 'reserved' holds"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HOLD_TTL_MINUTES', 120)
+        app.config.setdefault('HOLD_SWEEP_BATCH', 500)
+        app.config.setdefault('HOLD_SWEEP_INTERVAL', 300)
+        # Off for test apps and deployments that run `expire-holds` from cron
+        app.config.setdefault('HOLD_SWEEPER', True)
+        app.extensions['hold_expiry'] = _Sweeper(app)
+        app.before_request(self._start)
+
+    def _sweeper(self):
+        return current_app.extensions['hold_expiry']
+
+    def _start(self):
+        # In the serving process rather than at init_app, so the thread
+        # survives forking servers and sees the final config
+        sweeper = self._sweeper()
+        if sweeper.thread is None and current_app.config['HOLD_SWEEPER']:
+            sweeper.start()
+
+    def schedule(self, reservation_id, reserved_at):
+        """Track a committed hold so it is expired on time"""
+        sweeper = self._sweeper()
+        expires_at = reserved_at + timedelta(minutes=current_app.config['HOLD_TTL_MINUTES'])
+        sweeper.push(expires_at, reservation_id)
+
+    def sweep(self, now=None):
+        """Expire every hold due at `now`, batch by batch; returns how many"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(minutes=current_app.config['HOLD_TTL_MINUTES'])
+        batch_size = current_app.config['HOLD_SWEEP_BATCH']
+        self._sweeper().pop_due(now)
+
+        total = 0
+        while True:
+            try:
+                expired, freed = expire_holds(cutoff, batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if not expired:
+                break
+            total += len(expired)
+
+            by_lot = {}
+            for lot_id, spot_id in freed:
+                by_lot.setdefault(lot_id, []).append(spot_id)
+            for lot_id, spot_ids in by_lot.items():
+                spot_allocator.release_many(lot_id, spot_ids)
+            for user_id in {row.user_id for row in expired}:
+                analytics_cache.invalidate(user_id)
+            if len(expired) < batch_size:
+                break
+
+        if total:
+            availability_hub.notify()
+        return total
+
+
+hold_expiry = HoldExpiry()
@@ -0,0 +1,217 @@
+"""
+Background report jobs
+Long analytics reports run on a Celery queue instead of in a web worker.
+A report is a plain function registered with @report_jobs.report; routes
+submit it and answer 202 with the job, which clients poll until it has
+succeeded or failed. Submissions are deduplicated under the same
+generational keys as the analytics cache, so an identical request reuses
+the queued or finished job until the data it depends on changes.
+
+JOBS_BROKER_URL picks where jobs run: a real broker (redis://...) hands
+them to `python app.py run-job-worker` processes, while memory:// (the
+default) runs them on a small thread pool in the web process. JOBS_EAGER
+runs them inline at submission, for tests.
+
+Results go to JOBS_RESULT_BACKEND, by default the Redis of CACHE_URL if
+there is one, else the broker. With neither (memory:// for both), results
+and job records live in the submitting process only: that setup is for a
+single process, since a job polled through another worker stays pending
+or is not found. Job records are kept apart from the evictable cache
+entries (in Redis when CACHE_URL is Redis, else in a store of their own),
+so a running job is never forgotten by unrelated cache traffic.
+"""
+
+import hashlib
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import Celery, Task
+from flask import current_app, jsonify, url_for
+from app.utils.cache import LRUBackend, analytics_cache, cache_backend, cache_key
+
+# Celery task states as reported to clients
+STATES = {
+    'PENDING': 'pending',
+    'RECEIVED': 'pending',
+    'RETRY': 'pending',
+    'STARTED': 'running',
+    'SUCCESS': 'succeeded',
+    'FAILURE': 'failed',
+    'REVOKED': 'failed',
+}
+
+# name -> (function, shared); shared reports are admin-wide, the rest per user
+_reports = {}
+
+
+def _run_report(name, user_id, params):
+    function, shared = _reports[name]
+    return function(**params) if shared else function(user_id, **params)
+
+
+class _Queue:
+    """Celery app and, for the in-memory broker, the local pool for one app"""
+
+    def __init__(self, celery, local_workers, max_records):
+        self.celery = celery
+        self.task = celery.tasks['parking.run_report']
+        self.local_workers = local_workers
+        # Job records when the cache backend is per-process
+        self.records = LRUBackend(max_records)
+        self.executor = None
+        self.pending = 0  # jobs submitted to the local pool and not finished
+        self.lock = threading.Lock()
+
+    def run_locally(self, args, job_id):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.local_workers, thread_name_prefix='report-job')
+            self.pending += 1
+        # apply() runs the task here and stores the outcome in the result backend
+        future = self.executor.submit(self.task.apply, args, task_id=job_id)
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self.lock:
+            self.pending -= 1
+
+
+class ReportJobs:
+    """Per-app background report queue"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_BROKER_URL', 'memory://')
+        app.config.setdefault('JOBS_RESULT_BACKEND', None)
+        app.config.setdefault('JOBS_EAGER', False)
+        app.config.setdefault('JOBS_LOCAL_WORKERS', 2)
+        app.config.setdefault('JOBS_INLINE_MAX_DAYS', 90)
+        app.config.setdefault('JOBS_RESULT_TTL', 3600)
+        app.config.setdefault('JOBS_MAX_RECORDS', 10000)
+
+        broker = app.config['JOBS_BROKER_URL']
+        backend = app.config['JOBS_RESULT_BACKEND']
+        cache_url = app.config.get('CACHE_URL', 'memory://')
+        if backend is None and cache_url.startswith(('redis://', 'rediss://')):
+            backend = cache_url
+        elif backend is None:
+            # cache+memory:// is private to this process
+            backend = 'cache+memory://' if broker.startswith('memory://') else broker
+
+        class AppTask(Task):
+            def __call__(self, *args, **kwargs):
+                with app.app_context():
+                    return self.run(*args, **kwargs)
+
+        celery = Celery('parking', broker=broker, backend=backend, task_cls=AppTask)
+        celery.conf.update(
+            result_expires=app.config['JOBS_RESULT_TTL'],
+            task_track_started=True,
+            task_store_eager_result=True,
+            worker_hijack_root_logger=False,
+        )
+        celery.task(name='parking.run_report')(_run_report)
+        app.extensions['report_jobs'] = _Queue(
+            celery, app.config['JOBS_LOCAL_WORKERS'], app.config['JOBS_MAX_RECORDS']
+        )
+
+    def _queue(self):
+        return current_app.extensions['report_jobs']
+
+    def _records(self):
+        """Store of job records and submission slots"""
+        backend = cache_backend()
+        return backend if backend.shared else self._queue().records
+
+    def celery(self):
+        return self._queue().celery
+
+    def report(self, name, shared=False):
+        """Register a report function: f(days) if shared, else f(user_id, days)"""
+        def decorator(function):
+            _reports[name] = (function, shared)
+            return function
+        return decorator
+
+    def is_report(self, name, shared=False):
+        return name in _reports and _reports[name][1] == shared
+
+    def offloaded(self, days):
+        """Whether a `days` window is too long to compute inside the request"""
+        return days > current_app.config['JOBS_INLINE_MAX_DAYS']
+
+    def submit(self, name, user_id=None, **params):
+        """Queue report `name`, or reuse an identical live job; returns its status"""
+        shared = _reports[name][1]
+        owner = 'shared' if shared else str(user_id)
+        tokens = analytics_cache.generations(['all', 'lots' if shared else f'user:{user_id}'])
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        slot = cache_key('job-for', name, owner, digest, *tokens)
+
+        records = self._records()
+        ttl = current_app.config['JOBS_RESULT_TTL']
+        job_id = uuid.uuid4().hex
+        existing = records.add(slot, job_id, ttl)
+        if existing != job_id:
+            job = self.status(existing, owner)
+            if job is not None and job['status'] != 'failed':
+                return job
+            records.set(slot, job_id, ttl)
+
+        records.set(cache_key('job', job_id), json.dumps({'report': name, 'owner': owner}), ttl)
+        queue = self._queue()
+        args = (name, user_id, params)
+        if current_app.config['JOBS_EAGER']:
+            queue.task.apply(args, task_id=job_id)
+        elif current_app.config['JOBS_BROKER_URL'].startswith('memory://'):
+            queue.run_locally(args, job_id)
+        else:
+            queue.task.apply_async(args, task_id=job_id)
+        return self.status(job_id, owner)
+
+    def queue_depth(self):
+        """Jobs waiting or running in the local pool, or waiting on the broker"""
+        config = current_app.config
+        if config['JOBS_EAGER']:
+            return 0
+        queue = self._queue()
+        if config['JOBS_BROKER_URL'].startswith('memory://'):
+            return queue.pending
+        with queue.celery.connection_for_read() as connection:
+            return connection.default_channel.queue_declare(
+                queue=queue.celery.conf.task_default_queue, passive=True
+            ).message_count
+
+    def job(self, job_id, user_id=None):
+        """Status of a job owned by `user_id` (None for admin reports), or None"""
+        return self.status(job_id, 'shared' if user_id is None else str(user_id))
+
+    def status(self, job_id, owner):
+        meta = self._records().get_many([cache_key('job', job_id)])[0]
+        if meta is None:
+            return None
+        meta = json.loads(meta)
+        if meta['owner'] != owner:
+            return None
+
+        result = self.celery().AsyncResult(job_id)
+        job = {'job_id': job_id, 'report': meta['report'], 'status': STATES.get(result.state, 'pending')}
+        if job['status'] == 'succeeded':
+            job['result'] = result.result
+        elif job['status'] == 'failed':
+            job['error'] = str(result.result)
+        return job
+
+    def accepted(self, job, status_endpoint):
+        """202 response pointing at the job's status endpoint"""
+        response = jsonify({'job': job})
+        response.headers['Location'] = url_for(status_endpoint, job_id=job['job_id'])
+        return response, 202
+
+
+report_jobs = ReportJobs()
@@ -0,0 +1,96 @@
+"""
+Parking lot listing for drivers
+The listing (active lots with their free spots) only changes when a lot's
+version is bumped, so its ETag is derived from the (id, version) pairs of
+the active lots and the built body is cached per app under that ETag.
+Unchanged polls are answered from one small query on parking_lots.
+"""
+
+import hashlib
+import threading
+from flask import current_app
+from sqlalchemy import select
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.utils.metrics import metrics
+
+
+class _ListingState:
+    """Last built listing for one app"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.etag = None
+        self.body = None
+
+
+class LotListing:
+    """Builds the driver lot listing and caches it by ETag"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['lot_listing'] = _ListingState()
+
+    def _state(self):
+        return current_app.extensions['lot_listing']
+
+    def current_etag(self):
+        """Strong ETag of the listing as it is in the database right now"""
+        versions = db.session.execute(
+            select(ParkingLot.id, ParkingLot.version)
+            .where(ParkingLot.is_active == True)
+            .order_by(ParkingLot.id)
+        ).all()
+        digest = hashlib.sha1(
+            ';'.join(f'{lot_id}:{version}' for lot_id, version in versions).encode()
+        ).hexdigest()
+        return f'lots-{digest[:24]}'
+
+    def body(self, etag):
+        """Listing body for `etag`, built at most once per version change"""
+        state = self._state()
+        with state.lock:
+            hit = state.etag == etag
+            body = state.body
+        metrics.cache_lookup('lot_listing', hit)
+        if hit:
+            return body
+
+        # Built after the ETag was read, so it is never older than the ETag
+        body = self._build()
+        with state.lock:
+            state.etag, state.body = etag, body
+        return body
+
+    def _build(self):
+        lots = ParkingLot.query.filter_by(is_active=True).order_by(ParkingLot.id).all()
+
+        # Free spots of every active lot in one query
+        free_spots = {}
+        if lots:
+            spots = ParkingSpot.query.filter(
+                ParkingSpot.lot_id.in_([lot.id for lot in lots]),
+                ParkingSpot.is_active == True,
+                ParkingSpot.is_occupied == False,
+                ParkingSpot.is_reserved == False
+            ).order_by(ParkingSpot.id).all()
+            for spot in spots:
+                free_spots.setdefault(spot.lot_id, []).append(spot.to_dict())
+
+        lots_data = []
+        for lot in lots:
+            lot_dict = lot.to_dict()
+            lot_dict['available_spots_details'] = free_spots.get(lot.id, [])
+            lots_data.append(lot_dict)
+
+        return {
+            'parking_lots': lots_data,
+            'total_lots': len(lots_data)
+        }
+
+
+lot_listing = LotListing()
@@ -0,0 +1,221 @@
+"""
+Prometheus metrics
+Request latency histograms per route (the URL rule, so cardinality is
+bounded), method and status, requests in flight, database connection
+checkout wait, cache hits and misses, and the depth of the background
+queues, rendered in the Prometheus text format at /metrics.
+
+Recording is a bisect and a few integer adds under a lock per request,
+cheap enough to leave on. Queue gauges are read only when scraped.
+Values are per process: scrape every worker, or run a single worker per
+container. Streamed responses are timed up to their headers. Set
+METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+
+import bisect
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request
+from app.models import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, le=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Bucketed observations per label set"""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}  # label values -> per-bucket counts (last is +Inf), then the sum
+
+    def observe(self, values, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            series = self.series.get(values)
+            if series is None:
+                series = self.series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {values: list(counts) for values, counts in self.series.items()}
+        for values, counts in sorted(series.items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labels, values, upper)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, values)} {counts[-1]:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labels, values)} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Monotonic counts per label set"""
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def inc(self, values, amount=1):
+        with self.lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            series = dict(self.series)
+        for values, count in sorted(series.items()):
+            lines.append(f'{self.name}{_labels(self.labels, values)} {count}')
+        return lines
+
+
+class _Registry:
+    """Metrics of one app"""
+
+    def __init__(self):
+        self.requests = Histogram(
+            'parking_http_request_duration_seconds', 'Time to answer a request',
+            ('method', 'route', 'status'), LATENCY_BUCKETS
+        )
+        self.checkouts = Histogram(
+            'parking_db_pool_checkout_seconds', 'Wait for a database connection from the pool',
+            (), CHECKOUT_BUCKETS
+        )
+        self.cache = Counter('parking_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+
+def _time_checkouts(pool, histogram):
+    """Make `pool` (and the pools it is recreated as) time connect()"""
+    class TimedPool(type(pool)):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                histogram.observe((), time.perf_counter() - started)
+
+    TimedPool.__name__ = f'Timed{type(pool).__name__}'
+    pool.__class__ = TimedPool
+
+
+def _gauges(app):
+    """(name, help, value) of the gauges read at scrape time"""
+    registry = app.extensions['metrics']
+    gauges = [('parking_http_requests_in_flight', 'Requests being handled', registry.in_flight)]
+
+    pool = db.engine.pool
+    if hasattr(pool, 'checkedout'):
+        gauges.append(('parking_db_pool_checked_out', 'Database connections in use', pool.checkedout()))
+
+    if 'report_jobs' in app.extensions:
+        from app.utils.jobs import report_jobs
+        try:
+            gauges.append(('parking_report_jobs_queued', 'Report jobs waiting or running', report_jobs.queue_depth()))
+        except Exception:
+            # Broker unreachable: leave the gauge out rather than fail the scrape
+            app.logger.warning('report job queue depth unavailable', exc_info=True)
+    if 'hold_expiry' in app.extensions:
+        sweeper = app.extensions['hold_expiry']
+        with sweeper.lock:
+            gauges.append(('parking_hold_deadlines', 'Spot holds waiting to expire', len(sweeper.deadlines)))
+    if 'password_hasher' in app.extensions:
+        in_flight = app.extensions['password_hasher'].in_flight()
+        gauges.append(('parking_password_hashes_in_flight', 'Password hashes running or queued', in_flight))
+    if 'availability_hub' in app.extensions:
+        hub = app.extensions['availability_hub']
+        with hub.lock:
+            gauges.append(('parking_availability_subscribers', 'Open availability streams', len(hub.subscribers)))
+    return gauges
+
+
+class Metrics:
+    """Per-app request, database, cache and queue metrics"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_TOKEN', None)
+        registry = app.extensions['metrics'] = _Registry()
+        with app.app_context():
+            _time_checkouts(db.engine.pool, registry.checkouts)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def _registry(self):
+        return current_app.extensions['metrics']
+
+    def _start(self):
+        registry = self._registry()
+        with registry.lock:
+            registry.in_flight += 1
+        g.metrics_started = time.perf_counter()
+
+    def _observe(self, status):
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        elapsed = time.perf_counter() - g.metrics_started
+        self._registry().requests.observe((request.method, rule, str(status)), elapsed)
+        g.metrics_observed = True
+
+    def _finish(self, response):
+        if 'metrics_started' in g:
+            self._observe(response.status_code)
+        return response
+
+    def _teardown(self, error=None):
+        if 'metrics_started' not in g:
+            return
+        if not g.get('metrics_observed'):
+            # The request failed before after_request ran
+            self._observe(500)
+        registry = self._registry()
+        with registry.lock:
+            registry.in_flight -= 1
+
+    def cache_lookup(self, cache, hit):
+        """Count a hit or miss of one of the app's caches"""
+        if has_app_context() and 'metrics' in current_app.extensions:
+            self._registry().cache.inc((cache, 'hit' if hit else 'miss'))
+
+    def authorized(self):
+        token = current_app.config['METRICS_TOKEN']
+        return not token or request.headers.get('Authorization') == f'Bearer {token}'
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        registry = self._registry()
+        lines = []
+        for name, help, value in _gauges(current_app._get_current_object()):
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {value}']
+        for metric in (registry.requests, registry.checkouts, registry.cache):
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
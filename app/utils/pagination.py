@@ -0,0 +1,85 @@
+"""
+Pagination for newest-first reservation listings
+Listings page by keyset on (created_at, id): a cursor names the last row
+served and the next page starts strictly after it, so every page is one
+index range scan plus LIMIT, however deep. Cursor tokens are opaque
+(urlsafe base64 of the key). Counting every matching row is optional
+(?include_total=1).
+
+Requests without ?cursor= keep the page/OFFSET behaviour with its totals
+(a COUNT per page); both modes return a next_cursor so clients can switch
+over. The bundled frontend pages by cursor only.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from app.models.reservation import Reservation
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(created_at, id) from a cursor token; ValueError if it is not one of ours"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def _next_cursor(items, has_next):
+    if not items or not has_next:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def paginate_newest_first(query, args, default_per_page=20):
+    """(items, pagination) for a Reservation query, newest first.
+
+    `args` is request.args: ?cursor= (empty for the first page) selects
+    keyset mode, otherwise ?page= is used. Raises ValueError for a bad
+    cursor.
+    """
+    per_page = max(1, args.get('per_page', default_per_page, type=int))
+    ordered = query.order_by(Reservation.created_at.desc(), Reservation.id.desc())
+
+    if 'cursor' not in args:
+        page = args.get('page', 1, type=int)
+        paginated = ordered.paginate(page=page, per_page=per_page, error_out=False)
+        return paginated.items, {
+            'page': page,
+            'pages': paginated.pages,
+            'per_page': per_page,
+            'total': paginated.total,
+            'has_next': paginated.has_next,
+            'has_prev': paginated.has_prev,
+            'next_cursor': _next_cursor(paginated.items, paginated.has_next)
+        }
+
+    keyset = ordered
+    token = args.get('cursor')
+    if token:
+        created_at, row_id = decode_cursor(token)
+        keyset = keyset.filter(
+            tuple_(Reservation.created_at, Reservation.id) < tuple_(created_at, row_id)
+        )
+
+    # One extra row tells whether another page exists
+    rows = keyset.limit(per_page + 1).all()
+    items, has_next = rows[:per_page], len(rows) > per_page
+    pagination = {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': _next_cursor(items, has_next)
+    }
+    if args.get('include_total') in ('1', 'true'):
+        pagination['total'] = query.order_by(None).count()
+    return items, pagination
@@ -0,0 +1,18 @@
+"""
+Parking session lifecycle
+Everything that has to happen in the same transaction when a session
+ends lives here, so user release and admin force release stay in step.
+"""
+
+from app.models.revenue_rollup import RevenueRollup
+from app.models.user import User
+
+
+def complete_parking_session(reservation, spot):
+    """End the session, free the spot, record revenue and user spend; caller commits"""
+    if reservation:
+        reservation.end_parking()
+        RevenueRollup.record_session(reservation, spot.lot_id)
+        User.record_activity(reservation.user_id, spent=reservation.total_cost or 0.0,
+                             at=reservation.parking_end_time)
+    spot.release_spot()
@@ -0,0 +1,170 @@
+"""
+Password hashing off the request path
+Hashes are deliberately expensive, so they run on a small bounded thread
+pool (hashlib releases the GIL while hashing, so the pool really runs in
+parallel and other requests keep their CPU share). Admission control
+keeps at most PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE hashes in
+flight; beyond that, or when a result takes longer than
+PASSWORD_HASH_TIMEOUT, callers get HashingBusy and answer 503 instead of
+piling up.
+
+PASSWORD_HASH_METHOD is any Werkzeug method spec, e.g.
+'pbkdf2:sha256:600000' (the default) or 'scrypt:32768:8:1'. Stored
+hashes made with other parameters are upgraded on the user's next
+successful login.
+
+LoginLimiter counts failed logins per account and per client address in
+fixed windows and refuses further attempts before any hashing is done.
+The client address is request.remote_addr, so behind a reverse proxy set
+TRUSTED_PROXY_HOPS or every client shares the proxy's address and limit.
+Counters live in Redis when CACHE_URL is Redis, else in an in-process
+store of their own (LOGIN_LIMITER_MAX_ENTRIES), where each worker counts
+separately and the effective limits multiply by the number of workers.
+LOGIN_LIMITER_REQUIRE_SHARED makes that a start-up error instead.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.utils.cache import LRUBackend, cache_key
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; the client should retry shortly"""
+
+
+class _Pool:
+    """Hashing threads and admission slots for one app"""
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash')
+        self.capacity = workers + queue
+        self.lock = threading.Lock()
+        self.running = 0
+        self.prefixes = {}  # method spec -> prefix of the hashes it produces
+
+    def admit(self):
+        """Take a slot if one is free; False when the pool is saturated"""
+        with self.lock:
+            if self.running >= self.capacity:
+                return False
+            self.running += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.running -= 1
+
+    def in_flight(self):
+        """Hashes running or waiting for a worker"""
+        return self.running
+
+
+class PasswordHasher:
+    """Per-app password hashing pool"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Werkzeug's own default, so existing hashes are left alone until it is tuned
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', 16)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        app.extensions['password_hasher'] = _Pool(
+            app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_QUEUE']
+        )
+
+    def _pool(self):
+        return current_app.extensions['password_hasher']
+
+    def _run(self, function, *args):
+        pool = self._pool()
+        if not pool.admit():
+            raise HashingBusy()
+        future = pool.executor.submit(function, *args)
+        future.add_done_callback(lambda _: pool.release())
+        try:
+            return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+        except TimeoutError as e:
+            raise HashingBusy() from e
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other parameters than configured"""
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        prefixes = self._pool().prefixes
+        if method not in prefixes:
+            # 'scrypt' is stored as 'scrypt:32768:8:1': let Werkzeug expand it once
+            prefixes[method] = self._run(generate_password_hash, '', method, 1).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != prefixes[method]
+
+
+class LoginLimiter:
+    """Failed-login counters per account and per client address"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_ATTEMPT_WINDOW', 900)
+        app.config.setdefault('LOGIN_MAX_FAILURES_PER_ACCOUNT', 5)
+        app.config.setdefault('LOGIN_MAX_FAILURES_PER_ADDRESS', 50)
+        app.config.setdefault('LOGIN_LIMITER_MAX_ENTRIES', 100000)
+        app.config.setdefault('LOGIN_LIMITER_REQUIRE_SHARED', False)
+
+        # Counters are never evicted by other cache traffic
+        backend = app.extensions['analytics_cache']
+        if not backend.shared:
+            if app.config['LOGIN_LIMITER_REQUIRE_SHARED']:
+                raise RuntimeError('LOGIN_LIMITER_REQUIRE_SHARED needs CACHE_URL to point at Redis')
+            backend = LRUBackend(app.config['LOGIN_LIMITER_MAX_ENTRIES'])
+        app.extensions['login_limiter'] = backend
+
+    def _store(self):
+        return current_app.extensions['login_limiter']
+
+    def _keys(self, email, address):
+        window = current_app.config['LOGIN_ATTEMPT_WINDOW']
+        bucket = int(time.time() // window)
+        account = hashlib.sha1(email.strip().lower().encode()).hexdigest()[:16]
+        return (
+            cache_key('login-failures', 'account', account, bucket),
+            cache_key('login-failures', 'address', address or 'unknown', bucket),
+        )
+
+    def retry_after(self, email, address):
+        """Seconds until another attempt is allowed, or 0 if it is allowed now"""
+        config = current_app.config
+        counts = self._store().get_many(self._keys(email, address))
+        limits = (config['LOGIN_MAX_FAILURES_PER_ACCOUNT'], config['LOGIN_MAX_FAILURES_PER_ADDRESS'])
+        if all(int(count or 0) < limit for count, limit in zip(counts, limits)):
+            return 0
+        window = config['LOGIN_ATTEMPT_WINDOW']
+        return int(window - time.time() % window) + 1
+
+    def record_failure(self, email, address):
+        store = self._store()
+        for key in self._keys(email, address):
+            store.incr(key, current_app.config['LOGIN_ATTEMPT_WINDOW'])
+
+    def reset(self, email, address):
+        """Clear the account's failures after a successful login"""
+        account_key, _ = self._keys(email, address)
+        self._store().set(account_key, 0, current_app.config['LOGIN_ATTEMPT_WINDOW'])
+
+
+password_hasher = PasswordHasher()
+login_limiter = LoginLimiter()
@@ -0,0 +1,98 @@
+"""
+Principal resolution for authenticated requests
+require_user / require_admin only need a user's id, is_active and
+is_admin, so those are cached in the app's cache backend for a short TTL
+instead of loading the users row on every request. toggle_user_status
+rewrites the entry right after its commit; the TTL only bounds changes
+made outside the API (e.g. directly in the database).
+
+The cache must be shared by every worker for that rewrite to reach them
+all, so it is used only when CACHE_URL is Redis. With the in-process
+backend, principals are loaded from the users table on every request
+unless PRINCIPAL_CACHE_LOCAL is set, which is only safe when a single
+process serves the app.
+"""
+
+import json
+
+from flask import current_app
+from app.models import db
+from app.models.user import User
+from app.utils.cache import cache_backend, cache_key
+from app.utils.metrics import metrics
+
+
+class Principal:
+    """The authorization facts of a user"""
+
+    __slots__ = ('id', 'is_active', 'is_admin')
+
+    def __init__(self, id, is_active, is_admin):
+        self.id = id
+        self.is_active = is_active
+        self.is_admin = is_admin
+
+    @classmethod
+    def of(cls, user):
+        return cls(user.id, bool(user.is_active), bool(user.is_admin))
+
+
+def _encode(principal):
+    return json.dumps([principal.id, principal.is_active, principal.is_admin])
+
+
+class PrincipalCache:
+    """Resolves JWT identities to Principals through the cache backend"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PRINCIPAL_CACHE_TTL', 60)
+        # Cache principals in the per-process backend (single-process deployments only)
+        app.config.setdefault('PRINCIPAL_CACHE_LOCAL', False)
+
+    def enabled(self):
+        """Whether a change written by remember() reaches every worker"""
+        return cache_backend().shared or current_app.config['PRINCIPAL_CACHE_LOCAL']
+
+    def load(self, identity):
+        """Principal for a JWT identity, or None if the user does not exist.
+
+        On a miss the freshly loaded User is returned (it has the same
+        attributes), so the request can use it without reloading the row.
+        """
+        user_id = int(identity)
+        if not self.enabled():
+            return db.session.get(User, user_id)
+
+        backend = cache_backend()
+        key = cache_key('principal', user_id)
+        cached = backend.get_many([key])[0]
+        metrics.cache_lookup('principal', cached is not None)
+        if cached is not None:
+            return Principal(*json.loads(cached))
+
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+        # add(), not set(): the row may predate a change remember() has
+        # stored meanwhile, and the fresher entry must win
+        value = _encode(Principal.of(user))
+        stored = backend.add(key, value, current_app.config['PRINCIPAL_CACHE_TTL'])
+        return user if stored == value else Principal(*json.loads(stored))
+
+    def remember(self, user):
+        """Store `user`'s current flags; call after committing a change to them"""
+        principal = Principal.of(user)
+        if self.enabled():
+            cache_backend().set(
+                cache_key('principal', principal.id),
+                _encode(principal),
+                current_app.config['PRINCIPAL_CACHE_TTL']
+            )
+        return principal
+
+
+principal_cache = PrincipalCache()
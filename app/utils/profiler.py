@@ -0,0 +1,228 @@
+"""
+On-demand request profiling
+A request runs under cProfile when an admin asks for it (?profile=1 or an
+X-Profile: 1 header) or when it is picked by PROFILER_SAMPLE_RATE (0 by
+default; e.g. 0.001 profiles one request in a thousand). The report has
+the top functions by own and by cumulative time, SQL count and time
+(from query_stats), and serialization time: to_dict() calls plus JSON
+encoding. cProfile slows the profiled request down, so compare reports
+with each other, not with unprofiled timings.
+
+Reports are kept for PROFILER_TTL seconds in Redis when CACHE_URL is
+Redis, else in an in-process store of their own (PROFILER_MAX_ENTRIES),
+apart from the evictable analytics cache. Paths are stored without their
+query string, which may carry tokens.
+For each endpoint the PROFILER_KEEP_PER_ENDPOINT slowest profiled requests
+of the last PROFILER_TTL seconds are listed in GET /api/admin/profiles.
+Admin-requested profiles answer with an X-Profile-Id header naming the
+report at GET /api/admin/profiles/<id>.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.utils.cache import LRUBackend, cache_backend, cache_key
+from app.utils.principals import principal_cache
+from app.utils.query_stats import query_stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Profile:
+    """The profiler and timers of one profiled request"""
+
+    __slots__ = ('profiler', 'trigger', 'started', 'json_seconds')
+
+    def __init__(self, trigger):
+        self.profiler = cProfile.Profile()
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.json_seconds = 0.0
+
+
+def _current():
+    return g.get('profile') if has_request_context() else None
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing dumps() inside profiled requests"""
+
+    def dumps(self, obj, **kwargs):
+        profile = _current()
+        if profile is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile.json_seconds += time.perf_counter() - started
+
+
+def _location(func):
+    filename, line, name = func
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    return name, f'{filename}:{line}' if line else filename
+
+
+def summarize_stats(stats, limit):
+    """Top functions by own and by cumulative time, and time inside to_dict()"""
+    rows = []
+    to_dict_seconds = 0.0
+    for func, (_, calls, own, cumulative, callers) in stats.stats.items():
+        name, location = _location(func)
+        rows.append({
+            'function': name,
+            'location': location,
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+        if name == 'to_dict':
+            # Only calls from outside to_dict(), so nested models count once
+            to_dict_seconds += sum(
+                caller_stats[3] for caller, caller_stats in callers.items() if caller[2] != 'to_dict'
+            )
+    return {
+        'by_own_time': sorted(rows, key=lambda row: row['own_ms'], reverse=True)[:limit],
+        'by_cumulative_time': sorted(rows, key=lambda row: row['cumulative_ms'], reverse=True)[:limit],
+        'to_dict_seconds': to_dict_seconds,
+    }
+
+
+class RequestProfiler:
+    """Per-app request profiling hooks and report store"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILER_TOP_FUNCTIONS', 25)
+        app.config.setdefault('PROFILER_KEEP_PER_ENDPOINT', 10)
+        app.config.setdefault('PROFILER_TTL', 86400)
+        app.config.setdefault('PROFILER_MAX_ENTRIES', 1000)
+        # Reports when the cache backend is per-process
+        app.extensions['request_profiler'] = LRUBackend(app.config['PROFILER_MAX_ENTRIES'])
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    def _backend(self):
+        """Store of profile reports"""
+        backend = cache_backend()
+        return backend if backend.shared else current_app.extensions['request_profiler']
+
+    def _trigger(self):
+        if request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1':
+            try:
+                verify_jwt_in_request(optional=True)
+                identity = get_jwt_identity()
+            except Exception:
+                # Bad or expired token: the view itself will answer for it
+                identity = None
+            principal = principal_cache.load(identity) if identity is not None else None
+            if principal and principal.is_admin:
+                return 'admin'
+        rate = current_app.config['PROFILER_SAMPLE_RATE']
+        if rate and random.random() < rate:
+            return 'sample'
+        return None
+
+    def _start(self):
+        if request.endpoint is None or request.blueprint is None:
+            return
+        trigger = self._trigger()
+        if trigger:
+            g.profile = _Profile(trigger)
+            g.profile.profiler.enable()
+
+    def _finish(self, response):
+        profile = _current()
+        if profile is None:
+            return response
+        profile.profiler.disable()
+        g.profile = None
+        report = self._report(profile, response)
+        self._store(report)
+        if profile.trigger == 'admin':
+            response.headers['X-Profile-Id'] = report['id']
+        return response
+
+    def _abandon(self, error=None):
+        profile = _current()
+        if profile is not None:
+            profile.profiler.disable()
+            g.profile = None
+
+    def _report(self, profile, response):
+        total = time.perf_counter() - profile.started
+        summary = summarize_stats(pstats.Stats(profile.profiler), current_app.config['PROFILER_TOP_FUNCTIONS'])
+        queries = query_stats.current()
+        serialization = summary['to_dict_seconds'] + profile.json_seconds
+        return {
+            'id': uuid.uuid4().hex,
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'trigger': profile.trigger,
+            'profiled_at': datetime.utcnow().isoformat(),
+            'total_ms': round(total * 1000, 3),
+            'sql_count': queries.count if queries else None,
+            'sql_ms': round(queries.db_seconds * 1000, 3) if queries else None,
+            'serialization_ms': round(serialization * 1000, 3),
+            'json_encode_ms': round(profile.json_seconds * 1000, 3),
+            'top_functions': summary['by_own_time'],
+            'top_cumulative': summary['by_cumulative_time'],
+        }
+
+    def _store(self, report):
+        config = current_app.config
+        ttl = config['PROFILER_TTL']
+        backend = self._backend()
+        backend.set(cache_key('profile', report['id']), json.dumps(report), ttl)
+
+        # Slowest recent requests per endpoint; lost updates between
+        # workers only drop a candidate, which is fine for diagnostics
+        index_key, slowest_key = cache_key('profiles'), cache_key('profiles', report['endpoint'])
+        endpoints, slowest = backend.get_many([index_key, slowest_key])
+        cutoff = time.time() - ttl
+        entry = {key: report[key] for key in ('id', 'method', 'path', 'status', 'trigger', 'profiled_at',
+                                              'total_ms', 'sql_count', 'sql_ms', 'serialization_ms')}
+        entry['at'] = time.time()
+        slowest = [item for item in json.loads(slowest or '[]') if item['at'] > cutoff] + [entry]
+        slowest.sort(key=lambda item: item['total_ms'], reverse=True)
+        backend.set(slowest_key, json.dumps(slowest[:config['PROFILER_KEEP_PER_ENDPOINT']]), ttl)
+        endpoints = set(json.loads(endpoints or '[]')) | {report['endpoint']}
+        backend.set(index_key, json.dumps(sorted(endpoints)), ttl)
+
+    def report(self, profile_id):
+        """A stored profile report, or None"""
+        stored = self._backend().get_many([cache_key('profile', profile_id)])[0]
+        return json.loads(stored) if stored else None
+
+    def slowest(self):
+        """{endpoint: [report summaries, slowest first]} of the last PROFILER_TTL seconds"""
+        backend = self._backend()
+        endpoints = json.loads(backend.get_many([cache_key('profiles')])[0] or '[]')
+        stored = backend.get_many([cache_key('profiles', endpoint) for endpoint in endpoints])
+        cutoff = time.time() - current_app.config['PROFILER_TTL']
+        return {
+            endpoint: [item for item in json.loads(entries) if item['at'] > cutoff]
+            for endpoint, entries in zip(endpoints, stored) if entries
+        }
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,111 @@
+"""
+Bulk spot provisioning for parking lots
+Spots are written with set-based statements (one executemany INSERT, one
+UPDATE per resize) instead of one ORM object per spot, so large lots are
+created and resized in a single short transaction.
+"""
+
+from datetime import datetime
+from sqlalchemy import func, insert, select, update
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+
+
+def spot_number(lot, number):
+    """Spot label used across the app, e.g. D001 for Downtown Mall"""
+    return f"{lot.name[0].upper()}{number:03d}"
+
+
+def provision_spots(lot, count):
+    """Insert `count` new active spots after the lot's existing ones.
+
+    The lot must be flushed (have an id). Counters are updated in the same
+    transaction; the caller commits. Returns the new spot numbers.
+    """
+    if count <= 0:
+        return []
+
+    existing = db.session.execute(
+        select(func.count(ParkingSpot.id)).where(ParkingSpot.lot_id == lot.id)
+    ).scalar()
+
+    now = datetime.utcnow()
+    numbers = [spot_number(lot, existing + i) for i in range(1, count + 1)]
+    db.session.execute(
+        insert(ParkingSpot.__table__),
+        [
+            {
+                'lot_id': lot.id,
+                'spot_number': number,
+                'is_occupied': False,
+                'is_active': True,
+                'is_reserved': False,
+                'created_at': now,
+                'updated_at': now
+            }
+            for number in numbers
+        ]
+    )
+
+    ParkingLot.adjust_spot_counts(lot.id, available=count, active=count)
+    return numbers
+
+
+def resize_lot(lot, new_total):
+    """Grow or shrink a lot to `new_total` active spots.
+
+    Growing reactivates previously removed spots first and inserts the rest
+    in bulk. Shrinking deactivates free spots (highest numbers first) in one
+    UPDATE and raises ValueError if too many spots are occupied or held.
+    The caller commits.
+    """
+    if new_total < 0:
+        raise ValueError('total_spots cannot be negative')
+
+    active = db.session.execute(
+        select(func.count(ParkingSpot.id)).where(
+            ParkingSpot.lot_id == lot.id,
+            ParkingSpot.is_active == True
+        )
+    ).scalar()
+
+    if new_total > active:
+        needed = new_total - active
+        reactivated = _set_active(lot, needed, activate=True)
+        provision_spots(lot, needed - reactivated)
+    elif new_total < active:
+        surplus = active - new_total
+        removed = _set_active(lot, surplus, activate=False)
+        if removed < surplus:
+            raise ValueError(
+                f'Cannot reduce to {new_total} spots, only {removed} of the '
+                f'{surplus} spots to remove are free'
+            )
+
+    lot.total_spots = new_total
+    lot.updated_at = datetime.utcnow()
+
+
+def _set_active(lot, limit, activate):
+    """Flip is_active on up to `limit` free spots with one UPDATE"""
+    free = [
+        ParkingSpot.lot_id == lot.id,
+        ParkingSpot.is_active == (not activate),
+        ParkingSpot.is_occupied == False,
+        ParkingSpot.is_reserved == False
+    ]
+    order = ParkingSpot.id.asc() if activate else ParkingSpot.id.desc()
+    candidates = select(ParkingSpot.id).where(*free).order_by(order).limit(limit)
+
+    result = db.session.execute(
+        update(ParkingSpot)
+        .where(ParkingSpot.id.in_(candidates), *free)
+        .values(is_active=activate, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+    changed = result.rowcount
+    delta = changed if activate else -changed
+    ParkingLot.adjust_spot_counts(lot.id, available=delta, active=delta)
+    return changed
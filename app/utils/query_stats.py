@@ -0,0 +1,102 @@
+"""
+Per-request SQL statement counts and database time
+Engine event hooks count every statement a request issues and add up the
+time spent executing them. Responses carry the totals in X-Query-Count
+and Server-Timing headers (database time and total app time, which the
+browser's network panel shows). The headers go to admins and to everyone
+in debug mode. QUERY_STATS_HEADERS = 'always' or 'never' overrides that.
+
+Statements that run while a streamed body is being produced (the
+reservation export) come after the headers are sent, so they are not
+included.
+"""
+
+import time
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.principals import principal_cache
+
+
+class RequestQueries:
+    """SQL statement count and time of one request"""
+
+    __slots__ = ('count', 'db_seconds', 'started')
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.started = time.perf_counter()
+
+
+def _current():
+    return g.get('query_stats') if has_request_context() else None
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    if stats is not None:
+        stats.count += 1
+        context._query_stats_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    started = getattr(context, '_query_stats_started', None)
+    if stats is not None and started is not None:
+        stats.db_seconds += time.perf_counter() - started
+
+
+class QueryStats:
+    """Counts each request's SQL statements and reports them in headers"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # 'admin': admins and debug mode; 'always'; 'never'
+        app.config.setdefault('QUERY_STATS_HEADERS', 'admin')
+        # On the Engine class, so every engine the app creates is covered
+        if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def current(self):
+        """RequestQueries of the request being handled, or None"""
+        return _current()
+
+    def _start(self):
+        g.query_stats = RequestQueries()
+
+    def _finish(self, response):
+        stats = _current()
+        if stats is not None and self._wants_headers():
+            total_ms = (time.perf_counter() - stats.started) * 1000
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries", '
+                f'app;dur={total_ms:.2f}'
+            )
+        return response
+
+    def _wants_headers(self):
+        mode = current_app.config['QUERY_STATS_HEADERS']
+        if mode == 'always' or (mode == 'admin' and current_app.debug):
+            return True
+        if mode != 'admin':
+            return False
+        try:
+            identity = get_jwt_identity()
+        except RuntimeError:
+            # The route did not verify a JWT
+            return False
+        principal = principal_cache.load(identity) if identity is not None else None
+        return bool(principal and principal.is_admin)
+
+
+query_stats = QueryStats()
@@ -0,0 +1,113 @@
+"""
+Schema upgrades for existing databases
+db.create_all() only creates missing tables, so columns and indexes added
+to existing models are applied here. Every step checks the live schema
+first, so the upgrade can be run any number of times.
+"""
+
+from sqlalchemy import inspect, text
+from app.models import db
+
+
+# (table, column, column DDL) added after the first release
+ADDED_COLUMNS = [
+    ('parking_spots', 'is_reserved', 'BOOLEAN NOT NULL DEFAULT FALSE'),
+    ('parking_lots', 'available_spot_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('parking_lots', 'occupied_spot_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('parking_lots', 'active_spot_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('parking_lots', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('users', 'total_spent', 'FLOAT NOT NULL DEFAULT 0'),
+    ('users', 'last_activity_at', 'TIMESTAMP'),
+]
+
+# (table, index) superseded by a wider model index
+DROPPED_INDEXES = [
+    ('reservations', 'ix_reservations_status_end'),
+    ('reservations', 'ix_reservations_created'),
+    ('reservations', 'ix_reservations_user_created'),
+]
+
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+
+    applied = []
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        existing = {col['name'] for col in inspector.get_columns(table)}
+        if column not in existing:
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+            applied.append(f'{table}.{column}')
+
+    # Counters added to an existing database start at zero, fill them in
+    if any(name.startswith('parking_lots.') and name.endswith('_count') for name in applied):
+        from app.models.parking_lot import ParkingLot
+        ParkingLot.reconcile_spot_counts()
+
+    # Same for the per-user totals
+    if any(name.startswith('users.') for name in applied):
+        from app.models.user import User
+        User.reconcile_activity()
+
+    # Rollup table created on an existing database, fill it from history
+    applied.extend(_backfill_revenue_rollups())
+
+    db.session.commit()
+
+    applied.extend(create_missing_indexes())
+    applied.extend(drop_obsolete_indexes())
+    return applied
+
+
+def create_missing_indexes():
+    """Create model indexes (composite and partial) missing from the database"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+
+    return created
+
+
+def drop_obsolete_indexes():
+    """Drop indexes listed in DROPPED_INDEXES that still exist"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+
+    dropped = []
+    for table, name in DROPPED_INDEXES:
+        if table not in tables:
+            continue
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            db.session.execute(text(f'DROP INDEX {name}'))
+            dropped.append(f'-{name}')
+
+    db.session.commit()
+    return dropped
+
+
+def _backfill_revenue_rollups():
+    """Build the rollup once when it is empty but completed sessions exist"""
+    from app.models.revenue_rollup import RevenueRollup
+    from app.models.reservation import Reservation
+
+    if not inspect(db.engine).has_table(RevenueRollup.__tablename__):
+        return []
+    if db.session.query(RevenueRollup.id).first() is not None:
+        return []
+    if db.session.query(Reservation.id).filter_by(status='completed').first() is None:
+        return []
+
+    RevenueRollup.rebuild()
+    return ['revenue_rollups (backfilled)']
@@ -0,0 +1,131 @@
+"""
+Spot allocation for reservations
+Keeps a per-lot pool of free spot ids in memory and claims spots with a
+compare-and-set UPDATE, so a spot is handed out at most once even when
+several workers reserve in the same lot at the same time.
+"""
+
+import heapq
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+
+
+class _AllocatorState:
+    """Free-spot pools for one app, keyed by lot id"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heaps = {}      # lot_id -> min-heap of free spot ids
+        self.members = {}    # lot_id -> set of ids currently in the heap
+
+    def pop(self, lot_id):
+        with self.lock:
+            heap = self.heaps.get(lot_id)
+            if not heap:
+                return None
+            spot_id = heapq.heappop(heap)
+            self.members[lot_id].discard(spot_id)
+            return spot_id
+
+    def push(self, lot_id, spot_ids, create=False):
+        with self.lock:
+            heap = self.heaps.get(lot_id)
+            if heap is None:
+                if not create:
+                    # Pool not loaded yet, the next refill will find the spot
+                    return
+                heap = self.heaps[lot_id] = []
+                self.members[lot_id] = set()
+            members = self.members[lot_id]
+            for spot_id in spot_ids:
+                if spot_id not in members:
+                    members.add(spot_id)
+                    heapq.heappush(heap, spot_id)
+
+    def drop(self, lot_id):
+        with self.lock:
+            self.heaps.pop(lot_id, None)
+            self.members.pop(lot_id, None)
+
+
+class SpotAllocator:
+    """Hands out free spots: O(log n) pool pop plus one conditional UPDATE.
+
+    The in-memory pool is only a hint. The database compare-and-set is what
+    guarantees a spot is held by one reservation, so pools in different
+    processes (or stale entries after a lot edit) can never double-book.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['spot_allocator'] = _AllocatorState()
+
+    def _state(self):
+        return current_app.extensions['spot_allocator']
+
+    def allocate(self, lot_id):
+        """Hold a free spot in the lot for the current transaction.
+
+        Returns the held ParkingSpot, or None when the lot is full. The hold
+        is written in db.session and becomes visible on commit; call
+        release() if the transaction is rolled back.
+        """
+        state = self._state()
+        refilled = False
+
+        while True:
+            spot_id = state.pop(lot_id)
+
+            if spot_id is None:
+                if refilled:
+                    return None
+                self._refill(state, lot_id)
+                refilled = True
+                continue
+
+            if self._claim(lot_id, spot_id):
+                return db.session.get(ParkingSpot, spot_id, populate_existing=True)
+            # Lost the race or the spot changed underneath us, try the next one
+
+    def release(self, lot_id, spot_id):
+        """Return a spot to the pool once it is free again"""
+        self._state().push(lot_id, [spot_id])
+    
+    def release_many(self, lot_id, spot_ids):
+        """Return several freed spots of one lot to the pool"""
+        self._state().push(lot_id, spot_ids)
+
+    def forget(self, lot_id):
+        """Drop a lot's pool so it is reloaded on the next reservation"""
+        self._state().drop(lot_id)
+
+    def _claim(self, lot_id, spot_id):
+        result = db.session.execute(
+            update(ParkingSpot)
+            .filter_by(id=spot_id, lot_id=lot_id, is_active=True, is_occupied=False, is_reserved=False)
+            .values(is_reserved=True, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+        ParkingLot.adjust_spot_counts(lot_id, available=-1)
+        return True
+
+    def _refill(self, state, lot_id):
+        spot_ids = db.session.execute(
+            select(ParkingSpot.id).filter_by(
+                lot_id=lot_id, is_active=True, is_occupied=False, is_reserved=False
+            )
+        ).scalars().all()
+        state.push(lot_id, spot_ids, create=True)
+
+
+spot_allocator = SpotAllocator()
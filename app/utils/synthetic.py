@@ -0,0 +1,306 @@
+"""
+Synthetic production-scale datasets
+Builds users, lots, spots and months of reservation history for profiling
+on a laptop. The same seed always produces the same rows.
+
+Arrivals follow a daily commuter curve, a weekday/weekend mix and slow
+growth over the window. Durations are log-normal around a per-lot median
+(commuter, shopping and long-stay lots). Each arrival takes the lot spot
+that has been free the longest, so spots are not double-booked while the
+lot has room. Sessions still running now become 'active', and recent
+arrivals that have not started parking are 'reserved' holds. A share of
+the history is holds that expired.
+
+Everything is generated with numpy. Reservations go to the driver in
+executemany batches with their indexes dropped, and the indexes are built
+once at the end. Counters and revenue rollups that the app keeps
+incrementally are derived from the same arrays and written in bulk too.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, func, insert, select, update
+from werkzeug.security import generate_password_hash
+
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.models.revenue_rollup import DURATION_BRACKETS, RevenueRollup
+from app.models.user import User
+from app.utils.provisioning import provision_spots
+
+# Relative arrivals per hour of day: morning and evening commuter peaks
+HOURLY_ARRIVALS = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.5, 1.5, 3.5, 5.0, 4.0, 3.0, 3.0,
+    3.5, 3.0, 2.5, 2.5, 3.0, 4.0, 4.5, 3.5, 2.5, 1.5, 0.8, 0.4,
+])
+# Monday .. Sunday
+WEEKDAY_ARRIVALS = np.array([1.0, 1.0, 1.0, 1.0, 1.05, 0.8, 0.6])
+# Lot profiles: (name prefix, median stay in hours, price per hour)
+LOT_PROFILES = (
+    ('Metro Station', 9.0, 20.0),
+    ('Downtown Mall', 2.0, 50.0),
+    ('IT Park', 8.5, 30.0),
+    ('Commercial Street', 1.5, 40.0),
+    ('Airport Parking', 30.0, 100.0),
+)
+EXPIRED_SHARE = 0.04
+# Arrivals this recent that have not started parking are still held
+HOLD_MINUTES = 20
+DEMO_PASSWORD = 'password123'
+CHUNK_SIZE = 50000
+RESERVATION_COLUMNS = (
+    'user_id', 'spot_id', 'vehicle_number', 'status', 'reservation_time', 'parking_start_time',
+    'parking_end_time', 'hourly_rate', 'total_cost', 'created_at', 'updated_at',
+)
+
+
+def _arrivals(rng, count, start, now):
+    """`count` sorted arrival times (seconds after `start`) shaped by the curves"""
+    days = max(1, (now - start).days)
+    first_weekday = start.weekday()
+    day_weights = WEEKDAY_ARRIVALS[(np.arange(days + 1) + first_weekday) % 7]
+    day_weights = day_weights * np.linspace(0.7, 1.0, days + 1)  # slow growth
+    day = rng.choice(days + 1, size=count, p=day_weights / day_weights.sum())
+    hour = rng.choice(24, size=count, p=HOURLY_ARRIVALS / HOURLY_ARRIVALS.sum())
+    seconds = day * 86400 + hour * 3600 + rng.integers(0, 3600, size=count)
+
+    horizon = (now - start).total_seconds()
+    # Today's arrivals after `now` happened yesterday instead
+    seconds = np.where(seconds >= horizon, seconds - 86400, seconds)
+    return np.sort(np.maximum(seconds, 0))
+
+
+def _assign_spots(arrivals, ends, lot_choice, lot_spots):
+    """Spot per session, the lot spot free the longest; sessions sorted by arrival.
+
+    Returns the spot ids and a mask of arrivals that found their lot full
+    (they keep a spot id for the record but do not occupy it).
+    """
+    free_at = [[(-1.0, spot_id) for spot_id in spots] for spots in lot_spots]
+    for heap in free_at:
+        heapq.heapify(heap)
+    spot_ids = np.empty(len(arrivals), dtype=np.int64)
+    full = np.zeros(len(arrivals), dtype=bool)
+    for i, (lot, arrival, end) in enumerate(zip(lot_choice.tolist(), arrivals.tolist(), ends.tolist())):
+        heap = free_at[lot]
+        if heap[0][0] > arrival:
+            spot_ids[i] = heap[0][1]
+            full[i] = True
+            continue
+        spot_id = heapq.heappop(heap)[1]
+        spot_ids[i] = spot_id
+        heapq.heappush(heap, (end, spot_id))
+    return spot_ids, full
+
+
+def _plate(n):
+    return f'KA{n % 100:02d}X{n % 9999:04d}'
+
+
+def _timestamps(base, micros):
+    """datetimes `micros` microseconds after `base`"""
+    return (np.datetime64(base, 'us') + micros.astype('timedelta64[us]')).tolist()
+
+
+def _stamps(base, micros):
+    """The same as strings in the stored DateTime format, for raw inserts"""
+    moments = np.datetime64(base, 'us') + micros.astype('timedelta64[us]')
+    return np.char.replace(np.datetime_as_string(moments, unit='us'), 'T', ' ')
+
+
+def _insert_rows(table, columns, rows):
+    """executemany straight to the driver: no per-row bind processing"""
+    marker = '?' if db.engine.dialect.paramstyle == 'qmark' else '%s'
+    statement = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+    db.session.connection().exec_driver_sql(statement, list(rows))
+
+
+def _write_rollups(lot_ids, base, start_us, end_us, cost):
+    """Revenue rollup buckets of the completed sessions, as RevenueRollup.rebuild() makes them"""
+    if not len(cost):
+        return 0
+    starts = np.datetime64(base, 'us') + start_us.astype('timedelta64[us]')
+    ends = np.datetime64(base, 'us') + end_us.astype('timedelta64[us]')
+    day = ends.astype('datetime64[D]').astype(np.int64)
+    start_hour = ((starts - starts.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(np.int64)
+    hours = (end_us - start_us) / 3.6e9
+
+    first_day, lot_span = day.min(), int(lot_ids.max()) + 1
+    buckets, inverse = np.unique(
+        ((day - first_day) * lot_span + lot_ids) * 24 + start_hour, return_inverse=True
+    )
+    sums = {
+        'revenue': np.bincount(inverse, cost),
+        'sessions': np.bincount(inverse),
+        'billed_hours': np.bincount(inverse, np.maximum(hours, 1.0)),
+        'parked_hours': np.bincount(inverse, hours),
+    }
+    bracket = np.searchsorted([upper for _, _, upper in DURATION_BRACKETS[:-1]], hours)
+    for n, (_, column, _) in enumerate(DURATION_BRACKETS):
+        sums[column] = np.bincount(inverse, np.where(bracket == n, cost, 0.0), minlength=len(buckets))
+
+    days = np.datetime_as_string((buckets // 24 // lot_span + first_day).astype('datetime64[D]'))
+    _insert_rows(RevenueRollup.__table__, ('day', 'lot_id', 'start_hour') + RevenueRollup.SUM_COLUMNS, zip(
+        days.tolist(), (buckets // 24 % lot_span).tolist(), (buckets % 24).tolist(),
+        *(sums[name].tolist() for name in RevenueRollup.SUM_COLUMNS)
+    ))
+    return len(buckets)
+
+
+def generate_dataset(users=10000, lots=50, spots_per_lot=200, months=12,
+                     reservations=1_000_000, seed=42, now=None, progress=None):
+    """Fill an empty database; returns counts of what was written.
+
+    `progress`, if given, is called with a message after each stage.
+    """
+    report = progress or (lambda message: None)
+    rng = np.random.default_rng(seed)
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    start = now - timedelta(days=round(months * 30.44))
+
+    if db.session.execute(select(func.count(Reservation.id))).scalar():
+        raise ValueError('Database already has reservations; use an empty database')
+
+    # Users: one shared demo password, hashed once
+    password_hash = generate_password_hash(DEMO_PASSWORD)
+    joined = _timestamps(start - timedelta(days=365), rng.integers(0, 365 * 86400 * 10**6, users))
+    first_user = db.session.execute(select(func.coalesce(func.max(User.id), 0))).scalar() + 1
+    db.session.execute(insert(User.__table__), [
+        {'username': f'driver{i:06d}', 'email': f'driver{i:06d}@example.com',
+         'password_hash': password_hash, 'full_name': f'Driver {i}', 'phone': f'9{i:09d}',
+         'address': f'{i % 500 + 1} Example Road', 'pin_code': f'560{i % 100:03d}',
+         'is_admin': False, 'is_active': True, 'total_spent': 0.0,
+         'created_at': joined[i], 'updated_at': joined[i]}
+        for i in range(users)
+    ])
+    report(f'{users:,} users')
+
+    # Lots and spots
+    profiles = [LOT_PROFILES[n % len(LOT_PROFILES)] for n in range(lots)]
+    lot_ids, lot_spots = [], []
+    for n, (prefix, _, price) in enumerate(profiles):
+        lot = ParkingLot(f'{prefix} {n + 1}', f'{n + 1} Synthetic Avenue', f'560{n % 100:03d}',
+                         spots_per_lot, price)
+        db.session.add(lot)
+        db.session.flush()
+        provision_spots(lot, spots_per_lot)
+        lot_ids.append(lot.id)
+    spot_rows = db.session.execute(
+        select(ParkingSpot.lot_id, ParkingSpot.id).where(ParkingSpot.lot_id.in_(lot_ids))
+        .order_by(ParkingSpot.id)
+    ).all()
+    by_lot = {lot_id: [] for lot_id in lot_ids}
+    for lot_id, spot_id in spot_rows:
+        by_lot[lot_id].append(spot_id)
+    lot_spots = [by_lot[lot_id] for lot_id in lot_ids]
+    report(f'{lots:,} lots with {lots * spots_per_lot:,} spots')
+
+    # Sessions
+    count = reservations
+    arrivals = _arrivals(rng, count, start, now)
+    popularity = rng.lognormal(0, 0.5, lots)
+    lot_choice = rng.choice(lots, size=count, p=popularity / popularity.sum())
+    medians = np.array([median for _, median, _ in profiles])
+    hours = np.clip(rng.lognormal(np.log(medians[lot_choice]), 0.6), 0.1, 72.0)
+    lead = rng.uniform(0, 1800, count)  # booked up to 30 minutes ahead
+    horizon = (now - start).total_seconds()
+
+    expired = rng.random(count) < EXPIRED_SHARE
+    held = arrivals > horizon - HOLD_MINUTES * 60
+    # A hold keeps its spot until now, an expired one never took it
+    ends = np.where(expired, arrivals, np.where(held, np.inf, arrivals + hours * 3600))
+    spot_ids, full = _assign_spots(arrivals, ends, lot_choice, lot_spots)
+    # Turned away from a full lot: the hold was never used
+    expired |= full
+    held &= ~full
+    ends = np.where(full, arrivals, ends)
+    active = ~expired & ~held & (ends > horizon)
+    completed = ~expired & ~held & ~active
+    report(f'{count:,} sessions scheduled')
+
+    # Drivers: a few regulars park much more than most; open sessions get
+    # distinct drivers, as the app allows one active reservation each
+    weights = rng.pareto(1.5, users) + 1
+    driver = rng.choice(users, size=count, p=weights / weights.sum())
+    open_sessions = np.flatnonzero(active | held)
+    driver[open_sessions] = rng.choice(users, size=len(open_sessions), replace=len(open_sessions) > users)
+
+    prices = np.array([price for _, _, price in profiles])
+    rate = prices[lot_choice]
+    cost = np.where(completed, np.round(np.maximum(hours, 1.0) * rate, 2), 0.0)
+
+    # Microseconds after `start`, as the stored timestamps have them
+    arrive_us = (arrivals * 1e6).astype(np.int64)
+    booked_us = np.maximum(arrive_us - (lead * 1e6).astype(np.int64), 0)
+    end_us = np.where(completed, arrive_us + (hours * 3.6e9).astype(np.int64), booked_us)
+    status = np.where(completed, 'completed', np.where(active, 'active', np.where(held, 'reserved', 'expired')))
+
+    # Indexes are built once after the load, far cheaper than row by row
+    connection = db.session.connection()
+    indexes = sorted(Reservation.__table__.indexes, key=lambda index: index.name)
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+    for offset in range(0, count, CHUNK_SIZE):
+        part = slice(offset, min(offset + CHUNK_SIZE, count))
+        parked = completed[part] | active[part]
+        booked = _stamps(start, booked_us[part]).tolist()
+        began = np.where(parked, _stamps(start, arrive_us[part]).astype(object), None).tolist()
+        finished = np.where(completed[part], _stamps(start, end_us[part]).astype(object), None).tolist()
+        _insert_rows(Reservation.__table__, RESERVATION_COLUMNS, zip(
+            (driver[part] + first_user).tolist(), spot_ids[part].tolist(),
+            [_plate(n) for n in range(part.start, part.stop)], status[part].tolist(),
+            booked, began, finished, rate[part].tolist(), cost[part].tolist(),
+            booked, [end or book for end, book in zip(finished, booked)]
+        ))
+        report(f'{part.stop:,} / {count:,} reservations written')
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+    report('reservation indexes built')
+
+    # Spot states for the open sessions, then every derived counter
+    occupied = np.flatnonzero(active)
+    if len(occupied):
+        db.session.execute(
+            update(ParkingSpot.__table__).where(ParkingSpot.__table__.c.id == bindparam('spot'))
+            .values(is_occupied=True, vehicle_number=bindparam('vehicle')),
+            [{'spot': int(spot_ids[i]), 'vehicle': _plate(int(i))} for i in occupied]
+        )
+    holds = np.flatnonzero(held)
+    if len(holds):
+        db.session.execute(
+            update(ParkingSpot.__table__).where(ParkingSpot.__table__.c.id == bindparam('spot'))
+            .values(is_reserved=True),
+            [{'spot': int(spot_ids[i])} for i in holds]
+        )
+    ParkingLot.reconcile_spot_counts()
+
+    spent = np.bincount(driver, weights=cost, minlength=users)
+    last_seen = np.full(users, -1.0)
+    np.maximum.at(last_seen, driver, np.where(completed, end_us, arrive_us))
+    seen = np.flatnonzero(last_seen >= 0)
+    activity = _timestamps(start, last_seen[seen].astype(np.int64))
+    db.session.execute(
+        update(User.__table__).where(User.__table__.c.id == bindparam('user'))
+        .values(total_spent=bindparam('spent'), last_activity_at=bindparam('at')),
+        [{'user': first_user + int(i), 'spent': round(float(spent[i]), 2), 'at': at}
+         for i, at in zip(seen, activity)]
+    )
+    buckets = _write_rollups(np.array(lot_ids)[lot_choice[completed]], start,
+                             arrive_us[completed], end_us[completed], cost[completed])
+    db.session.commit()
+    report(f'{buckets:,} revenue rollup buckets')
+
+    return {
+        'users': users,
+        'lots': lots,
+        'spots': lots * spots_per_lot,
+        'reservations': count,
+        'completed': int(completed.sum()),
+        'active': int(active.sum()),
+        'reserved': int(held.sum()),
+        'expired': int(expired.sum()),
+    }
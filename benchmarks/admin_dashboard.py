@@ -0,0 +1,151 @@
+"""
+Admin dashboard benchmark
+Seeds a throwaway SQLite database with N reservations (default 1M) and
+times GET /api/admin/dashboard through the Flask test client, next to the
+previous implementation (six count() queries plus loading every completed
+reservation to sum total_cost in Python).
+
+Usage: python benchmarks/admin_dashboard.py [reservations] [repeats]
+"""
+
+import importlib.util
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    spec = importlib.util.spec_from_file_location('parking_app_main', os.path.join(ROOT, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    app = module.create_app()
+    # Expiring the seeded holds would change the data mid-run
+    app.config['HOLD_SWEEPER'] = False
+    return app
+
+
+def seed(app, reservations, lots=20, spots_per_lot=100, users=2000, chunk=50000):
+    from sqlalchemy import insert
+    from app.models import db
+    from app.models.parking_lot import ParkingLot
+    from app.models.reservation import Reservation
+    from app.models.revenue_rollup import RevenueRollup
+    from app.models.user import User
+    from app.utils.provisioning import provision_spots
+    from app.utils.schema import upgrade_schema
+
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+
+        admin = User('admin', 'admin@bench', 'admin123', 'Admin', '0', 'x', '0', is_admin=True)
+        db.session.add(admin)
+        db.session.execute(insert(User.__table__), [
+            {'username': f'user{i}', 'email': f'user{i}@bench', 'password_hash': 'x',
+             'full_name': f'User {i}', 'phone': '0', 'address': 'x', 'pin_code': '0',
+             'is_admin': False, 'is_active': True, 'created_at': datetime.utcnow()}
+            for i in range(users)
+        ])
+        for n in range(lots):
+            lot = ParkingLot(f'Lot {n}', 'x', '0', spots_per_lot, 40.0)
+            db.session.add(lot)
+            db.session.flush()
+            provision_spots(lot, spots_per_lot)
+        db.session.commit()
+        admin_id = admin.id
+
+        now = datetime.utcnow()
+        total_spots = lots * spots_per_lot
+        for offset in range(0, reservations, chunk):
+            rows = []
+            for i in range(offset, min(offset + chunk, reservations)):
+                start = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+                hours = rng.uniform(0.2, 10)
+                rows.append({
+                    'user_id': 2 + rng.randrange(users), 'spot_id': 1 + rng.randrange(total_spots),
+                    'vehicle_number': f'KA{i:07d}', 'status': 'completed',
+                    'reservation_time': start, 'parking_start_time': start,
+                    'parking_end_time': start + timedelta(hours=hours),
+                    'hourly_rate': 40.0, 'total_cost': round(max(hours, 1) * 40.0, 2),
+                    'created_at': start, 'updated_at': start
+                })
+            db.session.execute(insert(Reservation.__table__), rows)
+        RevenueRollup.rebuild()
+        db.session.commit()
+        return admin_id
+
+
+def legacy_dashboard():
+    """The pre-aggregation statistics code, kept here for comparison"""
+    from app.models.parking_lot import ParkingLot
+    from app.models.parking_spot import ParkingSpot
+    from app.models.reservation import Reservation
+    from app.models.user import User
+
+    User.query.filter_by(is_admin=False).count()
+    ParkingLot.query.filter_by(is_active=True).count()
+    ParkingSpot.query.filter_by(is_active=True).count()
+    ParkingSpot.query.filter_by(is_occupied=True, is_active=True).count()
+    Reservation.query.count()
+    Reservation.query.filter_by(status='active').count()
+    completed = Reservation.query.filter_by(status='completed').all()
+    return sum(res.total_cost for res in completed if res.total_cost)
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    from flask_jwt_extended import create_access_token
+    from app.models import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        started = time.perf_counter()
+        admin_id = seed(app, reservations)
+        print(f'seeded {reservations:,} reservations in {time.perf_counter() - started:.1f}s')
+
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin_id))}'}
+        client = app.test_client()
+
+        def dashboard():
+            response = client.get('/api/admin/dashboard', headers=headers)
+            assert response.status_code == 200, response.get_json()
+
+        def legacy():
+            with app.app_context():
+                legacy_dashboard()
+                db.session.remove()
+
+        dashboard()
+        median, worst = timed(dashboard, repeats)
+        print(f'GET /api/admin/dashboard   median {median:8.1f} ms   max {worst:8.1f} ms')
+        median, worst = timed(legacy, max(1, repeats // 2))
+        print(f'previous statistics code   median {median:8.1f} ms   max {worst:8.1f} ms')
+
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
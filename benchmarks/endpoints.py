@@ -0,0 +1,402 @@
+"""
+Endpoint benchmark suite
+Builds the app with create_app() against throwaway SQLite databases filled
+by the synthetic dataset generator (1k, 100k and 1M reservations by
+default) and drives every auth, user and admin endpoint through the Flask
+test client. For each size it reports latency percentiles, SQL statements
+per request and peak Python memory per request (tracemalloc, in a separate
+pass), plus the serving process's peak RSS, then a p50/queries table across
+sizes to show how each endpoint scales.
+
+Read endpoints are requested as they are. The analytics cache is cleared
+before every request, so the numbers are the cost of the queries and not
+of cache hits. Write endpoints run as flows that leave the data as they
+found it: reserve -> occupy -> release, create -> update -> delete a lot,
+toggling a user twice, and reserve -> occupy -> force-release. Report jobs
+run eagerly, so POST .../jobs includes building the report.
+
+Each size is seeded and measured in its own child process so peak RSS
+belongs to that size. Pass --data-dir to keep the seeded databases between
+runs. --save writes the results as the baseline (benchmarks/baseline.json
+by default; timings are machine-specific, so save it on the machine that
+compares). Later runs flag an endpoint whose p50 grew by more than
+--tolerance (and by at least 5 ms) or that issues more statements than the
+baseline, and exit with status 1.
+
+Usage: python benchmarks/endpoints.py [--sizes 1000,100000,1000000]
+       [--repeats 20] [--only PATTERN] [--data-dir DIR] [--baseline PATH]
+       [--tolerance 0.5] [--save]
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from admin_dashboard import load_app  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Slowdowns smaller than this are noise whatever the ratio
+NOISE_MS = 5.0
+
+
+def dataset_shape(reservations):
+    """Generator arguments for a size: the 1M shape is the generator default"""
+    return {
+        'reservations': reservations,
+        'users': min(10_000, max(100, reservations // 100)),
+        'lots': min(50, max(5, reservations // 20_000)),
+        'spots_per_lot': min(200, max(50, reservations // 5_000)),
+    }
+
+
+def seed_database(path, reservations):
+    """Generate the dataset plus an admin into a new SQLite file"""
+    from app.models import db
+    from app.models.user import User
+    from app.utils.schema import upgrade_schema
+    from app.utils.synthetic import generate_dataset
+
+    app = load_app(f'sqlite:///{path}')
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        generate_dataset(**dataset_shape(reservations))
+        db.session.add(User('bench-admin', 'admin@bench.local', 'admin123', 'Bench Admin',
+                            '9000000000', 'Bench Road', '560001', is_admin=True))
+        db.session.commit()
+        db.engine.dispose()
+    return time.perf_counter() - started
+
+
+class Bench:
+    """Times requests through the test client and keeps per-endpoint samples"""
+
+    def __init__(self, app):
+        from sqlalchemy import event
+        from app.models import db
+
+        self.app = app
+        self.client = app.test_client()
+        self.record = False
+        self.tracing = False
+        self.statements = 0
+        self.samples = {}  # name -> {'ms': [...], 'queries': [...], 'peak_kib': [...]}
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.statements += 1
+
+    def request(self, name, method, url, record=True, stream=False, allow=(), **kwargs):
+        from app.utils.cache import analytics_cache
+
+        with self.app.app_context():
+            analytics_cache.invalidate_all()
+        self.statements = 0
+        if self.tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        response = self.client.open(url, method=method, buffered=False, **kwargs)
+        if stream:
+            # Long-lived responses: time to the first message
+            next(iter(response.response))
+            body = b''
+        else:
+            body = response.get_data()
+        elapsed = (time.perf_counter() - started) * 1000
+        response.close()
+        assert response.status_code < 300 or response.status_code in allow, \
+            f'{name}: {response.status_code} {body[:200]!r}'
+
+        if record and self.record:
+            sample = self.samples.setdefault(name, {'ms': [], 'queries': [], 'peak_kib': []})
+            if self.tracing:
+                sample['peak_kib'].append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+            else:
+                sample['ms'].append(elapsed)
+                sample['queries'].append(self.statements)
+        return json.loads(body) if response.is_json else None
+
+
+def bench_ids(app):
+    """Accounts, tokens and rows the cases work with"""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import func, select
+    from app.models import db
+    from app.models.parking_lot import ParkingLot
+    from app.models.reservation import Reservation
+    from app.models.user import User
+
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        open_drivers = select(Reservation.user_id).where(Reservation.status.in_(['active', 'reserved']))
+        # The busiest driver who can make a reservation right now
+        driver_id, = db.session.execute(
+            select(Reservation.user_id)
+            .where(Reservation.user_id.notin_(open_drivers))
+            .group_by(Reservation.user_id)
+            .order_by(func.count().desc(), Reservation.user_id)
+            .limit(1)
+        ).one()
+        driver = db.session.get(User, driver_id)
+        lot = ParkingLot.query.order_by(ParkingLot.available_spot_count.desc(), ParkingLot.id).first()
+        reservation_id = db.session.execute(
+            select(func.max(Reservation.id)).where(Reservation.user_id == driver_id)
+        ).scalar()
+        other_user = User.query.filter(User.is_admin.is_(False), User.id != driver_id).order_by(User.id).first()
+        return {
+            'admin': {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'},
+            'driver': {'Authorization': f'Bearer {create_access_token(identity=str(driver_id))}'},
+            'driver_token': create_access_token(identity=str(driver_id)),
+            'driver_email': driver.email,
+            'lot_id': lot.id,
+            'reservation_id': reservation_id,
+            'other_user_id': other_user.id,
+            'since': (datetime.utcnow() - timedelta(days=30)).isoformat(),
+        }
+
+
+def run_cases(bench, ids, only, run):
+    """One request to every endpoint; write endpoints as flows"""
+    from app.utils.synthetic import DEMO_PASSWORD
+
+    driver, admin = ids['driver'], ids['admin']
+
+    def get(name, headers, **kwargs):
+        if only in name:
+            bench.request(name, 'GET', name.split(' ', 1)[1].split(' (')[0], headers=headers, **kwargs)
+
+    def wants(*names):
+        return any(only in name for name in names)
+
+    # Auth
+    if wants('POST /api/auth/login'):
+        bench.request('POST /api/auth/login', 'POST', '/api/auth/login',
+                      json={'email': ids['driver_email'], 'password': DEMO_PASSWORD})
+    if wants('POST /api/auth/register'):
+        name = f'bench{os.getpid()}x{run}'
+        bench.request('POST /api/auth/register', 'POST', '/api/auth/register', json={
+            'username': name, 'email': f'{name}@bench.local', 'password': DEMO_PASSWORD,
+            'full_name': 'Bench Driver', 'phone': '9000000000', 'address': 'Bench Road', 'pin_code': '560001'
+        })
+    get('GET /api/auth/profile', driver)
+    get('GET /api/auth/test', None)
+
+    # User reads
+    for path in ('dashboard', 'parking-lots', 'parking-history', 'parking-history/detailed',
+                 'cost-summary', 'analytics/charts/personal', 'analytics/charts/cost-analysis', 'test'):
+        get(f'GET /api/user/{path}', driver)
+    # The driver is between sessions, so this is the 404 path
+    get('GET /api/user/active-reservation', driver, allow=(404,))
+    if wants('GET /api/user/reservations/<id>'):
+        bench.request('GET /api/user/reservations/<id>', 'GET',
+                      f"/api/user/reservations/{ids['reservation_id']}", headers=driver)
+    if wants('GET /api/user/availability/stream'):
+        bench.request('GET /api/user/availability/stream (first event)', 'GET',
+                      f"/api/user/availability/stream?jwt={ids['driver_token']}", stream=True)
+    if wants('POST /api/user/jobs', 'GET /api/user/jobs/<id>'):
+        job = bench.request('POST /api/user/jobs', 'POST', '/api/user/jobs', headers=driver,
+                            json={'report': 'personal-charts', 'days': 365})
+        bench.request('GET /api/user/jobs/<id>', 'GET', f"/api/user/jobs/{job['job']['job_id']}", headers=driver)
+
+    # User writes: reserve -> occupy -> release
+    if wants('POST /api/user/reserve-spot', 'POST /api/user/occupy-spot/<id>', 'POST /api/user/release-spot/<id>'):
+        reserved = bench.request('POST /api/user/reserve-spot', 'POST', '/api/user/reserve-spot', headers=driver,
+                                 json={'lot_id': ids['lot_id'], 'vehicle_number': 'KA01BN0001'})
+        reservation_id = reserved['reservation']['id']
+        bench.request('POST /api/user/occupy-spot/<id>', 'POST',
+                      f'/api/user/occupy-spot/{reservation_id}', headers=driver)
+        bench.request('POST /api/user/release-spot/<id>', 'POST',
+                      f'/api/user/release-spot/{reservation_id}', headers=driver)
+
+    # Admin reads
+    for path in ('dashboard', 'parking-lots', 'users', 'reservations', 'reservations/detailed',
+                 'analytics/revenue', 'analytics/occupancy', 'analytics/charts/dashboard',
+                 'analytics/charts/revenue-breakdown', 'test'):
+        get(f'GET /api/admin/{path}', admin)
+    if wants('GET /api/admin/reservations/<id>'):
+        bench.request('GET /api/admin/reservations/<id>', 'GET',
+                      f"/api/admin/reservations/{ids['reservation_id']}", headers=admin)
+    if wants('GET /api/admin/reservations/export'):
+        bench.request('GET /api/admin/reservations/export (30 days)', 'GET',
+                      f"/api/admin/reservations/export?date_from={ids['since']}", headers=admin)
+    if wants('POST /api/admin/jobs', 'GET /api/admin/jobs/<id>'):
+        job = bench.request('POST /api/admin/jobs', 'POST', '/api/admin/jobs', headers=admin,
+                            json={'report': 'dashboard-charts', 'days': 365})
+        bench.request('GET /api/admin/jobs/<id>', 'GET', f"/api/admin/jobs/{job['job']['job_id']}", headers=admin)
+
+    # Admin writes
+    if wants('POST /api/admin/parking-lots', 'PUT /api/admin/parking-lots/<id>', 'DELETE /api/admin/parking-lots/<id>'):
+        created = bench.request('POST /api/admin/parking-lots', 'POST', '/api/admin/parking-lots', headers=admin,
+                                json={'name': f'Bench Lot {os.getpid()}-{run}', 'address': 'Bench Road',
+                                      'pin_code': '560001', 'total_spots': 100, 'price_per_hour': 30})
+        lot_id = created['parking_lot']['id']
+        bench.request('PUT /api/admin/parking-lots/<id>', 'PUT', f'/api/admin/parking-lots/{lot_id}',
+                      headers=admin, json={'price_per_hour': 35, 'total_spots': 120})
+        bench.request('DELETE /api/admin/parking-lots/<id>', 'DELETE', f'/api/admin/parking-lots/{lot_id}',
+                      headers=admin)
+    if wants('POST /api/admin/users/<id>/toggle-status'):
+        for _ in range(2):
+            bench.request('POST /api/admin/users/<id>/toggle-status', 'POST',
+                          f"/api/admin/users/{ids['other_user_id']}/toggle-status", headers=admin)
+    if wants('POST /api/admin/spots/<id>/force-release'):
+        reserved = bench.request('setup', 'POST', '/api/user/reserve-spot', headers=driver, record=False,
+                                 json={'lot_id': ids['lot_id'], 'vehicle_number': 'KA01BN0002'})
+        reservation = reserved['reservation']
+        bench.request('setup', 'POST', f"/api/user/occupy-spot/{reservation['id']}", headers=driver, record=False)
+        bench.request('POST /api/admin/spots/<id>/force-release', 'POST',
+                      f"/api/admin/spots/{reservation['spot_id']}/force-release", headers=admin)
+
+
+def measure(path, repeats, only):
+    """Benchmark one seeded database; runs in its own process"""
+    from app.models import db
+
+    app = load_app(f'sqlite:///{path}')
+    app.config.update(HOLD_SWEEPER=False, JOBS_EAGER=True)
+    bench = Bench(app)
+    ids = bench_ids(app)
+
+    run_cases(bench, ids, only, run=0)  # warm-up: imports, connection, plan caches
+    bench.record = True
+    for run in range(1, repeats + 1):
+        run_cases(bench, ids, only, run)
+    bench.tracing = True
+    tracemalloc.start()
+    run_cases(bench, ids, only, run=repeats + 1)
+    tracemalloc.stop()
+
+    with app.app_context():
+        db.engine.dispose()
+    return {
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'endpoints': {name: summarize(sample) for name, sample in bench.samples.items()},
+    }
+
+
+def summarize(sample):
+    p50, p90, p99 = np.percentile(sample['ms'], [50, 90, 99])
+    return {
+        'p50_ms': round(float(p50), 3),
+        'p90_ms': round(float(p90), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(max(sample['ms']), 3),
+        'queries': int(np.median(sample['queries'])),
+        'peak_kib': round(max(sample['peak_kib'] or [0]), 1),
+    }
+
+
+def in_child(fn, *args):
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def print_size(size, result):
+    print(f"\n== {size:,} reservations   peak RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"{'endpoint':<58}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}")
+    for name, stats in result['endpoints'].items():
+        print(f"{name:<58}{stats['p50_ms']:>9.1f}{stats['p90_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+              f"{stats['queries']:>9}{stats['peak_kib']:>10.0f}")
+
+
+def print_scaling(results):
+    sizes = list(results)
+    names = list(dict.fromkeys(name for result in results.values() for name in result['endpoints']))
+    print('\n== Scaling: p50 ms (queries)')
+    print(f"{'endpoint':<58}" + ''.join(f'{int(size):>16,}' for size in sizes))
+    for name in names:
+        cells = []
+        for size in sizes:
+            stats = results[size]['endpoints'].get(name)
+            cells.append(f"{stats['p50_ms']:.1f} ({stats['queries']})" if stats else '-')
+        print(f'{name:<58}' + ''.join(f'{cell:>16}' for cell in cells))
+
+
+def regressions(results, baseline, tolerance):
+    """(size, endpoint, reason) for everything worse than the baseline"""
+    found = []
+    for size, result in results.items():
+        previous = baseline.get('sizes', {}).get(size, {}).get('endpoints', {})
+        for name, stats in result['endpoints'].items():
+            before = previous.get(name)
+            if not before:
+                continue
+            slower = stats['p50_ms'] - before['p50_ms']
+            if stats['p50_ms'] > before['p50_ms'] * (1 + tolerance) and slower > NOISE_MS:
+                found.append((size, name, f"p50 {before['p50_ms']:.1f} -> {stats['p50_ms']:.1f} ms"))
+            if stats['queries'] > before['queries']:
+                found.append((size, name, f"queries {before['queries']} -> {stats['queries']}"))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endpoint latency, query and memory benchmarks')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated reservation counts')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--only', default='', help='only endpoints whose name contains this')
+    parser.add_argument('--data-dir', help='keep seeded databases here between runs')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p50 growth, 0.5 = +50%%')
+    parser.add_argument('--save', action='store_true', help='write these results as the baseline')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        results = {}
+        for size in sizes:
+            shape = dataset_shape(size)
+            path = os.path.join(data_dir, 'bench-{reservations}-{users}u-{lots}l-{spots_per_lot}s.db'.format(**shape))
+            if not os.path.exists(path):
+                print(f'seeding {size:,} reservations ...', flush=True)
+                seconds = in_child(seed_database, path, size)
+                print(f'seeded in {seconds:.1f}s', flush=True)
+            results[str(size)] = in_child(measure, path, args.repeats, args.only)
+            print_size(size, results[str(size)])
+
+    print_scaling(results)
+
+    document = {
+        'created': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'repeats': args.repeats,
+        'sizes': results,
+    }
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f'\nbaseline saved to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print('\nno baseline yet: run with --save to record one')
+        return 0
+
+    with open(args.baseline) as f:
+        found = regressions(results, json.load(f), args.tolerance)
+    print(f'\n{len(found)} regressions against {args.baseline}')
+    for size, name, reason in found:
+        print(f'   {int(size):>9,}  {name}: {reason}')
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Reservation serializer benchmark
+Loads a page of reservations (default 1,000 rows, 9 in 10 completed) from
+a throwaway SQLite database and times Reservation.to_dict(), with and
+without a ?fields= projection, next to the previous serializer (separate
+duration helpers plus the full cost breakdown on every completed row).
+
+Usage: python benchmarks/reservation_serializer.py [rows] [repeats]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from admin_dashboard import load_app  # noqa: E402
+
+
+def legacy_to_dict(res):
+    """The pre-projection serializer, kept here for comparison"""
+    data = {
+        'id': res.id,
+        'user_id': res.user_id,
+        'spot_id': res.spot_id,
+        'vehicle_number': res.vehicle_number,
+        'status': res.status,
+        'reservation_time': res.reservation_time.isoformat() if res.reservation_time else None,
+        'parking_start_time': res.parking_start_time.isoformat() if res.parking_start_time else None,
+        'parking_end_time': res.parking_end_time.isoformat() if res.parking_end_time else None,
+        'hourly_rate': res.hourly_rate,
+        'total_cost': res.total_cost,
+        'duration_formatted': res.format_duration(),
+        'duration_hours': res.get_duration_hours(),
+        'duration_minutes': res.get_duration_minutes()
+    }
+    if res.status == 'completed':
+        data['cost_breakdown'] = res.get_cost_breakdown()
+    return data
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    from sqlalchemy import insert
+    from app.models import db
+    from app.models.reservation import Reservation
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with app.app_context():
+            db.create_all()
+            now = datetime.utcnow()
+            db.session.execute(insert(Reservation.__table__), [
+                {'user_id': 1, 'spot_id': 1, 'vehicle_number': f'KA{i:07d}',
+                 'status': 'completed' if i % 10 else 'active',
+                 'reservation_time': now - timedelta(hours=i),
+                 'parking_start_time': now - timedelta(hours=i),
+                 'parking_end_time': now - timedelta(hours=i) + timedelta(minutes=97) if i % 10 else None,
+                 'hourly_rate': 40.0, 'total_cost': 80.0}
+                for i in range(count)
+            ])
+            db.session.commit()
+            rows = Reservation.query.all()
+
+            projection = Reservation.parse_fields('id,status,total_cost,parking_start_time')
+            cases = [
+                ('previous to_dict()', lambda: [legacy_to_dict(res) for res in rows]),
+                ('to_dict()', lambda: [res.to_dict() for res in rows]),
+                ('to_dict(4 fields)', lambda: [res.to_dict(projection) for res in rows]),
+            ]
+            baseline = None
+            for label, fn in cases:
+                median = timed(fn, repeats)
+                baseline = baseline or median
+                print(f'{label:<20} {count:,} rows   median {median:7.2f} ms   {baseline / median:5.1f}x')
+
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
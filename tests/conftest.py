@@ -0,0 +1,145 @@
+"""
+Shared fixtures for the in-process tests
+The app is built with create_app() from app.py against a throwaway SQLite
+file, and requests go through the Flask test client (no live server).
+"""
+
+import importlib.util
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _load_app_module():
+    # app.py is shadowed by the app/ package, so load it by path
+    spec = importlib.util.spec_from_file_location('parking_app_main', os.path.join(ROOT, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+app_main = _load_app_module()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    flask_app = app_main.create_app()
+    flask_app.config['TESTING'] = True
+    # Tests drive hold expiry with hold_expiry.sweep()
+    flask_app.config['HOLD_SWEEPER'] = False
+    # X-Query-Count on every response, for assert_query_budget()
+    flask_app.config['QUERY_STATS_HEADERS'] = 'always'
+    # One process, so principals may be cached in the in-process backend
+    flask_app.config['PRINCIPAL_CACHE_LOCAL'] = True
+
+    from app.models import db
+    from app.utils.schema import upgrade_schema
+
+    with flask_app.app_context():
+        db.create_all()
+        upgrade_schema()
+
+    yield flask_app
+
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(app, username='driver', is_admin=False):
+    """Create a user and return (user_id, auth headers)"""
+    from app.models import db
+    from app.models.user import User
+
+    with app.app_context():
+        user = User(
+            username=username,
+            email=f'{username}@test.com',
+            password='secret123',
+            full_name=username.title(),
+            phone='9000000000',
+            address='Test Address',
+            pin_code='560001',
+            is_admin=is_admin
+        )
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        return user.id, {'Authorization': f'Bearer {token}'}
+
+
+def make_lot(app, name='Test Lot', total_spots=10, price_per_hour=40.0):
+    """Create a lot with its spots and return the lot id"""
+    from app.models import db
+    from app.models.parking_lot import ParkingLot
+    from app.utils.provisioning import provision_spots
+
+    with app.app_context():
+        lot = ParkingLot(name=name, address='Test Street', pin_code='560001',
+                         total_spots=total_spots, price_per_hour=price_per_hour)
+        db.session.add(lot)
+        db.session.flush()
+        provision_spots(lot, total_spots)
+        db.session.commit()
+        return lot.id
+
+
+def park_and_release(client, headers, lot_id, vehicle, release=True):
+    """Reserve, occupy and (unless release=False) release a spot; return the reservation id"""
+    reservation = client.post('/api/user/reserve-spot', headers=headers,
+                              json={'lot_id': lot_id, 'vehicle_number': vehicle}).get_json()['reservation']
+    assert client.post(f"/api/user/occupy-spot/{reservation['id']}", headers=headers).status_code == 200
+    if release:
+        assert client.post(f"/api/user/release-spot/{reservation['id']}", headers=headers).status_code == 200
+    return reservation['id']
+
+
+@pytest.fixture
+def user_headers(app):
+    return make_user(app)[1]
+
+
+@pytest.fixture
+def admin_headers(app):
+    return make_user(app, username='admin', is_admin=True)[1]
+
+
+@contextmanager
+def count_queries(app):
+    """Collect the SQL statements issued inside the block"""
+    from app.models import db
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def assert_query_budget(response, budget):
+    """Fail if the request behind `response` issued more than `budget` SQL statements"""
+    count = int(response.headers['X-Query-Count'])
+    assert count <= budget, (
+        f'{response.request.method} {response.request.path} issued {count} SQL statements (budget {budget})'
+    )
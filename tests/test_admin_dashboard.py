@@ -0,0 +1,36 @@
+from conftest import count_queries, make_lot, make_user
+
+
+def test_dashboard_statistics_come_from_one_aggregate(app, client, admin_headers):
+    lot_id = make_lot(app, total_spots=4, price_per_hour=40.0)
+    make_lot(app, name='Second Lot', total_spots=6)
+    _, driver = make_user(app)
+
+    reservation = client.post('/api/user/reserve-spot', headers=driver,
+                              json={'lot_id': lot_id, 'vehicle_number': 'KA01'}).get_json()['reservation']
+    client.post(f"/api/user/occupy-spot/{reservation['id']}", headers=driver)
+    client.post(f"/api/user/release-spot/{reservation['id']}", headers=driver)
+    reservation = client.post('/api/user/reserve-spot', headers=driver,
+                              json={'lot_id': lot_id, 'vehicle_number': 'KA01'}).get_json()['reservation']
+    client.post(f"/api/user/occupy-spot/{reservation['id']}", headers=driver)
+
+    with count_queries(app) as statements:
+        response = client.get('/api/admin/dashboard', headers=admin_headers)
+    assert response.status_code == 200
+
+    assert response.get_json()['statistics'] == {
+        'total_users': 1,
+        'total_parking_lots': 2,
+        'total_parking_spots': 10,
+        'occupied_spots': 1,
+        'available_spots': 9,
+        'occupancy_rate': 10.0,
+        'total_reservations': 2,
+        'active_reservations': 1,
+        'total_revenue': 40.0
+    }
+
+    # admin lookup, the aggregate, the recent reservations page
+    aggregates = [sql for sql in statements if 'count(' in sql.lower() or 'sum(' in sql.lower()]
+    assert len(aggregates) == 1
+    assert len(statements) == 3
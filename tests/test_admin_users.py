@@ -0,0 +1,74 @@
+from conftest import count_queries, make_lot, make_user, park_and_release
+
+from app.models import db
+from app.models.user import User
+
+
+def test_user_list_is_paginated_and_sorted_by_spend(app, client, admin_headers):
+    lot_id = make_lot(app, price_per_hour=40.0)
+    drivers = [make_user(app, username=f'driver{i}') for i in range(5)]
+
+    # driver3 parks twice, driver1 once and is still parked
+    _, headers = drivers[3]
+    park_and_release(client, headers, lot_id, 'KA01')
+    park_and_release(client, headers, lot_id, 'KA02')
+    active_id = park_and_release(client, drivers[1][1], lot_id, 'KA03', release=False)
+
+    with count_queries(app) as statements:
+        response = client.get('/api/admin/users?sort=total_spent&order=desc&per_page=2', headers=admin_headers)
+    body = response.get_json()
+    assert response.status_code == 200
+
+    assert [user['username'] for user in body['users']] == ['driver3', 'driver4']
+    assert body['users'][0]['total_spent'] == 80.0
+    assert body['users'][0]['total_reservations'] == 2
+    assert body['pagination']['pages'] == 3
+    assert body['total_users'] == 5
+    # admin lookup, list totals, page rows, grouped counts, active reservations
+    assert len(statements) == 5
+
+    recent = client.get('/api/admin/users?sort=last_activity&order=desc&per_page=1', headers=admin_headers).get_json()
+    assert recent['users'][0]['username'] == 'driver1'
+    assert recent['users'][0]['active_reservation']['id'] == active_id
+
+    assert client.get('/api/admin/users?sort=password_hash', headers=admin_headers).status_code == 400
+
+
+def test_user_list_searches_and_filters_on_the_server(app, client, admin_headers):
+    for name in ('alice', 'alicia', 'bob', 'al_x'):
+        make_user(app, username=name)
+    with app.app_context():
+        User.query.filter_by(username='alicia').one().is_active = False
+        db.session.commit()
+
+    body = client.get('/api/admin/users?search=ALI&sort=username', headers=admin_headers).get_json()
+    assert [user['username'] for user in body['users']] == ['alice', 'alicia']
+    assert body['pagination']['total'] == 2
+    assert body['statistics'] == {'total_users': 4, 'active_users': 3, 'admin_users': 1, 'new_users_month': 4}
+
+    # LIKE wildcards in the search are literal
+    body = client.get('/api/admin/users?search=_', headers=admin_headers).get_json()
+    assert [user['username'] for user in body['users']] == ['al_x']
+
+    body = client.get('/api/admin/users?status=inactive&per_page=1&page=1', headers=admin_headers).get_json()
+    assert [user['username'] for user in body['users']] == ['alicia']
+    assert body['pagination']['pages'] == 1 and not body['pagination']['has_next']
+    assert client.get('/api/admin/users?status=banned', headers=admin_headers).status_code == 400
+
+
+def test_reconcile_matches_maintained_totals(app, client):
+    lot_id = make_lot(app)
+    user_id, headers = make_user(app)
+    park_and_release(client, headers, lot_id, 'KA01')
+    park_and_release(client, headers, lot_id, 'KA02', release=False)
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        maintained = (user.total_spent, user.last_activity_at)
+        user.total_spent, user.last_activity_at = 0.0, None
+        db.session.commit()
+
+        User.reconcile_activity()
+        user = db.session.get(User, user_id)
+        assert user.total_spent == maintained[0] == 40.0
+        assert abs((user.last_activity_at - maintained[1]).total_seconds()) < 1
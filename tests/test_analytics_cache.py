@@ -0,0 +1,96 @@
+import time
+
+from conftest import app_main, make_lot, make_user, park_and_release
+
+from app.utils.cache import LRUBackend
+
+
+def test_admin_analytics_are_served_from_cache_after_authorization(app, client, admin_headers):
+    _, driver = make_user(app)
+
+    first = client.get('/api/admin/analytics/revenue', headers=admin_headers)
+    second = client.get('/api/admin/analytics/revenue', headers=admin_headers)
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    # A different ?days= is a different entry
+    assert client.get('/api/admin/analytics/revenue?days=7', headers=admin_headers).headers['X-Cache'] == 'MISS'
+
+    # The shared entry is never handed to a non-admin
+    assert client.get('/api/admin/analytics/revenue', headers=driver).status_code == 403
+
+
+def test_completion_invalidates_admin_and_own_user_figures(app, client, admin_headers):
+    lot_id = make_lot(app, price_per_hour=40.0)
+    _, driver = make_user(app)
+    _, other = make_user(app, username='rider')
+
+    assert client.get('/api/admin/analytics/revenue', headers=admin_headers).get_json()['total_sessions'] == 0
+    assert client.get('/api/user/cost-summary', headers=driver).get_json()['total_sessions'] == 0
+    client.get('/api/user/cost-summary', headers=other)
+
+    park_and_release(client, driver, lot_id, 'KA01')
+
+    revenue = client.get('/api/admin/analytics/revenue', headers=admin_headers)
+    assert revenue.headers['X-Cache'] == 'MISS'
+    assert revenue.get_json()['total_sessions'] == 1
+    summary = client.get('/api/user/cost-summary', headers=driver)
+    assert summary.headers['X-Cache'] == 'MISS'
+    assert summary.get_json()['total_sessions'] == 1
+
+    # Another driver's figures did not change and stay cached
+    assert client.get('/api/user/cost-summary', headers=other).headers['X-Cache'] == 'HIT'
+
+
+def test_lot_rename_invalidates_user_figures(app, client, admin_headers):
+    lot_id = make_lot(app, price_per_hour=40.0)
+    _, driver = make_user(app)
+    park_and_release(client, driver, lot_id, 'KA01')
+
+    client.get('/api/user/analytics/charts/personal', headers=driver)
+    assert client.get('/api/user/analytics/charts/personal', headers=driver).headers['X-Cache'] == 'HIT'
+
+    client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'address': 'New Address'})
+    assert client.get('/api/user/analytics/charts/personal', headers=driver).headers['X-Cache'] == 'HIT'
+
+    client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'name': 'Renamed Lot'})
+    charts = client.get('/api/user/analytics/charts/personal', headers=driver)
+    assert charts.headers['X-Cache'] == 'MISS'
+    assert charts.get_json()['summary']['most_used_lot'] == 'Renamed Lot'
+
+def test_lru_backend_evicts_oldest_and_expires():
+    backend = LRUBackend(max_entries=2)
+    backend.set('a', '1')
+    backend.set('b', '2')
+    backend.get_many(['a'])
+    backend.set('c', '3')
+    assert backend.get_many(['a', 'b', 'c']) == ['1', None, '3']
+
+    backend.set('short', 'x', ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get_many(['short']) == [None]
+    assert backend.add('c', 'other') == '3'
+
+
+def test_unreachable_redis_degrades_to_uncached(tmp_path, monkeypatch):
+    from app.models import db
+    from app.utils.schema import upgrade_schema
+
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'redis.db'}")
+    monkeypatch.setenv('CACHE_URL', 'redis://127.0.0.1:1/0')
+    flask_app = app_main.create_app()
+    flask_app.config['HOLD_SWEEPER'] = False
+    with flask_app.app_context():
+        db.create_all()
+        upgrade_schema()
+    _, admin = make_user(flask_app, username='admin', is_admin=True)
+
+    client = flask_app.test_client()
+    for _ in range(2):
+        response = client.get('/api/admin/analytics/revenue', headers=admin)
+        assert response.status_code == 200
+        assert response.headers['X-Cache'] == 'MISS'
+
+    with flask_app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,86 @@
+import json
+
+from conftest import count_queries, make_lot, make_user
+
+
+def stream_token(client, headers):
+    response = client.post('/api/user/availability/stream-token', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['token']
+
+
+def read_event(chunks):
+    """(event, data) of the next SSE message, skipping heartbeats"""
+    while True:
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(
+            line.split(': ', 1) for line in chunk.strip().splitlines()
+            if ': ' in line and not line.startswith(':')
+        )
+        if 'event' in fields:
+            return fields['event'], json.loads(fields['data'])
+
+
+def test_stream_sends_snapshot_then_deltas(app, client):
+    app.config['AVAILABILITY_HEARTBEAT'] = 0.2
+    lot_id = make_lot(app, total_spots=3)
+    make_lot(app, name='Quiet Lot', total_spots=2)
+    _, driver = make_user(app)
+    token = stream_token(client, driver)
+
+    response = client.get(f'/api/user/availability/stream?jwt={token}', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+
+    event, lots = read_event(chunks)
+    assert event == 'snapshot'
+    assert [(lot['lot_id'], lot['available_spots']) for lot in lots] == [(lot_id, 3), (lot_id + 1, 2)]
+
+    client.post('/api/user/reserve-spot', headers=driver, json={'lot_id': lot_id, 'vehicle_number': 'KA01'})
+    event, changed = read_event(chunks)
+    assert event == 'availability'
+    assert [(lot['lot_id'], lot['available_spots']) for lot in changed] == [(lot_id, 2)]
+
+    response.close()
+    assert not app.extensions['availability_hub'].subscribers
+
+
+def test_stream_requires_a_token(client):
+    assert client.get('/api/user/availability/stream').status_code == 401
+
+
+def test_stream_takes_only_stream_tokens(app, client):
+    _, driver = make_user(app)
+    access_token = driver['Authorization'].split()[1]
+    assert client.get(f'/api/user/availability/stream?jwt={access_token}').status_code == 401
+    assert client.get('/api/user/availability/stream', headers=driver).status_code == 401
+
+    # A stream token leaked from a URL opens nothing else
+    token = stream_token(client, driver)
+    response = client.get('/api/user/cost-summary', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 400
+
+
+def test_one_query_fans_out_to_every_subscriber(app):
+    from app.models import db
+    from app.models.parking_lot import ParkingLot
+
+    lot_id = make_lot(app)
+    hub = app.extensions['availability_hub']
+    subscriptions = [hub.subscribe() for _ in range(500)]
+
+    with app.app_context():
+        ParkingLot.adjust_spot_counts(lot_id, available=-1, occupied=1)
+        db.session.commit()
+
+    with count_queries(app) as statements, app.app_context():
+        changed = hub.refresh()
+    assert len(statements) == 1
+    assert changed[0]['occupied_spots'] == 1
+
+    messages = {subscription.next_message(timeout=0) for subscription in subscriptions}
+    assert len(messages) == 1 and 'event: availability' in messages.pop()
+    for subscription in subscriptions:
+        subscription.close()
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import count_queries, make_lot, make_user
+
+from app.models import db
+from app.models.reservation import Reservation
+
+
+@pytest.fixture
+def history(app):
+    lot_ids = [make_lot(app, name=name, total_spots=10) for name in ('Alpha', 'Beta', 'Gamma')]
+    user_id, user_headers = make_user(app)
+    _, admin_headers = make_user(app, username='admin', is_admin=True)
+
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(30):
+            start = now - timedelta(hours=3 * i + 2)
+            db.session.add(Reservation(
+                user_id=user_id, spot_id=i + 1, vehicle_number=f'KA{i:04d}', status='completed',
+                hourly_rate=40.0, total_cost=80.0, parking_start_time=start,
+                parking_end_time=start + timedelta(hours=2), created_at=start
+            ))
+        db.session.commit()
+
+    return lot_ids, user_headers, admin_headers
+
+
+def queries_for(app, client, url, headers):
+    with count_queries(app) as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+@pytest.mark.parametrize('url, role', [
+    ('/api/user/parking-history/detailed', 'user'),
+    ('/api/admin/reservations/detailed', 'admin'),
+])
+def test_detailed_listing_cost_is_independent_of_page_size(app, client, history, url, role):
+    _, user_headers, admin_headers = history
+    headers = user_headers if role == 'user' else admin_headers
+    # First request caches the principal; compare steady-state requests
+    client.get(url, headers=headers)
+
+    small, small_queries = queries_for(app, client, f'{url}?per_page=2', headers)
+    large, large_queries = queries_for(app, client, f'{url}?per_page=25', headers)
+
+    assert len(small['reservations']) == 2
+    assert len(large['reservations']) == 25
+    assert small_queries == large_queries
+
+    row = large['reservations'][0]
+    assert row['spot_details']['lot_name'] == row['lot_details']['name']
+
+
+def test_admin_detailed_lot_filter_still_applies(app, client, history):
+    lot_ids, _, admin_headers = history
+    body, _ = queries_for(app, client, f'/api/admin/reservations/detailed?lot_id={lot_ids[1]}&per_page=50',
+                          admin_headers)
+    assert body['pagination']['total'] == 10
+    assert {row['lot_details']['id'] for row in body['reservations']} == {lot_ids[1]}
+    assert body['reservations'][0]['user_details']['username'] == 'driver'
+
+
+def test_user_detailed_lot_filter_and_stats(app, client, history):
+    lot_ids, user_headers, _ = history
+    body, _ = queries_for(app, client, f'/api/user/parking-history/detailed?lot_id={lot_ids[2]}',
+                          user_headers)
+    assert body['pagination']['total'] == 10
+    assert body['statistics']['total_reservations'] == 30
+    assert body['statistics']['most_used_lot'] in ('Alpha', 'Beta', 'Gamma')
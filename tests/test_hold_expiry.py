@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from conftest import count_queries, make_lot, make_user
+
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.utils.hold_expiry import hold_expiry
+
+
+def reserve(client, headers, lot_id, vehicle):
+    response = client.post('/api/user/reserve-spot', headers=headers,
+                           json={'lot_id': lot_id, 'vehicle_number': vehicle})
+    assert response.status_code == 201
+    return response.get_json()['reservation']['id']
+
+
+def hold(app, client, lot_id, vehicle):
+    """Reserve a spot as a new driver; each driver may hold one spot"""
+    _, headers = make_user(app, username=f'driver_{vehicle.lower()}')
+    return reserve(client, headers, lot_id, vehicle)
+
+
+def backdate(app, reservation_ids, minutes):
+    with app.app_context():
+        for reservation in Reservation.query.filter(Reservation.id.in_(reservation_ids)):
+            reservation.reservation_time -= timedelta(minutes=minutes)
+        db.session.commit()
+
+
+def test_stale_holds_expire_in_batches(app, client):
+    app.config['HOLD_SWEEP_BATCH'] = 2
+    lot_id = make_lot(app, total_spots=10)
+    stale = [hold(app, client, lot_id, f'KA{i:02d}') for i in range(5)]
+    fresh = hold(app, client, lot_id, 'KA99')
+    backdate(app, stale, minutes=121)
+
+    with app.app_context():
+        assert hold_expiry.sweep() == 5
+
+        statuses = dict(db.session.query(Reservation.id, Reservation.status))
+        assert [statuses[i] for i in stale] == ['expired'] * 5
+        assert statuses[fresh] == 'reserved'
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, is_reserved=True).count() == 1
+        assert db.session.get(ParkingLot, lot_id).available_spot_count == 9
+
+        assert hold_expiry.sweep() == 0
+
+    # The freed spots are handed out again
+    for i in range(9):
+        hold(app, client, lot_id, f'KB{i:02d}')
+
+
+def test_sweep_is_set_based(app, client):
+    lot_id = make_lot(app, total_spots=60)
+    holds = [hold(app, client, lot_id, f'KA{i:02d}') for i in range(50)]
+    backdate(app, holds, minutes=180)
+
+    with count_queries(app) as statements, app.app_context():
+        assert hold_expiry.sweep() == 50
+    # Expire the holds, free their spots, fix the lot's counters
+    assert len(statements) == 3
+
+
+def test_expired_hold_cannot_start_parking(app, client):
+    lot_id = make_lot(app, total_spots=1)
+    _, driver = make_user(app)
+    reservation_id = reserve(client, driver, lot_id, 'KA01')
+
+    with app.app_context():
+        assert hold_expiry.sweep(now=datetime.utcnow() + timedelta(hours=3)) == 1
+
+    response = client.post(f'/api/user/occupy-spot/{reservation_id}', headers=driver)
+    assert response.status_code == 404
+    reserve(client, driver, lot_id, 'KA01')
+
+
+def test_deadlines_are_kept_in_order(app, client):
+    lot_id = make_lot(app)
+    hold(app, client, lot_id, 'KA01')
+    hold(app, client, lot_id, 'KA02')
+
+    sweeper = app.extensions['hold_expiry']
+    now = datetime.utcnow()
+    assert 119 * 60 < sweeper.next_delay(now) <= 120 * 60
+
+    sweeper.push(now + timedelta(minutes=5), 0)
+    assert sweeper.next_delay(now) == 5 * 60
+    assert sweeper.wake.is_set()
+
+    sweeper.pop_due(now + timedelta(hours=3))
+    assert sweeper.next_delay(now) is None
+
+
+def test_holds_left_by_a_previous_process_expire_after_restart(app, client):
+    import time
+    from conftest import app_main
+
+    lot_id = make_lot(app, total_spots=2)
+    holds = [hold(app, client, lot_id, f'KA{i:02d}') for i in range(2)]
+    backdate(app, holds, minutes=121)
+
+    # A fresh process with the sweeper on; nobody reserves anything there
+    restarted = app_main.create_app()
+    restarted.config['HOLD_SWEEP_INTERVAL'] = 3600
+    assert restarted.test_client().get('/api/health').status_code == 200
+
+    deadline = time.monotonic() + 10
+    with restarted.app_context():
+        while time.monotonic() < deadline:
+            statuses = {status for status, in db.session.query(Reservation.status)}
+            db.session.remove()
+            if statuses == {'expired'}:
+                break
+            time.sleep(0.05)
+        assert statuses == {'expired'}
+        assert db.session.get(ParkingLot, lot_id).available_spot_count == 2
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import count_queries, make_lot, make_user
+
+from app.models import db
+from app.models.reservation import Reservation
+
+
+@pytest.fixture
+def history(app):
+    make_lot(app, total_spots=10)
+    user_id, user_headers = make_user(app)
+    _, admin_headers = make_user(app, username='admin', is_admin=True)
+
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(23):
+            # Pairs share a created_at, so the id tie-break matters
+            db.session.add(Reservation(
+                user_id=user_id, spot_id=i % 10 + 1, vehicle_number=f'KA{i:04d}', status='completed',
+                hourly_rate=40.0, total_cost=40.0, created_at=now - timedelta(hours=i // 2)
+            ))
+        db.session.commit()
+    return user_headers, admin_headers
+
+
+def walk(client, url, headers, per_page):
+    ids, cursor = [], ''
+    while cursor is not None:
+        body = client.get(f'{url}?per_page={per_page}&cursor={cursor}', headers=headers).get_json()
+        ids += [row['id'] for row in body['reservations']]
+        cursor = body['pagination']['next_cursor']
+    return ids
+
+
+@pytest.mark.parametrize('url, role', [
+    ('/api/user/parking-history', 'user'),
+    ('/api/user/parking-history/detailed', 'user'),
+    ('/api/admin/reservations', 'admin'),
+    ('/api/admin/reservations/detailed', 'admin'),
+])
+def test_cursor_walk_matches_page_order(client, history, url, role):
+    headers = history[0] if role == 'user' else history[1]
+
+    paged = client.get(f'{url}?per_page=50', headers=headers).get_json()
+    expected = [row['id'] for row in paged['reservations']]
+    assert len(expected) == 23
+    assert walk(client, url, headers, per_page=4) == expected
+
+
+def test_cursor_pages_skip_the_count(app, client, history):
+    _, admin_headers = history
+    first = client.get('/api/admin/reservations?per_page=5&cursor=', headers=admin_headers).get_json()
+
+    with count_queries(app) as statements:
+        body = client.get(f"/api/admin/reservations?per_page=5&cursor={first['pagination']['next_cursor']}",
+                          headers=admin_headers).get_json()
+    assert not [sql for sql in statements if 'count(' in sql.lower()]
+    assert 'total' not in body['pagination']
+    assert body['pagination']['has_next'] is True
+
+    counted = client.get('/api/admin/reservations?cursor=&include_total=1', headers=admin_headers).get_json()
+    assert counted['pagination']['total'] == 23
+
+
+def test_page_mode_is_unchanged_and_offers_a_cursor(client, history):
+    _, admin_headers = history
+    body = client.get('/api/admin/reservations?page=2&per_page=10', headers=admin_headers).get_json()
+    assert body['pagination']['page'] == 2
+    assert body['pagination']['total'] == 23
+    assert body['pagination']['pages'] == 3
+    assert body['pagination']['next_cursor']
+
+
+def test_bad_cursor_is_rejected(client, history):
+    _, admin_headers = history
+    response = client.get('/api/admin/reservations?cursor=not-a-cursor', headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+
+def test_detailed_statistics_are_aggregated_in_sql(app, client):
+    from app.utils.helpers import calculate_user_statistics
+
+    make_lot(app, total_spots=10)
+    user_id, headers = make_user(app)
+    now = datetime.utcnow()
+    with app.app_context():
+        for i, (status, minutes, cost) in enumerate([
+            ('completed', 95, 80.0), ('completed', 30, 40.0), ('completed', None, 0.0),
+            ('active', None, 0.0), ('reserved', None, 0.0),
+        ]):
+            start = now - timedelta(hours=i + 3) if minutes or status == 'active' else None
+            db.session.add(Reservation(
+                user_id=user_id, spot_id=i + 1, vehicle_number=f'KA{i:04d}', status=status,
+                hourly_rate=40.0, total_cost=cost, created_at=now - timedelta(days=i),
+                parking_start_time=start, parking_end_time=start + timedelta(minutes=minutes) if minutes else None
+            ))
+        db.session.commit()
+        expected = calculate_user_statistics(user_id)
+
+    with count_queries(app) as statements:
+        stats = client.get('/api/user/parking-history/detailed', headers=headers).get_json()['statistics']
+    assert stats == pytest.approx(expected)
+    assert stats['total_hours_parked'] == 2.08 and stats['average_session_cost'] == 60.0
+    # Neither statistics statement loads reservation rows
+    assert not any('reservations.vehicle_number' in sql for sql in statements[-2:])
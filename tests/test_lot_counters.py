@@ -0,0 +1,74 @@
+from conftest import make_lot, make_user
+
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+
+
+def lot_counts(app, lot_id):
+    with app.app_context():
+        lot = db.session.get(ParkingLot, lot_id)
+        return lot.available_spot_count, lot.occupied_spot_count, lot.active_spot_count
+
+
+def test_counters_follow_reservation_lifecycle(app, client):
+    lot_id = make_lot(app, total_spots=5)
+    _, headers = make_user(app)
+    _, other = make_user(app, username='other')
+    _, admin_headers = make_user(app, username='admin', is_admin=True)
+
+    first = client.post('/api/user/reserve-spot', headers=headers,
+                        json={'lot_id': lot_id, 'vehicle_number': 'KA01AB1234'}).get_json()
+    second = client.post('/api/user/reserve-spot', headers=other,
+                         json={'lot_id': lot_id, 'vehicle_number': 'KA01AB5678'}).get_json()
+    assert first['lot']['available_spots'] == 4
+    assert lot_counts(app, lot_id) == (3, 0, 5)
+
+    client.post(f"/api/user/occupy-spot/{first['reservation']['id']}", headers=headers)
+    assert lot_counts(app, lot_id) == (3, 1, 5)
+
+    client.post(f"/api/user/release-spot/{first['reservation']['id']}", headers=headers)
+    assert lot_counts(app, lot_id) == (4, 0, 5)
+
+    client.post(f"/api/user/occupy-spot/{second['reservation']['id']}", headers=other)
+    response = client.post(f"/api/admin/spots/{second['spot']['id']}/force-release", headers=admin_headers)
+    assert response.status_code == 200
+    assert lot_counts(app, lot_id) == (5, 0, 5)
+
+
+def test_reconcile_rebuilds_counters_from_spots(app):
+    lot_id = make_lot(app, total_spots=6)
+
+    with app.app_context():
+        spots = ParkingSpot.query.filter_by(lot_id=lot_id).order_by(ParkingSpot.id).all()
+        spots[0].is_occupied = True
+        spots[1].is_reserved = True
+        spots[2].is_active = False
+        db.session.get(ParkingLot, lot_id).available_spot_count = 42
+        db.session.commit()
+
+        assert ParkingLot.reconcile_spot_counts() == 1
+        db.session.commit()
+
+    assert lot_counts(app, lot_id) == (3, 1, 5)
+
+
+def test_reconcile_command(app):
+    lot_id = make_lot(app, total_spots=4)
+    with app.app_context():
+        db.session.get(ParkingLot, lot_id).available_spot_count = 0
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['reconcile-lot-counters'])
+    assert 'Reconciled spot counters for 1 parking lots' in result.output
+    assert lot_counts(app, lot_id) == (4, 0, 4)
+
+
+def test_lot_serialization_does_not_load_spots(app):
+    lot_id = make_lot(app, total_spots=3)
+
+    with app.app_context():
+        lot = db.session.get(ParkingLot, lot_id)
+        data = lot.to_dict()
+        assert data['available_spots'] == 3
+        assert 'parking_spots' not in lot.__dict__
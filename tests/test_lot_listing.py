@@ -0,0 +1,62 @@
+from conftest import count_queries, make_lot, make_user
+
+
+def get_lots(client, headers, etag=None):
+    if etag:
+        headers = {**headers, 'If-None-Match': etag}
+    return client.get('/api/user/parking-lots', headers=headers)
+
+
+def test_unchanged_listing_is_a_304_without_spot_queries(app, client):
+    make_lot(app, total_spots=4)
+    _, headers = make_user(app)
+
+    first = get_lots(client, headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert len(first.get_json()['parking_lots'][0]['available_spots_details']) == 4
+
+    with count_queries(app) as statements:
+        again = get_lots(client, headers, etag)
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert not any('parking_spots' in sql for sql in statements)
+
+
+def test_etag_changes_with_spot_state_and_lot_edits(app, client, admin_headers):
+    lot_id = make_lot(app, total_spots=4)
+    _, headers = make_user(app)
+    etag = get_lots(client, headers).headers['ETag']
+
+    reservation = client.post('/api/user/reserve-spot', headers=headers,
+                              json={'lot_id': lot_id, 'vehicle_number': 'KA01'}).get_json()['reservation']
+    after_reserve = get_lots(client, headers, etag)
+    assert after_reserve.status_code == 200
+    assert len(after_reserve.get_json()['parking_lots'][0]['available_spots_details']) == 3
+
+    etag = after_reserve.headers['ETag']
+    client.post(f"/api/user/occupy-spot/{reservation['id']}", headers=headers)
+    etag_occupied = get_lots(client, headers, etag).headers['ETag']
+    assert etag_occupied != etag
+
+    client.post(f"/api/user/release-spot/{reservation['id']}", headers=headers)
+    after_release = get_lots(client, headers, etag_occupied)
+    assert after_release.status_code == 200
+    etag = after_release.headers['ETag']
+
+    client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'name': 'Renamed'})
+    renamed = get_lots(client, headers, etag)
+    assert renamed.status_code == 200
+    assert renamed.get_json()['parking_lots'][0]['name'] == 'Renamed'
+
+
+def test_cached_body_is_reused_across_clients(app, client):
+    make_lot(app, total_spots=3)
+    _, first = make_user(app)
+    _, second = make_user(app, username='rider')
+
+    get_lots(client, first)
+    with count_queries(app) as statements:
+        response = get_lots(client, second)
+    assert response.status_code == 200
+    assert not any('parking_spots' in sql for sql in statements)
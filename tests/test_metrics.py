@@ -0,0 +1,75 @@
+import re
+
+from conftest import make_lot, make_user
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? -?[0-9.e+-]+$')
+
+
+def scrape(client, **kwargs):
+    response = client.get('/metrics', **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    lines = response.get_data(as_text=True).splitlines()
+    assert all(line.startswith('# ') or SAMPLE.match(line) for line in lines), lines
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in lines if not line.startswith('#')}
+
+
+def test_requests_are_measured_per_route_and_status(app, client):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    for _ in range(3):
+        assert client.get('/api/user/dashboard', headers=driver).status_code == 200
+    client.get('/api/user/reservations/999', headers=driver)
+    client.post('/api/user/reserve-spot', headers=driver, json={'lot_id': lot_id, 'vehicle_number': 'KA01'})
+
+    samples = scrape(client)
+    route = 'method="GET",route="/api/user/dashboard",status="200"'
+    assert samples[f'parking_http_request_duration_seconds_count{{{route}}}'] == 3
+    assert samples[f'parking_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 3
+    assert samples[f'parking_http_request_duration_seconds_sum{{{route}}}'] > 0
+    missing = 'method="GET",route="/api/user/reservations/<int:reservation_id>",status="404"'
+    assert samples[f'parking_http_request_duration_seconds_count{{{missing}}}'] == 1
+
+    # The scrape itself is the request in flight
+    assert samples['parking_http_requests_in_flight'] == 1
+    assert samples['parking_db_pool_checkout_seconds_count'] > 0
+    assert samples['parking_cache_requests_total{cache="principal",result="miss"}'] == 1
+    assert samples['parking_cache_requests_total{cache="principal",result="hit"}'] >= 4
+    assert samples['parking_hold_deadlines'] == 1
+    assert samples['parking_report_jobs_queued'] == 0
+    assert samples['parking_password_hashes_in_flight'] == 0
+
+
+def test_analytics_cache_hit_rate(app, client):
+    _, admin = make_user(app, username='admin', is_admin=True)
+    for _ in range(3):
+        client.get('/api/admin/analytics/charts/revenue-breakdown', headers=admin)
+    samples = scrape(client)
+    assert samples['parking_cache_requests_total{cache="analytics",result="miss"}'] == 1
+    assert samples['parking_cache_requests_total{cache="analytics",result="hit"}'] == 2
+
+
+def test_metrics_token(app, client):
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    scrape(client, headers={'Authorization': 'Bearer s3cret'})
+
+
+def test_health_checks_the_database(app, client, monkeypatch):
+    body = client.get('/api/health').get_json()
+    assert body['status'] == 'healthy'
+    assert body['checks']['database']['status'] == 'up'
+    assert body['checks']['database']['latency_ms'] >= 0
+
+    from app.models import db
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError('connection refused by db.internal:5432')
+
+    monkeypatch.setattr(db.session, 'execute', unreachable)
+    response = client.get('/api/health')
+    assert response.status_code == 503
+    database = response.get_json()['checks']['database']
+    assert database == {'status': 'down', 'latency_ms': database['latency_ms']}
+    assert 'db.internal' not in response.get_data(as_text=True)
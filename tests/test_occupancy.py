@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from conftest import make_lot, make_user
+
+from app.models import db
+from app.models.reservation import Reservation
+from app.utils.occupancy import occupancy_series, sweep
+
+
+def test_sweep_matches_brute_force():
+    rng = np.random.default_rng(7)
+    starts = np.round(rng.uniform(-600, 6000, 300))
+    ends = starts + np.round(rng.uniform(1, 900, 300))
+    edges = np.arange(0, 5401, 900.0)
+
+    peak, average, arrivals, sessions = sweep(starts, ends, edges)
+
+    seconds = np.arange(0, 5400)
+    level = ((starts[:, None] <= seconds) & (ends[:, None] > seconds)).sum(axis=0).reshape(-1, 900)
+    assert peak.tolist() == level.max(axis=1).tolist()
+    assert np.allclose(average, level.mean(axis=1))
+    assert arrivals.tolist() == [int(((starts >= a) & (starts < a + 900)).sum()) for a in edges[:-1]]
+    assert sessions.tolist() == [int(((starts < a + 900) & (ends > a)).sum()) for a in edges[:-1]]
+
+
+def add_session(lot_spot, user_id, start, end, status='completed'):
+    db.session.add(Reservation(
+        user_id=user_id, spot_id=lot_spot, vehicle_number=f'KA{lot_spot}{start:%H%M}',
+        status=status, hourly_rate=40.0, total_cost=40.0,
+        parking_start_time=start, parking_end_time=end, reservation_time=start
+    ))
+
+
+def test_concurrent_occupancy_per_lot(app):
+    first = make_lot(app, total_spots=3)
+    second = make_lot(app, name='Second Lot', total_spots=3)
+    user_id, _ = make_user(app)
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    with app.app_context():
+        # Lot 1 (spots 1-3): 9-11 and 10-12 overlap, 12-13 touches but does not
+        add_session(1, user_id, day + timedelta(hours=9), day + timedelta(hours=11))
+        add_session(2, user_id, day + timedelta(hours=10), day + timedelta(hours=12))
+        add_session(3, user_id, day + timedelta(hours=12), day + timedelta(hours=13))
+        # Lot 2 (spot 4): one session spanning midnight into the window
+        add_session(4, user_id, day - timedelta(hours=2), day + timedelta(hours=1))
+        db.session.commit()
+
+        series = occupancy_series(day, day + timedelta(days=1), '1h')
+
+    assert series['lots'][first]['peak'][9:13] == [1, 2, 1, 1]
+    assert series['lots'][first]['average'][11] == 1.0
+    assert series['lots'][first]['arrivals'][9:13] == [1, 1, 0, 1]
+    assert series['lots'][second]['peak'][:2] == [1, 0]
+    assert series['lots'][second]['arrivals'][0] == 0
+    assert series['total']['peak'][0] == 1
+    assert max(series['total']['peak']) == 2
+
+
+def test_occupancy_endpoint_reports_peaks(app, client, admin_headers):
+    make_lot(app, total_spots=3)
+    user_id, _ = make_user(app)
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=2)
+    with app.app_context():
+        add_session(1, user_id, day + timedelta(hours=9), day + timedelta(hours=11))
+        add_session(2, user_id, day + timedelta(hours=10), day + timedelta(hours=12))
+        db.session.commit()
+
+    body = client.get('/api/admin/analytics/occupancy?resolution=15m', headers=admin_headers).get_json()
+    by_date = {item['date']: item for item in body['historical_occupancy']}
+    assert len(by_date) == 7
+    assert by_date[day.strftime('%Y-%m-%d')]['active_sessions'] == 2
+    assert by_date[day.strftime('%Y-%m-%d')]['peak_occupancy'] == 2
+    assert len(body['occupancy_timeline']['labels']) == 7 * 96
+    assert max(body['occupancy_timeline']['lots']['Test Lot']['peak']) == 2
+
+    assert client.get('/api/admin/analytics/occupancy?resolution=5m', headers=admin_headers).status_code == 400
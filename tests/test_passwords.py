@@ -0,0 +1,140 @@
+import pytest
+
+from conftest import make_user
+
+from app.models import db
+from app.models.user import User
+
+FAST_METHOD = 'pbkdf2:sha256:1000'
+
+
+def login(client, password='secret123', email='driver@test.com'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def stored_hash(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).password_hash
+
+
+def test_hash_is_upgraded_on_login(app, client):
+    user_id, _ = make_user(app)
+    assert not stored_hash(app, user_id).startswith(FAST_METHOD + '$')
+
+    app.config['PASSWORD_HASH_METHOD'] = FAST_METHOD
+    assert login(client).status_code == 200
+    upgraded = stored_hash(app, user_id)
+    assert upgraded.startswith(FAST_METHOD + '$')
+
+    assert login(client).status_code == 200
+    assert stored_hash(app, user_id) == upgraded
+
+
+def test_register_uses_the_configured_cost(app, client):
+    app.config['PASSWORD_HASH_METHOD'] = FAST_METHOD
+    response = client.post('/api/auth/register', json={
+        'username': 'newbie', 'email': 'newbie@test.com', 'password': 'secret123',
+        'full_name': 'New Bie', 'phone': '9000000000', 'address': 'Somewhere', 'pin_code': '560001'
+    })
+    assert response.status_code == 201
+    assert stored_hash(app, response.get_json()['user']['id']).startswith(FAST_METHOD + '$')
+    assert login(client, email='newbie@test.com').status_code == 200
+
+
+def test_failed_logins_are_limited_before_hashing(app, client, monkeypatch):
+    app.config['LOGIN_MAX_FAILURES_PER_ACCOUNT'] = 3
+    app.config['LOGIN_MAX_FAILURES_PER_ADDRESS'] = 5
+    make_user(app)
+    make_user(app, username='other')
+
+    for _ in range(3):
+        assert login(client, password='wrong').status_code == 401
+
+    hashed = []
+    monkeypatch.setattr('app.utils.passwords.check_password_hash', lambda *args: hashed.append(args))
+    response = login(client)
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= app.config['LOGIN_ATTEMPT_WINDOW'] + 1
+    assert not hashed
+    monkeypatch.undo()
+
+    # Other accounts stay open until the address itself hits its limit
+    assert login(client, email='other@test.com').status_code == 200
+    for _ in range(2):
+        assert login(client, password='wrong', email='other@test.com').status_code == 401
+    assert login(client, email='other@test.com').status_code == 429
+
+
+def test_saturated_pool_answers_503(app, client):
+    make_user(app)
+    pool = app.extensions['password_hasher']
+    held = 0
+    while pool.admit():
+        held += 1
+    assert pool.in_flight() == pool.capacity
+    try:
+        response = login(client)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        for _ in range(held):
+            pool.release()
+    assert pool.in_flight() == 0
+    assert login(client).status_code == 200
+
+
+@pytest.mark.parametrize('method', ['scrypt', FAST_METHOD])
+def test_needs_rehash_matches_expanded_methods(app, method):
+    from werkzeug.security import generate_password_hash
+    from app.utils.passwords import password_hasher
+
+    app.config['PASSWORD_HASH_METHOD'] = method
+    with app.app_context():
+        assert not password_hasher.needs_rehash(generate_password_hash('x', method))
+        assert password_hasher.needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:2000'))
+
+
+def test_counters_survive_cache_eviction(app, client):
+    from app.utils.cache import cache_backend
+
+    app.config['LOGIN_MAX_FAILURES_PER_ACCOUNT'] = 2
+    make_user(app)
+    for _ in range(2):
+        assert login(client, password='wrong').status_code == 401
+
+    with app.app_context():
+        backend = cache_backend()
+        for n in range(backend.max_entries + 1):
+            backend.set(f'filler:{n}', 'x')
+    assert login(client).status_code == 429
+
+
+def test_address_limit_uses_the_forwarded_client(app, monkeypatch):
+    from conftest import app_main
+
+    monkeypatch.setenv('TRUSTED_PROXY_HOPS', '1')
+    proxied = app_main.create_app()
+    proxied.config['HOLD_SWEEPER'] = False
+    proxied.config['LOGIN_MAX_FAILURES_PER_ADDRESS'] = 2
+    proxied_client = proxied.test_client()
+    make_user(app)
+
+    def attempt(forwarded_for, password='wrong'):
+        return proxied_client.post('/api/auth/login', json={'email': 'driver@test.com', 'password': password},
+                                   headers={'X-Forwarded-For': forwarded_for})
+
+    # The proxy appends the real client; a spoofed earlier entry is ignored
+    for _ in range(2):
+        assert attempt('1.2.3.4, 203.0.113.7').status_code == 401
+    assert attempt('5.6.7.8, 203.0.113.7').status_code == 429
+    assert attempt('203.0.113.8', password='secret123').status_code == 200
+    with proxied.app_context():
+        db.engine.dispose()
+
+
+def test_shared_limits_require_redis(monkeypatch):
+    from conftest import app_main
+
+    monkeypatch.setenv('LOGIN_LIMITER_REQUIRE_SHARED', '1')
+    with pytest.raises(RuntimeError, match='CACHE_URL'):
+        app_main.create_app()
@@ -0,0 +1,60 @@
+from conftest import count_queries, make_user
+
+from app.models.user import User
+from app.utils.principals import principal_cache
+
+
+def user_lookups(statements):
+    return [sql for sql in statements if sql.lstrip().upper().startswith('SELECT USERS.')]
+
+
+def test_repeat_requests_authorize_without_loading_the_user(app, client, user_headers):
+    client.get('/api/user/parking-history', headers=user_headers)
+
+    with count_queries(app) as statements:
+        response = client.get('/api/user/parking-history', headers=user_headers)
+    assert response.status_code == 200
+    assert user_lookups(statements) == []
+
+
+def test_deactivation_takes_effect_on_the_next_request(app, client, admin_headers):
+    user_id, driver = make_user(app)
+    assert client.get('/api/user/parking-history', headers=driver).status_code == 200
+
+    toggled = client.post(f'/api/admin/users/{user_id}/toggle-status', headers=admin_headers)
+    assert toggled.get_json()['user']['is_active'] is False
+    assert client.get('/api/user/parking-history', headers=driver).status_code == 401
+
+    client.post(f'/api/admin/users/{user_id}/toggle-status', headers=admin_headers)
+    assert client.get('/api/user/parking-history', headers=driver).status_code == 200
+
+
+def test_cached_principal_still_enforces_admin_role(app, client, user_headers):
+    client.get('/api/user/parking-history', headers=user_headers)
+    assert client.get('/api/admin/dashboard', headers=user_headers).status_code == 403
+
+
+def test_a_miss_never_overwrites_a_fresher_entry(app, user_headers, monkeypatch):
+    from app.utils.cache import cache_backend
+
+    with app.test_request_context():
+        user = User.query.filter_by(username='driver').one()
+        backend = cache_backend()
+        # Our lookup missed, then the admin's deactivation was stored
+        # before our fill, from a row read before that commit
+        monkeypatch.setattr(backend, 'get_many', lambda keys: [None] * len(keys))
+        user.is_active = False
+        principal_cache.remember(user)
+        user.is_active = True
+
+        assert principal_cache.load(user.id).is_active is False
+
+
+def test_per_process_backend_is_not_trusted_by_default(app, client, user_headers):
+    app.config['PRINCIPAL_CACHE_LOCAL'] = False
+    client.get('/api/user/parking-history', headers=user_headers)
+
+    with count_queries(app) as statements:
+        response = client.get('/api/user/parking-history', headers=user_headers)
+    assert response.status_code == 200
+    assert len(user_lookups(statements)) == 1
@@ -0,0 +1,73 @@
+from conftest import make_lot, make_user, park_and_release
+
+
+def seed_sessions(app, client):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    for n in range(3):
+        park_and_release(client, driver, lot_id, f'KA{n:02d}')
+    return driver, make_user(app, username='admin', is_admin=True)[1]
+
+
+def test_admin_can_profile_a_request(app, client):
+    _, admin = seed_sessions(app, client)
+    path = '/api/admin/analytics/charts/revenue-breakdown'
+    client.get(path, headers=admin)
+
+    response = client.get(f'{path}?profile=1', headers=admin)
+    assert response.status_code == 200
+    # The cached body is bypassed so the profile shows the real work
+    assert response.headers['X-Cache'] == 'MISS'
+    profile_id = response.headers['X-Profile-Id']
+
+    report = client.get(f'/api/admin/profiles/{profile_id}', headers=admin).get_json()['profile']
+    assert report['endpoint'] == 'admin.get_revenue_breakdown_charts'
+    assert report['trigger'] == 'admin'
+    assert report['path'] == path
+    assert report['sql_count'] > 0 and report['sql_ms'] >= 0
+    assert report['serialization_ms'] >= report['json_encode_ms'] > 0
+    assert report['total_ms'] >= report['sql_ms']
+    functions = {row['function'] for row in report['top_cumulative']}
+    assert 'get_revenue_breakdown_charts' in functions
+
+    listed = client.get('/api/admin/profiles', headers=admin).get_json()['endpoints']
+    assert [entry['id'] for entry in listed['admin.get_revenue_breakdown_charts']] == [profile_id]
+
+
+def test_drivers_cannot_ask_for_profiles(app, client):
+    driver, admin = seed_sessions(app, client)
+    response = client.get('/api/user/cost-summary?profile=1', headers=driver)
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+    assert client.get('/api/admin/profiles', headers=admin).get_json()['endpoints'] == {}
+    assert client.get('/api/admin/profiles', headers=driver).status_code == 403
+
+
+def test_sampled_requests_keep_the_slowest(app, client):
+    driver, admin = seed_sessions(app, client)
+    app.config['PROFILER_SAMPLE_RATE'] = 1.0
+    app.config['PROFILER_KEEP_PER_ENDPOINT'] = 2
+    for _ in range(4):
+        response = client.get('/api/user/parking-history', headers=driver)
+        assert 'X-Profile-Id' not in response.headers
+    app.config['PROFILER_SAMPLE_RATE'] = 0.0
+
+    slowest = client.get('/api/admin/profiles', headers=admin).get_json()['endpoints']['user.parking_history']
+    assert len(slowest) == 2
+    assert slowest[0]['total_ms'] >= slowest[1]['total_ms']
+    assert {entry['trigger'] for entry in slowest} == {'sample'}
+    report = client.get(f"/api/admin/profiles/{slowest[0]['id']}", headers=admin).get_json()['profile']
+    assert report['top_functions']
+
+
+def test_reports_survive_cache_eviction(app, client):
+    from app.utils.cache import cache_backend
+
+    _, admin = seed_sessions(app, client)
+    profile_id = client.get('/api/admin/analytics/revenue?profile=1', headers=admin).headers['X-Profile-Id']
+
+    with app.app_context():
+        backend = cache_backend()
+        for n in range(backend.max_entries + 1):
+            backend.set(f'filler:{n}', 'x')
+    assert client.get(f'/api/admin/profiles/{profile_id}', headers=admin).status_code == 200
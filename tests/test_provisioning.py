@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from conftest import make_lot, make_user
+
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.utils.hold_expiry import hold_expiry
+
+
+def spot_states(app, lot_id):
+    with app.app_context():
+        spots = ParkingSpot.query.filter_by(lot_id=lot_id).order_by(ParkingSpot.id).all()
+        return [(spot.spot_number, spot.is_active) for spot in spots]
+
+
+def test_create_lot_provisions_spots_in_bulk(app, client, admin_headers):
+    response = client.post('/api/admin/parking-lots', headers=admin_headers, json={
+        'name': 'garage', 'address': 'Ring Road', 'pin_code': '560002',
+        'total_spots': 1200, 'price_per_hour': 30
+    })
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['spots_created'] == 1200
+    assert body['spot_numbers'][:2] == ['G001', 'G002']
+    assert body['parking_lot']['available_spots'] == 1200
+
+    states = spot_states(app, body['parking_lot']['id'])
+    assert len(states) == 1200
+    assert states[-1] == ('G1200', True)
+
+
+def test_resize_grows_and_shrinks_lot(app, client, admin_headers):
+    lot_id = make_lot(app, name='Metro', total_spots=5)
+
+    response = client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'total_spots': 3})
+    assert response.status_code == 200
+    assert response.get_json()['parking_lot']['available_spots'] == 3
+    assert [active for _, active in spot_states(app, lot_id)] == [True, True, True, False, False]
+
+    response = client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'total_spots': 7})
+    assert response.status_code == 200
+    lot = response.get_json()['parking_lot']
+    assert (lot['total_spots'], lot['available_spots']) == (7, 7)
+    # Removed spots come back before new ones are numbered
+    assert spot_states(app, lot_id)[-2:] == [('M006', True), ('M007', True)]
+
+
+def test_shrink_never_removes_busy_spots(app, client, admin_headers):
+    lot_id = make_lot(app, total_spots=3)
+    for vehicle in ('KA01', 'KA02'):
+        _, headers = make_user(app, username=f'driver{vehicle}')
+        client.post('/api/user/reserve-spot', headers=headers, json={'lot_id': lot_id, 'vehicle_number': vehicle})
+
+    response = client.put(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers, json={'total_spots': 1})
+    assert response.status_code == 400
+
+    with app.app_context():
+        lot = db.session.get(ParkingLot, lot_id)
+        assert (lot.total_spots, lot.active_spot_count, lot.available_spot_count) == (3, 3, 1)
+
+
+def test_lot_with_held_spots_cannot_be_deleted(app, client, admin_headers):
+    lot_id = make_lot(app, total_spots=2)
+    _, headers = make_user(app)
+    client.post('/api/user/reserve-spot', headers=headers, json={'lot_id': lot_id, 'vehicle_number': 'KA01'})
+
+    response = client.delete(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers)
+    assert response.status_code == 400
+    with app.app_context():
+        assert ParkingSpot.query.filter_by(lot_id=lot_id).count() == 2
+
+    with app.app_context():
+        assert hold_expiry.sweep(now=datetime.utcnow() + timedelta(hours=3)) == 1
+    response = client.delete(f'/api/admin/parking-lots/{lot_id}', headers=admin_headers)
+    assert response.status_code == 200
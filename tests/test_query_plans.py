@@ -0,0 +1,145 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot routes
+Every statement a route sends against reservations or parking_spots is
+re-run under EXPLAIN QUERY PLAN; a plain 'SCAN <table>' (no index) fails.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from conftest import make_lot, make_user
+
+from app.models import db
+from app.models.reservation import Reservation
+from app.utils.pagination import encode_cursor
+from app.utils.schema import create_missing_indexes, upgrade_schema
+
+HOT_TABLES = ('reservations', 'parking_spots')
+
+USER_ROUTES = [
+    '/api/user/dashboard',
+    '/api/user/parking-lots',
+    '/api/user/parking-history',
+    f'/api/user/parking-history?cursor={encode_cursor(datetime(2100, 1, 1), 1)}',
+    '/api/user/parking-history/detailed',
+    '/api/user/cost-summary',
+    '/api/user/active-reservation',
+    '/api/user/analytics/charts/personal',
+    '/api/user/analytics/charts/cost-analysis',
+]
+
+ADMIN_ROUTES = [
+    '/api/admin/dashboard',
+    '/api/admin/users',
+    '/api/admin/reservations',
+    '/api/admin/reservations?status=active',
+    '/api/admin/reservations?cursor=&status=completed',
+    '/api/admin/reservations/detailed?lot_id=1',
+    '/api/admin/analytics/revenue',
+    '/api/admin/analytics/occupancy',
+    '/api/admin/analytics/charts/dashboard',
+    '/api/admin/analytics/charts/revenue-breakdown',
+]
+
+
+@pytest.fixture
+def seeded(app):
+    lot_id = make_lot(app, total_spots=20)
+    user_id, user_headers = make_user(app)
+    _, admin_headers = make_user(app, username='admin', is_admin=True)
+
+    # Other drivers' history, so per-user lookups are selective as in production
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(300):
+            status = ('completed', 'active', 'reserved')[i % 3]
+            start = now - timedelta(hours=i * 5) if status != 'reserved' else None
+            end = start + timedelta(hours=2) if status == 'completed' else None
+            db.session.add(Reservation(
+                user_id=user_id if i < 30 else 100 + i % 50, spot_id=(i % 20) + 1,
+                vehicle_number=f'KA{i:04d}',
+                status=status, hourly_rate=40.0, total_cost=80.0 if end else 0.0,
+                parking_start_time=start, parking_end_time=end,
+                reservation_time=now - timedelta(hours=i * 5, minutes=10),
+                created_at=now - timedelta(hours=i * 5, minutes=10)
+            ))
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    return lot_id, user_headers, admin_headers
+
+
+def capture_statements(app, client, headers, routes):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and any(re.search(rf'\b{t}\b', statement) for t in HOT_TABLES):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for route in routes:
+            assert client.get(route, headers=headers).status_code == 200, route
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+
+def full_scans(app, statements):
+    offenders = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                for row in plan:
+                    detail = row[-1]
+                    match = re.match(r'SCAN (\w+)', detail)
+                    if match and match.group(1) in HOT_TABLES and 'INDEX' not in detail:
+                        offenders.append((detail, statement))
+    return offenders
+
+
+def test_user_routes_use_indexes(app, client, seeded):
+    _, user_headers, _ = seeded
+    statements = capture_statements(app, client, user_headers, USER_ROUTES)
+    assert statements
+    assert full_scans(app, statements) == []
+
+
+def test_admin_routes_use_indexes(app, client, seeded):
+    _, _, admin_headers = seeded
+    statements = capture_statements(app, client, admin_headers, ADMIN_ROUTES)
+    assert statements
+    assert full_scans(app, statements) == []
+
+
+def test_index_upgrade_is_idempotent(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('DROP INDEX ix_reservations_user_status')
+            conn.exec_driver_sql('DROP INDEX ix_reservations_active_spot')
+
+        assert sorted(create_missing_indexes()) == ['ix_reservations_active_spot', 'ix_reservations_user_status']
+        assert upgrade_schema() == []
+
+        index_sql = db.session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'ix_reservations_active_spot'"
+        )).scalar()
+        assert "WHERE status = 'active'" in index_sql
+
+
+def test_upgrade_drops_superseded_indexes(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('CREATE INDEX ix_reservations_status_end ON reservations (status, parking_end_time)')
+
+        assert upgrade_schema() == ['-ix_reservations_status_end']
+        assert upgrade_schema() == []
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+
+from conftest import assert_query_budget, count_queries, make_lot, make_user, park_and_release
+
+
+@pytest.fixture
+def history(app, client):
+    """Two drivers with sessions spread over three lots, one driver parked now"""
+    lots = [make_lot(app, name=f'Lot {n}', total_spots=5) for n in range(3)]
+    _, driver = make_user(app)
+    _, other = make_user(app, username='other')
+    for n in range(9):
+        park_and_release(client, driver, lots[n % 3], f'KA{n:02d}')
+        park_and_release(client, other, lots[n % 3], f'KB{n:02d}')
+    park_and_release(client, driver, lots[0], 'KA99', release=False)
+    return driver, make_user(app, username='admin', is_admin=True)[1]
+
+
+def test_count_matches_the_engine(app, client, history):
+    driver, _ = history
+    with count_queries(app) as statements:
+        response = client.get('/api/user/parking-history/detailed', headers=driver)
+    assert int(response.headers['X-Query-Count']) == len(statements)
+
+    timing = response.headers['Server-Timing']
+    assert re.fullmatch(rf'db;dur=[\d.]+;desc="{len(statements)} queries", app;dur=[\d.]+', timing)
+
+
+def test_headers_are_for_admins_and_debug(app, client, history):
+    driver, admin = history
+    app.config['QUERY_STATS_HEADERS'] = 'admin'
+
+    assert 'X-Query-Count' not in client.get('/api/user/dashboard', headers=driver).headers
+    assert 'X-Query-Count' not in client.get('/api/health').headers
+    response = client.get('/api/admin/dashboard', headers=admin)
+    assert 'X-Query-Count' in response.headers
+    assert 'Server-Timing' in response.headers
+
+    app.debug = True
+    assert 'X-Query-Count' in client.get('/api/user/dashboard', headers=driver).headers
+
+    app.config['QUERY_STATS_HEADERS'] = 'never'
+    assert 'X-Query-Count' not in client.get('/api/admin/dashboard', headers=admin).headers
+
+
+@pytest.mark.parametrize('path, budget', [
+    ('/api/user/dashboard', 4),
+    ('/api/user/parking-lots', 3),
+    ('/api/user/parking-history', 3),
+    ('/api/user/parking-history/detailed', 4),
+    ('/api/user/active-reservation', 4),
+    ('/api/user/cost-summary', 2),
+])
+def test_user_routes_stay_within_budget(client, history, path, budget):
+    driver, _ = history
+    response = client.get(path, headers=driver)
+    assert response.status_code == 200
+    assert_query_budget(response, budget)
+
+
+@pytest.mark.parametrize('path, budget', [
+    # Budgets include loading the admin's principal on this first request
+    ('/api/admin/dashboard', 3),
+    ('/api/admin/parking-lots', 3),
+    ('/api/admin/users', 5),
+    ('/api/admin/reservations', 3),
+    ('/api/admin/reservations/detailed', 3),
+    ('/api/admin/analytics/revenue', 7),
+])
+def test_admin_routes_stay_within_budget(client, history, path, budget):
+    _, admin = history
+    response = client.get(path, headers=admin)
+    assert response.status_code == 200
+    assert_query_budget(response, budget)
@@ -0,0 +1,101 @@
+import time
+
+from conftest import make_lot, make_user, park_and_release
+
+
+def wait_for(client, location, headers, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(location, headers=headers).get_json()['job']
+        if job['status'] not in ('pending', 'running') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_long_window_is_queued_and_reused(app, client):
+    app.config['JOBS_EAGER'] = True
+    _, admin = make_user(app, username='admin', is_admin=True)
+
+    inline = client.get('/api/admin/analytics/charts/dashboard?days=30', headers=admin)
+    assert inline.status_code == 200
+
+    response = client.get('/api/admin/analytics/charts/dashboard?days=365', headers=admin)
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert response.headers['Location'] == f"/api/admin/jobs/{job['job_id']}"
+    assert job['status'] == 'succeeded'
+    assert job['result']['charts'].keys() == inline.get_json()['charts'].keys()
+    assert job['result']['summary']['period_days'] == 365
+
+    again = client.get('/api/admin/analytics/charts/dashboard?days=365', headers=admin).get_json()['job']
+    assert again['job_id'] == job['job_id']
+
+    # A lot change invalidates the cached result
+    client.post('/api/admin/parking-lots', headers=admin, json={
+        'name': 'New Lot', 'address': 'Somewhere', 'pin_code': '560001',
+        'total_spots': 2, 'price_per_hour': 30.0
+    })
+    fresh = client.get('/api/admin/analytics/charts/dashboard?days=365', headers=admin).get_json()['job']
+    assert fresh['job_id'] != job['job_id']
+
+
+def test_user_report_runs_on_the_local_pool(app, client):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    park_and_release(client, driver, lot_id, 'KA01')
+
+    response = client.post('/api/user/jobs', headers=driver, json={'report': 'personal-charts', 'days': 400})
+    assert response.status_code == 202
+
+    job = wait_for(client, response.headers['Location'], driver)
+    assert job['status'] == 'succeeded'
+    assert job['report'] == 'personal-charts'
+    assert job['result']['summary']['total_sessions'] == 1
+
+
+def test_jobs_are_private_to_their_owner(app, client):
+    app.config['JOBS_EAGER'] = True
+    _, driver = make_user(app)
+    _, other = make_user(app, username='other')
+    _, admin = make_user(app, username='admin', is_admin=True)
+
+    location = client.post('/api/user/jobs', headers=driver,
+                           json={'report': 'cost-analysis-charts'}).headers['Location']
+    job_id = location.rsplit('/', 1)[1]
+
+    assert client.get(location, headers=driver).status_code == 200
+    assert client.get(location, headers=other).status_code == 404
+    assert client.get(f'/api/admin/jobs/{job_id}', headers=admin).status_code == 404
+
+    assert client.post('/api/user/jobs', headers=driver, json={'report': 'dashboard-charts'}).status_code == 400
+    assert client.post('/api/admin/jobs', headers=admin, json={'report': 'personal-charts'}).status_code == 400
+    assert client.post('/api/admin/jobs', headers=admin,
+                       json={'report': 'dashboard-charts', 'days': 'all'}).status_code == 400
+
+
+def test_job_records_survive_cache_eviction(app, client):
+    from app.utils.cache import cache_backend
+
+    app.config['JOBS_EAGER'] = True
+    _, driver = make_user(app)
+    location = client.post('/api/user/jobs', headers=driver,
+                           json={'report': 'cost-analysis-charts'}).headers['Location']
+
+    with app.app_context():
+        backend = cache_backend()
+        for n in range(backend.max_entries + 1):
+            backend.set(f'filler:{n}', 'x')
+    assert client.get(location, headers=driver).get_json()['job']['status'] == 'succeeded'
+
+
+def test_results_are_shared_through_the_redis_cache(monkeypatch, tmp_path):
+    from conftest import app_main
+
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'jobs.db'}")
+    monkeypatch.setenv('CACHE_URL', 'redis://cache.internal:6379/2')
+    app = app_main.create_app()
+    assert app.extensions['report_jobs'].celery.conf.result_backend == 'redis://cache.internal:6379/2'
+
+    monkeypatch.setenv('CACHE_URL', 'memory://')
+    app = app_main.create_app()
+    assert app.extensions['report_jobs'].celery.conf.result_backend == 'cache+memory://'
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from conftest import make_lot, make_user, park_and_release
+
+from app.models import db
+from app.models.reservation import Reservation
+from app.utils import export as reservation_export
+
+
+def test_ndjson_export_streams_filtered_rows(app, client, admin_headers):
+    lot_id = make_lot(app)
+    other_lot = make_lot(app, name='Second Lot')
+    driver_id, driver = make_user(app)
+    first = park_and_release(client, driver, lot_id, 'KA01')
+    park_and_release(client, driver, other_lot, 'KA02')
+    client.post('/api/user/reserve-spot', headers=driver, json={'lot_id': lot_id, 'vehicle_number': 'KA03'})
+
+    response = client.get(f'/api/admin/reservations/export?lot_id={lot_id}&status=completed',
+                          headers=admin_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['id'] for row in rows] == [first]
+    assert rows[0]['username'] == 'driver'
+    assert rows[0]['lot_name'] == 'Test Lot'
+    assert rows[0]['user_id'] == driver_id
+    assert set(rows[0]) == set(reservation_export.FIELD_NAMES)
+
+
+def test_csv_export_writes_header_and_date_window(app, client, admin_headers):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    old = park_and_release(client, driver, lot_id, 'KA01')
+    recent = park_and_release(client, driver, lot_id, 'KA02')
+    with app.app_context():
+        db.session.get(Reservation, old).created_at = datetime.utcnow() - timedelta(days=10)
+        db.session.commit()
+
+    since = (datetime.utcnow() - timedelta(days=1)).isoformat() + 'Z'
+    response = client.get(f'/api/admin/reservations/export?format=csv&date_from={since}', headers=admin_headers)
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert tuple(rows[0]) == reservation_export.FIELD_NAMES
+    assert [int(row[0]) for row in rows[1:]] == [recent]
+
+
+def test_export_reads_in_chunks(app):
+    lot_id = make_lot(app)
+    user_id, _ = make_user(app)
+    with app.app_context():
+        for i in range(5):
+            db.session.add(Reservation(user_id=user_id, spot_id=1, vehicle_number=f'KA{i}',
+                                       status='completed', hourly_rate=40.0, total_cost=40.0))
+        db.session.commit()
+        chunks = list(reservation_export.stream_chunks(reservation_export.export_statement(lot_id=lot_id),
+                                                       chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_export_rejects_bad_input_and_non_admins(app, client, admin_headers, user_headers):
+    assert client.get('/api/admin/reservations/export?format=xml', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/reservations/export?date_to=soon', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/reservations/export', headers=user_headers).status_code == 403
@@ -0,0 +1,67 @@
+from conftest import make_lot, make_user, park_and_release
+
+from app.models import db
+from app.models.reservation import Reservation
+
+
+def test_lists_are_compact_and_honour_fields(app, client, admin_headers):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    park_and_release(client, driver, lot_id, 'KA01')
+
+    history = client.get('/api/user/parking-history', headers=driver).get_json()
+    row = history['reservations'][0]
+    assert set(row) == set(Reservation.FIELDS)
+    assert row['duration_formatted'] == '0m'
+
+    projected = client.get('/api/user/parking-history?fields=id,status,total_cost', headers=driver).get_json()
+    assert projected['reservations'] == [{'id': row['id'], 'status': 'completed', 'total_cost': 40.0}]
+
+    admin_rows = client.get('/api/admin/reservations?fields=id,duration_hours', headers=admin_headers).get_json()
+    assert admin_rows['reservations'] == [{'id': row['id'], 'duration_hours': 0.0}]
+
+    response = client.get('/api/user/parking-history?fields=id,password', headers=driver)
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['error']
+
+
+def test_cost_breakdown_is_served_by_the_detail_endpoints(app, client, admin_headers):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    _, other = make_user(app, username='rider')
+    reservation_id = park_and_release(client, driver, lot_id, 'KA01')
+
+    detail = client.get(f'/api/user/reservations/{reservation_id}', headers=driver).get_json()['reservation']
+    assert detail['cost_breakdown']['cost_breakdown']['total_cost'] == 40.0
+    assert client.get(f'/api/user/reservations/{reservation_id}', headers=other).status_code == 404
+
+    admin_detail = client.get(f'/api/admin/reservations/{reservation_id}', headers=admin_headers).get_json()['reservation']
+    assert admin_detail['user_details']['username'] == 'driver'
+    assert admin_detail['lot_details']['id'] == lot_id
+    assert admin_detail['cost_breakdown']['payment_summary']['total_amount'] == 40.0
+
+
+def test_to_dict_reloads_expired_columns(app, client):
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    reservation_id = park_and_release(client, driver, lot_id, 'KA01')
+
+    with app.app_context():
+        reservation = db.session.get(Reservation, reservation_id)
+        reservation.total_cost = 55.0
+        db.session.commit()
+        assert reservation.to_dict(('id', 'total_cost')) == {'id': reservation_id, 'total_cost': 55.0}
+
+
+def test_to_dict_loads_deferred_columns(app, client):
+    from sqlalchemy.orm import load_only
+
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    reservation_id = park_and_release(client, driver, lot_id, 'KA01')
+
+    with app.app_context():
+        full = db.session.get(Reservation, reservation_id).to_dict()
+        db.session.expunge_all()
+        partial = Reservation.query.options(load_only(Reservation.id, Reservation.status)).one()
+        assert partial.to_dict() == full
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+from conftest import make_lot, make_user, park_and_release
+
+from app.models import db
+from app.models.reservation import Reservation
+from app.models.revenue_rollup import RevenueRollup
+
+
+def bucket_rows(app):
+    with app.app_context():
+        rows = RevenueRollup.query.order_by(
+            RevenueRollup.day, RevenueRollup.lot_id, RevenueRollup.start_hour
+        ).all()
+        return [
+            (row.day, row.lot_id, row.start_hour) + tuple(round(getattr(row, name), 6) for name in RevenueRollup.SUM_COLUMNS)
+            for row in rows
+        ]
+
+
+def backdate(app, reservation_id, hours):
+    """Move a session's start back so it lands in a longer duration bracket"""
+    with app.app_context():
+        reservation = db.session.get(Reservation, reservation_id)
+        reservation.parking_start_time -= timedelta(hours=hours)
+        db.session.commit()
+
+
+def test_release_updates_rollup_like_a_rebuild(app, client):
+    lot_id = make_lot(app, price_per_hour=40.0)
+    other_lot = make_lot(app, name='Second Lot', price_per_hour=25.0)
+    _, driver = make_user(app)
+    _, other = make_user(app, username='rider')
+
+    park_and_release(client, driver, lot_id, 'KA01')
+    park_and_release(client, other, lot_id, 'KA02')
+    park_and_release(client, driver, other_lot, 'KA03')
+
+    incremental = bucket_rows(app)
+    assert sum(row[4] for row in incremental) == 3
+
+    with app.app_context():
+        RevenueRollup.rebuild()
+        db.session.commit()
+    assert bucket_rows(app) == incremental
+
+
+def test_revenue_endpoints_read_the_rollup(app, client, admin_headers):
+    lot_id = make_lot(app, price_per_hour=40.0)
+    _, driver = make_user(app)
+
+    park_and_release(client, driver, lot_id, 'KA01')
+    long_stay = park_and_release(client, driver, lot_id, 'KA02')
+
+    # Stretch the second session to ~3h and rebuild, as the CLI command would
+    backdate(app, long_stay, 3)
+    with app.app_context():
+        reservation = db.session.get(Reservation, long_stay)
+        reservation.total_cost = 120.0
+        RevenueRollup.rebuild()
+        db.session.commit()
+
+    revenue = client.get('/api/admin/analytics/revenue', headers=admin_headers).get_json()
+    assert revenue['total_sessions'] == 2
+    assert revenue['total_revenue'] == 160.0
+    assert revenue['top_users'][0]['total_revenue'] == 160.0
+    assert revenue['revenue_by_lot']['Test Lot']['sessions'] == 2
+
+    breakdown = client.get('/api/admin/analytics/charts/revenue-breakdown', headers=admin_headers).get_json()
+    duration_chart = breakdown['charts']['duration_revenue']
+    durations = dict(zip(duration_chart['labels'], duration_chart['datasets'][0]['data']))
+    assert durations['0-1 hours'] == 40.0
+    assert durations['2-4 hours'] == 120.0
+
+    dashboard = client.get('/api/admin/analytics/charts/dashboard', headers=admin_headers).get_json()
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    timeline = dashboard['charts']['revenue_timeline']
+    by_day = dict(zip(timeline['labels'], timeline['datasets'][0]['data']))
+    assert by_day[today] == 160.0
+
+
+def test_upgrade_backfills_an_empty_rollup(app, client):
+    from app.utils.schema import upgrade_schema
+
+    lot_id = make_lot(app)
+    _, driver = make_user(app)
+    park_and_release(client, driver, lot_id, 'KA01')
+    expected = bucket_rows(app)
+
+    with app.app_context():
+        RevenueRollup.query.delete()
+        db.session.commit()
+        assert 'revenue_rollups (backfilled)' in upgrade_schema()
+        assert upgrade_schema() == []
+    assert bucket_rows(app) == expected
+
+
+def test_top_users_use_the_rollup_window(app, client):
+    from app.utils import analytics
+
+    lot_id = make_lot(app, price_per_hour=40.0)
+    _, driver = make_user(app)
+    park_and_release(client, driver, lot_id, 'KA01')
+
+    with app.app_context():
+        # A window starting later today still covers today's sessions, as the rollup does
+        start_date = datetime.utcnow() + timedelta(seconds=1)
+        top, others = analytics.top_users_by_revenue(start_date)
+        totals = analytics.revenue_totals(start_date)
+    assert [user['revenue'] for user in top] == [40.0]
+    assert others == 0.0
+    assert totals['revenue'] == 40.0
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from conftest import count_queries, make_lot, make_user
+
+from app.models import db
+from app.models.reservation import Reservation
+from app.utils.analytics import SessionFrame
+from app.utils.occupancy import to_epoch
+
+
+def frame_of(sessions, lot_names=None):
+    """sessions: [(user_id, lot_id, start datetime, hours, cost)]"""
+    user_id, lot_id, start, hours, cost = (np.array(column) for column in zip(*sessions))
+    starts = np.array([to_epoch(moment) for moment in start])
+    return SessionFrame(user_id, lot_id, np.zeros(len(cost), dtype=np.int64),
+                        starts, starts + hours * 3600, cost.astype(float), lot_names)
+
+
+def test_group_bys_match_python():
+    monday = datetime(2025, 3, 3, 9, 30)
+    frame = frame_of([
+        (1, 10, monday, 0.5, 40.0),                               # Mon 09:xx, 0-1h
+        (1, 10, monday + timedelta(hours=2), 3.0, 120.0),         # Mon 11:xx, 2-4h
+        (2, 20, monday + timedelta(days=6, hours=14), 1.0, 40.0), # Sun 23:xx, ends Mon
+        (3, 20, monday + timedelta(days=30), 9.0, 360.0),         # April, 8h+
+    ], lot_names={10: 'North', 20: 'South'})
+
+    assert frame.by_day() == {
+        '2025-03-03': {'sessions': 2, 'cost': 160.0},
+        '2025-03-10': {'sessions': 1, 'cost': 40.0},
+        '2025-04-02': {'sessions': 1, 'cost': 360.0},
+    }
+    assert frame.by_month() == {
+        '2025-03': {'sessions': 3, 'cost': 200.0},
+        '2025-04': {'sessions': 1, 'cost': 360.0},
+    }
+    sessions, costs = frame.by_weekday()
+    assert sessions.tolist() == [2, 0, 1, 0, 0, 0, 1]
+    assert costs[6] == 40.0
+    assert frame.by_hour()[0][[9, 11, 23]].tolist() == [2, 1, 1]
+    assert [bracket['sessions'] for bracket in frame.by_duration().values()] == [2, 0, 1, 0, 1]
+
+    lots = frame.by_lot()
+    assert lots['North'] == {'sessions': 2, 'cost': 160.0, 'hours': 3.5, 'billed_hours': 4.0}
+
+
+def test_personal_charts_use_a_fixed_number_of_queries(app, client):
+    lot_id = make_lot(app, total_spots=5)
+    user_id, headers = make_user(app)
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(40):
+            start = now - timedelta(days=i, hours=3)
+            db.session.add(Reservation(
+                user_id=user_id, spot_id=(i % 5) + 1, vehicle_number='KA01', status='completed',
+                hourly_rate=40.0, total_cost=80.0, parking_start_time=start,
+                parking_end_time=start + timedelta(hours=2), reservation_time=start
+            ))
+        db.session.commit()
+
+    with count_queries(app) as statements:
+        body = client.get('/api/user/analytics/charts/personal', headers=headers).get_json()
+    # user lookup, the session window, the lot-name lookup
+    assert len(statements) == 3
+    assert body['summary']['total_sessions'] == 40
+    assert body['summary']['total_spent'] == 3200.0
+    assert body['summary']['most_used_lot'] == 'Test Lot'
+    assert body['charts']['duration_distribution']['datasets'][0]['data'] == [0, 40, 0, 0, 0]
+
+    cost = client.get('/api/user/analytics/charts/cost-analysis', headers=headers).get_json()
+    assert cost['charts']['lot_efficiency']['datasets'][0]['data'] == [40.0]
@@ -0,0 +1,117 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import make_lot, make_user
+
+from app.models import db
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.utils.spot_allocator import spot_allocator
+
+
+def test_allocate_hands_out_each_spot_once(app):
+    lot_id = make_lot(app, total_spots=3)
+
+    with app.app_context():
+        spots = [spot_allocator.allocate(lot_id) for _ in range(4)]
+        db.session.commit()
+
+        assert spots[3] is None
+        assert len({spot.id for spot in spots[:3]}) == 3
+        assert all(spot.is_reserved for spot in spots[:3])
+
+
+def test_released_spot_goes_back_to_pool(app):
+    lot_id = make_lot(app, total_spots=1)
+
+    with app.app_context():
+        spot = spot_allocator.allocate(lot_id)
+        db.session.commit()
+        assert spot_allocator.allocate(lot_id) is None
+
+        spot.release_spot()
+        db.session.commit()
+        spot_allocator.release(lot_id, spot.id)
+
+        assert spot_allocator.allocate(lot_id).id == spot.id
+
+
+def test_rolled_back_hold_is_not_lost(app):
+    lot_id = make_lot(app, total_spots=1)
+
+    with app.app_context():
+        spot = spot_allocator.allocate(lot_id)
+        db.session.rollback()
+        spot_allocator.release(lot_id, spot.id)
+
+        assert spot_allocator.allocate(lot_id).id == spot.id
+
+
+def test_stale_pool_entries_are_skipped(app):
+    lot_id = make_lot(app, total_spots=2)
+
+    with app.app_context():
+        first = spot_allocator.allocate(lot_id)
+        db.session.commit()
+        # Another process takes the second spot behind this pool's back
+        ParkingSpot.query.filter_by(lot_id=lot_id).update({'is_occupied': True})
+        db.session.commit()
+
+        assert spot_allocator.allocate(lot_id) is None
+        assert first.is_reserved
+
+
+def test_concurrent_reservations_never_double_book(app):
+    total_spots = 40
+    threads = 16
+    attempts_per_thread = 4
+    lot_id = make_lot(app, total_spots=total_spots)
+    drivers = [[make_user(app, username=f'driver{worker}_{i}')[1] for i in range(attempts_per_thread)]
+               for worker in range(threads)]
+
+    def reserve_many(worker):
+        client = app.test_client()
+        results = []
+        for i, headers in enumerate(drivers[worker]):
+            response = client.post('/api/user/reserve-spot', headers=headers,
+                                   json={'lot_id': lot_id, 'vehicle_number': f'KA{worker:02d}{i:04d}'})
+            results.append((response.status_code, response.get_json()))
+        return results
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = [r for batch in pool.map(reserve_many, range(threads)) for r in batch]
+
+    statuses = Counter(status for status, _ in results)
+    assert statuses == {201: total_spots, 400: threads * attempts_per_thread - total_spots}
+
+    handed_out = [body['spot']['id'] for status, body in results if status == 201]
+    assert len(handed_out) == len(set(handed_out))
+
+    with app.app_context():
+        spot_ids = [r.spot_id for r in Reservation.query.filter_by(status='reserved').all()]
+        assert len(spot_ids) == total_spots
+        assert len(set(spot_ids)) == total_spots
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, is_reserved=True).count() == total_spots
+
+
+def test_one_driver_gets_one_hold(app):
+    threads = 8
+    lot_id = make_lot(app, total_spots=10)
+    _, headers = make_user(app)
+
+    def reserve(worker):
+        response = app.test_client().post('/api/user/reserve-spot', headers=headers,
+                                          json={'lot_id': lot_id, 'vehicle_number': f'KA{worker:04d}'})
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = Counter(pool.map(reserve, range(threads)))
+    assert statuses == {201: 1, 400: threads - 1}
+
+    with app.app_context():
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, is_reserved=True).count() == 1
+
+    # Still refused once the hold is the only open reservation
+    response = app.test_client().post('/api/user/reserve-spot', headers=headers,
+                                      json={'lot_id': lot_id, 'vehicle_number': 'KA9999'})
+    assert response.status_code == 400
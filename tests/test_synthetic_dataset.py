@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import db
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.reservation import Reservation
+from app.models.revenue_rollup import RevenueRollup
+from app.models.user import User
+from app.utils.synthetic import generate_dataset
+
+NOW = datetime(2024, 6, 1, 12, 0)
+SMALL = dict(users=200, lots=5, spots_per_lot=20, months=2, reservations=5000, now=NOW)
+
+
+def rollup_rows():
+    columns = [getattr(RevenueRollup, name) for name in ('day', 'lot_id', 'start_hour') + RevenueRollup.SUM_COLUMNS]
+    return db.session.execute(select(*columns).order_by(*columns[:3])).all()
+
+
+def test_counters_match_the_rows(app):
+    with app.app_context():
+        counts = generate_dataset(**SMALL)
+        assert counts['reservations'] == Reservation.query.count() == 5000
+        statuses = dict(db.session.query(Reservation.status, func.count()).group_by(Reservation.status))
+        assert statuses == {name: counts[key] for name, key in (
+            ('completed', 'completed'), ('active', 'active'), ('reserved', 'reserved'), ('expired', 'expired')
+        ) if counts[key]}
+
+        # One open session per driver, and every occupied spot has exactly one
+        open_sessions = db.session.execute(
+            select(func.count(), func.count(Reservation.user_id.distinct()))
+            .where(Reservation.status.in_(['active', 'reserved']))
+        ).one()
+        assert open_sessions[0] == open_sessions[1]
+        assert ParkingSpot.query.filter_by(is_occupied=True).count() == counts['active']
+        for lot in ParkingLot.query:
+            assert lot.available_spot_count == ParkingSpot.query.filter_by(
+                lot_id=lot.id, is_occupied=False, is_reserved=False, is_active=True
+            ).count()
+
+        spent = db.session.query(func.sum(User.total_spent)).scalar()
+        revenue = db.session.query(func.sum(Reservation.total_cost)).scalar()
+        assert spent == pytest.approx(revenue)
+
+        # The vectorised rollups are what the app would have built
+        generated = rollup_rows()
+        assert RevenueRollup.rebuild() == len(generated)
+        db.session.commit()
+        rebuilt = rollup_rows()
+        assert [row[:3] for row in generated] == [row[:3] for row in rebuilt]
+        for ours, theirs in zip(generated, rebuilt):
+            assert ours[3:] == pytest.approx(theirs[3:])
+
+        with pytest.raises(ValueError):
+            generate_dataset(**SMALL)
+
+
+def test_same_seed_same_rows(app):
+    def snapshot():
+        return db.session.execute(
+            select(Reservation.user_id, Reservation.spot_id, Reservation.status,
+                   Reservation.parking_start_time, Reservation.total_cost)
+            .order_by(Reservation.id).limit(500)
+        ).all()
+
+    with app.app_context():
+        generate_dataset(**SMALL)
+        first = snapshot()
+        Reservation.query.delete()
+        RevenueRollup.query.delete()
+        ParkingSpot.query.delete()
+        ParkingLot.query.delete()
+        User.query.delete()
+        db.session.commit()
+        generate_dataset(**SMALL)
+        assert snapshot() == first